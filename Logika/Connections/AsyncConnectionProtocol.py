@@ -0,0 +1,116 @@
+import asyncio
+from typing import Optional
+
+from Logika.ECommException import ECommException, ExcSeverity, CommError
+from Logika.Utils.ByteQueue import ByteQueue
+
+
+class AsyncConnectionProtocol(asyncio.BufferedProtocol, asyncio.DatagramProtocol):
+    # предел объема принятых, но не прочитанных данных на одно соединение
+    HIGH_WATER = 0x10000
+
+    def __init__(self, high_water: int = HIGH_WATER):
+        self.transport = None
+        self.high_water = high_water
+        self.low_water = high_water // 4
+        self.rx_que: ByteQueue = ByteQueue(0x800)
+        self.rx_event: asyncio.Event = asyncio.Event()
+        self.rx_error: Optional[Exception] = None
+        self.read_paused = False
+        self.write_paused = False
+        self.drain_waiter: Optional[asyncio.Future] = None
+        self.closed = False
+        self.dropped_datagrams = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def connection_lost(self, exc: Optional[Exception]):
+        self.closed = True
+        self.rx_error = exc
+        self.rx_event.set()
+        self.wake_writer()
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        # поток принимается прямо в свободную область очереди
+        return self.rx_que.writable_view(max(sizehint, 0x400) if sizehint > 0 else 0x400)
+
+    def buffer_updated(self, nbytes: int):
+        self.rx_que.commit(nbytes)
+        self.rx_event.set()
+        if not self.read_paused and self.rx_que.length > self.high_water:
+            self.read_paused = True
+            self.transport.pause_reading()
+
+    def eof_received(self):
+        self.closed = True
+        self.rx_event.set()
+        return False
+
+    def datagram_received(self, data: bytes, addr):
+        # у UDP нет управления потоком - лишнее отбрасываем
+        if self.rx_que.length + len(data) > self.high_water:
+            self.dropped_datagrams += 1
+            return
+        self.rx_que.enqueue(data, 0, len(data))
+        self.rx_event.set()
+
+    def error_received(self, exc: Exception):
+        self.rx_error = exc
+        self.rx_event.set()
+
+    def pause_writing(self):
+        self.write_paused = True
+
+    def resume_writing(self):
+        self.write_paused = False
+        self.wake_writer()
+
+    def wake_writer(self):
+        waiter = self.drain_waiter
+        self.drain_waiter = None
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def drain(self):
+        if self.closed:
+            raise ECommException(ExcSeverity.Reset, CommError.NotConnected)
+        if not self.write_paused:
+            return
+        self.drain_waiter = asyncio.get_running_loop().create_future()
+        await self.drain_waiter
+
+    async def read(self, buf: bytearray, start: int, max_length: int, timeout: float) -> int:
+        while self.rx_que.length == 0:
+            if self.rx_error is not None:
+                e = self.rx_error
+                if not self.closed:
+                    self.rx_error = None
+                raise ECommException(ExcSeverity.Reset, CommError.SystemError, str(e))
+            if self.closed:
+                raise ECommException(ExcSeverity.Reset, CommError.SystemError,
+                                     "соединение завершено удаленной стороной")
+
+            self.rx_event.clear()
+            try:
+                await asyncio.wait_for(self.rx_event.wait(), timeout)
+            except asyncio.TimeoutError:
+                raise ECommException(ExcSeverity.Error, CommError.Timeout)
+
+        n_read = self.rx_que.dequeue(buf, start, max_length)
+        self.resume_if_drained()
+
+        return n_read
+
+    def purge(self):
+        self.rx_que.clear()
+        self.resume_if_drained()
+
+    def resume_if_drained(self):
+        if self.read_paused and self.rx_que.length <= self.low_water:
+            self.read_paused = False
+            self.transport.resume_reading()
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
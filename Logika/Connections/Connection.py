@@ -1,13 +1,17 @@
+import asyncio
 import gc
 import threading
+import time
 from abc import ABC, abstractmethod
 from datetime import datetime
 from enum import Enum
 from enum import Flag, auto
 from typing import Optional
 
+from Logika.Connections.ConnectionStats import ConnectionStats
 from Logika.ECommException import ECommException, ExcSeverity, CommError
 from Logika.LogLevel import LogLevel
+from Logika.Utils.ByteQueue import ByteQueue
 
 
 class ManualResetEvent:
@@ -82,6 +86,9 @@ class EventHandler:
 
 
 class Connection(ABC):
+    RX_BUFFER_SIZE = 0x1000
+    RX_CHUNK_SIZE = 0x400  # минимальное свободное место в буфере под один вызов internal_read
+
     def __init__(self, address: str, read_timeout: int):
         self.on_connection_state_change = None
         self.m_last_rx_time: datetime = datetime.min
@@ -97,18 +104,33 @@ class Connection(ABC):
         self.on_before_disconnect: EventHandler = EventHandler()
         self.on_after_connect: EventHandler = EventHandler()
         self.on_connect_required: EventHandler = EventHandler()
+        self.on_bus_state_reset: EventHandler = EventHandler()
+        self.m_lock = threading.RLock()
+        self.m_async_lock = asyncio.Lock()
+        self.rx_buf: ByteQueue = ByteQueue(self.RX_BUFFER_SIZE)
+        # запись обмена (WireCapture), None - не ведется
+        self.capture = None
+        # крайний срок текущей операции приема (time.monotonic), None - ограничен только read_timeout
+        self.rx_deadline: Optional[float] = None
+        # длина принимаемого кадра известна протоколу из заголовка: конец кадра определяется по длине,
+        # а не по паузе в линии (см. rx_frame_ended)
+        self.rx_frame_len_known: bool = False
+        # статистика обмена: время и размер последнего запроса, время прихода первого байта ответа
+        self.stats: Optional[ConnectionStats] = ConnectionStats()
+        self.m_request_time = 0.0
+        self.m_request_size = 0
+        self.m_first_rx_time = 0.0
 
     @abstractmethod
     def dispose(self, disposing: bool):
         self.dispose(True)
         gc.disable()
 
-    @staticmethod
-    def reset_bus_state_tracker():
-        print("resetting bus state")
+    def reset_bus_state_tracker(self):
+        self.on_bus_state_reset.fire()
 
     def check_if_closing(self):
-        if self.closing_event.wait():
+        if self.closing_event.state:
             raise ECommException(ExcSeverity.Stop, CommError.NotConnected)
 
     def check_if_connected(self):
@@ -146,49 +168,82 @@ class Connection(ABC):
     def resource_name(self):
         return None
 
-    async def open(self):
-        async with threading.Lock:
-            self.closing_event.reset()
-            self.state = ConnectionState.Connecting
+    # асинхронные варианты транспорта; транспорт без собственной поддержки asyncio
+    # выполняет синхронные операции в пуле потоков
+    async def internal_open_async(self, connect_details: str):
+        await asyncio.get_running_loop().run_in_executor(None, self.internal_open, connect_details)
 
-            try:
-                connstr = "установка соединения" + ("" if self.address == "" else " с " + self.address)
-                if self.resource_name != self.address and self.resource_name != "":
-                    connstr += " (" + str(self.resource_name) + ")"
-                self.log(LogLevel.Info, connstr)
+    async def internal_close_async(self):
+        await asyncio.get_running_loop().run_in_executor(None, self.internal_close)
+
+    async def internal_read_async(self, buf: bytearray, start: int, max_length: int) -> int:
+        return await asyncio.get_running_loop().run_in_executor(None, self.internal_read, buf, start, max_length)
+
+    async def internal_write_async(self, buf: bytes, start: int, n_bytes: int):
+        await asyncio.get_running_loop().run_in_executor(None, self.internal_write, buf, start, n_bytes)
+
+    def begin_open(self):
+        self.closing_event.reset()
+        self.state = ConnectionState.Connecting
+
+        connstr = "установка соединения" + ("" if self.address == "" else " с " + self.address)
+        if self.resource_name != self.address and self.resource_name != "":
+            connstr += " (" + str(self.resource_name) + ")"
+        self.log(LogLevel.Info, connstr)
+
+    def end_open(self, conn_details: str):
+        self.state = ConnectionState.Connected
+
+        self.log(LogLevel.Info, "соединение установлено" + ("" if conn_details == "" else " (" + conn_details + ")"))
 
+        try:
+            self.on_after_connect.fire()
+        except:
+            pass
+
+    def open(self):
+        with self.m_lock:
+            self.begin_open()
+            try:
                 connDetails = ""
                 self.internal_open(connDetails)
+                self.end_open(connDetails)
 
-                self.state = ConnectionState.Connected
-
-                self.log(LogLevel.Info,
-                         "соединение установлено" + ("" if connDetails == "" else " (" + connDetails + ")"))
+            except Exception as e:
+                self.state = ConnectionState.NotConnected
+                self.log(LogLevel.Error, "", e)
+                raise
 
-                if self.on_after_connect is not None:
-                    try:
-                        self.on_after_connect.add_handler(None)
-                    except:
-                        pass
+    async def open_async(self):
+        async with self.m_async_lock:
+            self.begin_open()
+            try:
+                connDetails = ""
+                await self.internal_open_async(connDetails)
+                self.end_open(connDetails)
 
             except Exception as e:
+                self.state = ConnectionState.NotConnected
                 self.log(LogLevel.Error, "", e)
                 raise
 
-    def close(self):
-        self.closing_event.reset()
+    def begin_close(self) -> bool:
+        self.closing_event.set()
+        if self.state != ConnectionState.Connected:
+            return False
 
-        with threading.Lock:
-            if self.state == ConnectionState.Connected:
-                try:
-                    self.state = ConnectionState.Disconnecting
+        self.state = ConnectionState.Disconnecting
+        try:
+            self.on_before_disconnect.fire()
+        except:
+            pass
 
-                    if self.on_before_disconnect is not None:
-                        try:
-                            self.on_before_disconnect.add_handler(None)
-                        except:
-                            pass
+        return True
 
+    def close(self):
+        with self.m_lock:
+            if self.begin_close():
+                try:
                     self.internal_close()
                     self.log(LogLevel.Info, "соединение завершено")
 
@@ -197,11 +252,25 @@ class Connection(ABC):
 
             self.state = ConnectionState.NotConnected
 
+    async def close_async(self):
+        async with self.m_async_lock:
+            if self.begin_close():
+                try:
+                    await self.internal_close_async()
+                    self.log(LogLevel.Info, "соединение завершено")
+
+                except Exception as e:
+                    self.log(LogLevel.Warn, "ошибка при завершении соединения", e)
+
+            self.state = ConnectionState.NotConnected
+
     @abstractmethod
     def internal_purge_comms(self, what: PurgeFlags):
         pass
 
     def purge_comms(self, what: PurgeFlags):
+        if what & PurgeFlags.RX:
+            self.rx_buf.clear()
         if self.state == ConnectionState.Connected:
             self.internal_purge_comms(what)
             sp = "# purge "
@@ -210,38 +279,209 @@ class Connection(ABC):
             if what & PurgeFlags.TX:
                 sp += "TX"
 
-    def read_available(self, buf: bytes, start: int, maxLength: int) -> int:
+    # ожидание тишины в линии: принимаемые байты отбрасываются, выход - когда в течение quiet секунд
+    # ничего не принято, но не позже чем через limit секунд. tx_end - окончание передачи отправленных данных
+    # (time.monotonic), оба интервала отсчитываются не раньше него
+    def wait_rx_idle(self, quiet: float, limit: float, tx_end: Optional[float] = None):
+        self.rx_buf.clear()
+        start = time.monotonic() if tx_end is None else max(time.monotonic(), tx_end)
+        end = start + limit
+        last_rx = start
+        buf = bytearray(0x100)
+        while True:
+            idle_until = min(last_rx + quiet, end)
+            if time.monotonic() >= idle_until:
+                return
+            try:
+                n = self.read_available(buf, 0, len(buf), idle_until)
+            except ECommException as e:
+                if e.Reason != CommError.Timeout:
+                    raise
+                n = 0
+            if n > 0:
+                last_rx = time.monotonic()
+            else:
+                # транспорт мог вернуть управление, не дожидаясь данных
+                remaining = idle_until - time.monotonic()
+                if remaining > 0:
+                    time.sleep(remaining)
+
+    @staticmethod
+    def deadline_after(timeout_ms: int) -> float:
+        return time.monotonic() + timeout_ms / 1000
+
+    # время ожидания очередного чтения из канала в секундах: read_timeout, но не дальше крайнего срока
+    def rx_wait_time(self) -> float:
+        wait = self.read_timeout / 1000
+        if self.rx_deadline is not None:
+            remaining = self.rx_deadline - time.monotonic()
+            if remaining <= 0:
+                raise ECommException(ExcSeverity.Error, CommError.Timeout)
+            wait = min(wait, remaining)
+        return wait
+
+    def read_available(self, buf: bytes, start: int, maxLength: int, deadline: Optional[float] = None) -> int:
         self.check_if_connected()
+        if self.rx_buf.length > 0:
+            return self.rx_buf.dequeue(buf, start, maxLength)
+        self.rx_deadline = deadline
         try:
             nRead = self.internal_read(buf, start, maxLength)
             if nRead > 0:
                 self.rx_byte_cnt += nRead
-                rr = buf[start:start + nRead]
-        except Exception as e:
-            raise e
+                if self.m_first_rx_time == 0.0:
+                    self.m_first_rx_time = time.monotonic()
+                if self.capture is not None:
+                    self.capture.record(MonitorEventType.Rx, buf, start, nRead)
+        finally:
+            self.rx_deadline = None
 
         self.m_last_rx_time = datetime.now()
 
         return nRead
 
-    def read(self, buf: bytes, start: int, length: int):
+    def read(self, buf: bytes, start: int, length: int, deadline: Optional[float] = None):
         nRead = 0
 
         while nRead < length:
             self.check_if_closing()
-            nRead += self.read_available(buf, start + nRead, length - nRead)
+            nRead += self.read_available(buf, start + nRead, length - nRead, deadline)
 
     def write(self, buf: bytes, start: int, nBytes: int):
         self.check_if_connected()
         self.check_if_closing()
         try:
+            if self.capture is not None:
+                self.capture.record(MonitorEventType.Tx, buf, start, nBytes)
             self.internal_write(buf, start, nBytes)
             self.tx_byte_cnt += nBytes
-            if nBytes > 0:
-                wr = buf[start:start + nBytes]
+            self.begin_exchange(nBytes)
         except Exception as e:
             raise
 
+    async def read_available_async(self, buf: bytearray, start: int, maxLength: int,
+                                   deadline: Optional[float] = None) -> int:
+        self.check_if_connected()
+        if self.rx_buf.length > 0:
+            return self.rx_buf.dequeue(buf, start, maxLength)
+        self.rx_deadline = deadline
+        try:
+            nRead = await self.internal_read_async(buf, start, maxLength)
+        finally:
+            self.rx_deadline = None
+        if nRead > 0:
+            self.rx_byte_cnt += nRead
+            if self.m_first_rx_time == 0.0:
+                self.m_first_rx_time = time.monotonic()
+            if self.capture is not None:
+                self.capture.record(MonitorEventType.Rx, buf, start, nRead)
+
+        self.m_last_rx_time = datetime.now()
+
+        return nRead
+
+    async def read_async(self, buf: bytearray, start: int, length: int, deadline: Optional[float] = None):
+        nRead = 0
+
+        while nRead < length:
+            self.check_if_closing()
+            nRead += await self.read_available_async(buf, start + nRead, length - nRead, deadline)
+
+    async def write_async(self, buf: bytes, start: int, nBytes: int):
+        self.check_if_connected()
+        self.check_if_closing()
+        if self.capture is not None:
+            self.capture.record(MonitorEventType.Tx, buf, start, nBytes)
+        await self.internal_write_async(buf, start, nBytes)
+        self.tx_byte_cnt += nBytes
+        self.begin_exchange(nBytes)
+
+    def begin_exchange(self, request_size: int):
+        self.m_request_time = time.monotonic()
+        self.m_request_size = request_size
+        self.m_first_rx_time = 0.0
+
+    # протокол сообщает о завершении обмена (получен ответ или ошибка) на запрос, отправленный последним
+    def end_exchange(self, key: str, response_size: int, ok: bool = True):
+        if self.stats is not None and self.m_request_time > 0:
+            self.stats.record(key, self.m_request_time, self.m_first_rx_time, time.monotonic(),
+                              self.m_request_size, response_size, ok)
+
+    # буферизованный прием: fill() забирает из канала все, что доступно, за один вызов internal_read
+    # прямо в свободную область приемного буфера, остальные примитивы работают с накопленным буфером и обращаются к каналу только при нехватке данных
+    @property
+    def rx_buffered(self) -> int:
+        return self.rx_buf.length
+
+    def fill(self, deadline: Optional[float] = None) -> int:
+        self.check_if_connected()
+        self.check_if_closing()
+        view = self.rx_buf.writable_view(self.RX_CHUNK_SIZE)
+        self.rx_deadline = deadline
+        try:
+            nRead = self.internal_read(view, 0, len(view))
+        finally:
+            self.rx_deadline = None
+        return self.on_filled(view, nRead)
+
+    async def fill_async(self, deadline: Optional[float] = None) -> int:
+        self.check_if_connected()
+        self.check_if_closing()
+        view = self.rx_buf.writable_view(self.RX_CHUNK_SIZE)
+        self.rx_deadline = deadline
+        try:
+            nRead = await self.internal_read_async(view, 0, len(view))
+        finally:
+            self.rx_deadline = None
+        return self.on_filled(view, nRead)
+
+    def on_filled(self, view: memoryview, nRead: int) -> int:
+        if nRead > 0:
+            if self.capture is not None:
+                self.capture.record(MonitorEventType.Rx, view, 0, nRead)
+            self.rx_buf.commit(nRead)
+            self.rx_byte_cnt += nRead
+            if self.m_first_rx_time == 0.0:
+                self.m_first_rx_time = time.monotonic()
+
+        self.m_last_rx_time = datetime.now()
+
+        return nRead
+
+    def ensure_buffered(self, length: int, deadline: Optional[float] = None):
+        while self.rx_buf.length < length:
+            self.fill(deadline)
+
+    def peek(self, buf: bytearray, start: int, length: int, deadline: Optional[float] = None):
+        self.ensure_buffered(length, deadline)
+        self.rx_buf.peek(buf, start, length)
+
+    def find(self, value: int, start: int = 0, deadline: Optional[float] = None) -> int:
+        while True:
+            i = self.rx_buf.find(value, start)
+            if i >= 0:
+                return i
+            start = self.rx_buf.length
+            self.fill(deadline)
+
+    def skip(self, length: int):
+        self.rx_buf.clear(length)
+
+    def read_exact(self, buf: bytearray, start: int, length: int, deadline: Optional[float] = None):
+        self.ensure_buffered(length, deadline)
+        self.rx_buf.dequeue(buf, start, length)
+
+    def read_until(self, value: int, deadline: Optional[float] = None) -> bytearray:
+        n = self.find(value, 0, deadline) + 1
+        res = bytearray(n)
+        self.rx_buf.dequeue(res, 0, n)
+        return res
+
+    # признак того, что ответ на последний запрос уже закончился (линия молчит дольше межкадрового интервала);
+    # транспорт, не умеющий это определить, всегда возвращает False, и прием ждет полного таймаута
+    def rx_frame_ended(self) -> bool:
+        return False
+
     def state_change_delegate(self, new_state: ConnectionState):
         if self.on_connection_state_change is not None:
             self.on_connection_state_change(new_state)
@@ -283,3 +523,5 @@ class Connection(ABC):
     def reset_statistics(self):
         self.tx_byte_cnt = 0
         self.rx_byte_cnt = 0
+        if self.stats is not None:
+            self.stats.reset()
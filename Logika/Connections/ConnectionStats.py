@@ -0,0 +1,130 @@
+import threading
+import time
+from typing import Iterable
+
+from Logika.Utils.Histogram import Histogram
+
+
+class ExchangeStats:
+    def __init__(self):
+        self.ttfb = Histogram(Histogram.LATENCY_BOUNDS)  # запрос -> первый байт ответа
+        self.ttlb = Histogram(Histogram.LATENCY_BOUNDS)  # запрос -> последний байт ответа
+        self.request_size = Histogram(Histogram.SIZE_BOUNDS)
+        self.response_size = Histogram(Histogram.SIZE_BOUNDS)
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.failed_last = False
+        self.bytes = 0
+        self.busy_time = 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes / self.busy_time if self.busy_time > 0 else 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "bytes": self.bytes,
+            "bytes_per_second": self.bytes_per_second,
+            "ttfb": self.ttfb.snapshot(),
+            "ttlb": self.ttlb.snapshot(),
+            "request_size": self.request_size.snapshot(),
+            "response_size": self.response_size.snapshot(),
+        }
+
+
+# статистика обмена по соединению в разрезе кодов запросов: гистограммы задержек и размеров пакетов,
+# скорость обмена, ошибки и повторы (запрос того же типа после неудачного).
+# корзины выделяются один раз при первом запросе данного типа
+class ConnectionStats:
+    PREFIX = "logika"
+    FAMILIES = (
+        ("tx_bytes_total", "counter"),
+        ("rx_bytes_total", "counter"),
+        ("requests_total", "counter"),
+        ("request_errors_total", "counter"),
+        ("request_retries_total", "counter"),
+        ("exchange_bytes_total", "counter"),
+        ("exchange_bytes_per_second", "gauge"),
+        ("request_first_byte_seconds", "histogram"),
+        ("request_last_byte_seconds", "histogram"),
+        ("request_size_bytes", "histogram"),
+        ("response_size_bytes", "histogram"),
+    )
+
+    def __init__(self):
+        self.m_lock = threading.Lock()
+        self.exchanges: dict[str, ExchangeStats] = {}
+        self.started = time.monotonic()
+
+    def get(self, key: str) -> ExchangeStats:
+        es = self.exchanges.get(key)
+        if es is None:
+            with self.m_lock:
+                es = self.exchanges.setdefault(key, ExchangeStats())
+        return es
+
+    def record(self, key: str, request_time: float, first_rx_time: float, end_time: float,
+               request_size: int, response_size: int, ok: bool):
+        es = self.get(key)
+        es.requests += 1
+        if es.failed_last:
+            es.retries += 1
+        es.failed_last = not ok
+        if not ok:
+            es.errors += 1
+            return
+
+        es.ttfb.observe((first_rx_time if first_rx_time > 0 else end_time) - request_time)
+        es.ttlb.observe(end_time - request_time)
+        es.request_size.observe(request_size)
+        es.response_size.observe(response_size)
+        es.bytes += request_size + response_size
+        es.busy_time += end_time - request_time
+
+    def reset(self):
+        with self.m_lock:
+            self.exchanges.clear()
+            self.started = time.monotonic()
+
+    def snapshot(self) -> dict:
+        with self.m_lock:
+            items = list(self.exchanges.items())
+        return {key: es.snapshot() for key, es in items}
+
+    # строки метрик соединения, разложенные по семействам (в формате Prometheus семейство выводится одним блоком)
+    def collect(self, connection: str, families: dict[str, list[str]]):
+        with self.m_lock:
+            items = sorted(self.exchanges.items())
+        p = self.PREFIX
+        for key, es in items:
+            labels = f'connection="{connection}",opcode="{key}"'
+            families["requests_total"].append(f'{p}_requests_total{{{labels}}} {es.requests}')
+            families["request_errors_total"].append(f'{p}_request_errors_total{{{labels}}} {es.errors}')
+            families["request_retries_total"].append(f'{p}_request_retries_total{{{labels}}} {es.retries}')
+            families["exchange_bytes_total"].append(f'{p}_exchange_bytes_total{{{labels}}} {es.bytes}')
+            families["exchange_bytes_per_second"].append(
+                f'{p}_exchange_bytes_per_second{{{labels}}} {es.bytes_per_second:.1f}')
+            for name, h in (("request_first_byte_seconds", es.ttfb), ("request_last_byte_seconds", es.ttlb),
+                            ("request_size_bytes", es.request_size), ("response_size_bytes", es.response_size)):
+                families[name] += h.prometheus_lines(f'{p}_{name}', labels)
+
+    # текстовый формат Prometheus для набора соединений
+    @staticmethod
+    def prometheus_text(connections: Iterable) -> str:
+        p = ConnectionStats.PREFIX
+        families = {name: [] for name, _ in ConnectionStats.FAMILIES}
+        for c in connections:
+            families["tx_bytes_total"].append(f'{p}_tx_bytes_total{{connection="{c.address}"}} {c.tx_byte_cnt}')
+            families["rx_bytes_total"].append(f'{p}_rx_bytes_total{{connection="{c.address}"}} {c.rx_byte_cnt}')
+            if c.stats is not None:
+                c.stats.collect(c.address, families)
+
+        lines = []
+        for name, kind in ConnectionStats.FAMILIES:
+            lines.append(f"# TYPE {p}_{name} {kind}")
+            lines += families[name]
+        return "\n".join(lines) + "\n"
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 
+from Logika.Connections.AsyncConnectionProtocol import AsyncConnectionProtocol
 from Logika.Connections.Connection import Connection
 
 
@@ -8,6 +9,7 @@ class NetConnection(Connection):
         super().__init__(host + ":" + str(port), read_timeout)
         self.m_srv_host_name = host
         self.m_srv_port = port
+        self.async_proto: AsyncConnectionProtocol | None = None
 
     @abstractmethod
     def dispose(self, disposing: bool):
@@ -15,3 +17,11 @@ class NetConnection(Connection):
 
     def internal_open(self, connect_details: str):
         pass
+
+    async def internal_read_async(self, buf: bytearray, start: int, max_length: int) -> int:
+        return await self.async_proto.read(buf, start, max_length, self.rx_wait_time())
+
+    async def internal_close_async(self):
+        if self.async_proto is not None:
+            self.async_proto.close()
+            self.async_proto = None
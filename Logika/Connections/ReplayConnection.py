@@ -0,0 +1,79 @@
+import time
+from typing import BinaryIO, Iterable
+
+from Logika.Connections.Connection import MonitorEventType, PurgeFlags
+from Logika.Connections.OfflineConnection import OfflineConnection
+from Logika.Connections.WireCapture import WireCapture, CaptureRecord
+from Logika.ECommException import ECommException, ExcSeverity, CommError
+
+
+# воспроизведение записи обмена (WireCapture) без прибора: принятые данные выдаются протоколу
+# в записанном порядке, отправляемые данные продвигают позицию воспроизведения.
+# paced=True - принятые фрагменты выдаются с записанными задержками относительно последней передачи,
+# иначе - без задержек; strict=True - отправляемые данные сверяются с записью
+class ReplayConnection(OfflineConnection):
+    def __init__(self, source: str | BinaryIO | Iterable[CaptureRecord], read_timeout: int = 5000,
+                 paced: bool = False, strict: bool = False):
+        super().__init__(None)
+        if isinstance(source, str):
+            self.address = source
+        self.records: list[CaptureRecord] = list(WireCapture.read_records(source)) \
+            if isinstance(source, str) or hasattr(source, "read") else list(source)
+        self.read_timeout = read_timeout
+        self.paced = paced
+        self.strict = strict
+        self.rewind()
+
+    def rewind(self):
+        self.pos = 0
+        self.offset = 0
+        self.anchor_wall = time.monotonic()
+        self.anchor_rec = 0.0
+
+    @property
+    def finished(self) -> bool:
+        return self.pos >= len(self.records)
+
+    def internal_open(self, connect_details: str):
+        self.rewind()
+
+    def internal_read(self, buf: bytearray, start: int, max_length: int) -> int:
+        if self.finished:
+            raise ECommException(ExcSeverity.Stop, CommError.NotConnected, "запись обмена закончилась")
+
+        rec = self.records[self.pos]
+        if rec.direction != MonitorEventType.Rx:
+            # в записи следующей идет передача - во время сеанса здесь был таймаут приема
+            raise ECommException(ExcSeverity.Error, CommError.Timeout)
+
+        if self.paced and self.offset == 0:
+            delay = (rec.t - self.anchor_rec) - (time.monotonic() - self.anchor_wall)
+            if delay > 0:
+                time.sleep(delay)
+
+        n = min(max_length, len(rec.data) - self.offset)
+        buf[start:start + n] = rec.data[self.offset:self.offset + n]
+        self.offset += n
+        if self.offset == len(rec.data):
+            self.pos += 1
+            self.offset = 0
+        return n
+
+    def internal_write(self, buf: bytes, start: int, n_bytes: int):
+        # непрочитанный остаток ответа в реальном сеансе тоже оставался бы в канале - пропускаем до передачи
+        while not self.finished and self.records[self.pos].direction != MonitorEventType.Tx:
+            self.pos += 1
+        self.offset = 0
+        if self.finished:
+            raise ECommException(ExcSeverity.Stop, CommError.NotConnected, "запись обмена закончилась")
+
+        rec = self.records[self.pos]
+        if self.strict and bytes(buf[start:start + n_bytes]) != rec.data:
+            raise ECommException(ExcSeverity.Stop, CommError.Unspecified,
+                                 f"расхождение с записью обмена в позиции {self.pos}")
+        self.pos += 1
+        self.anchor_wall = time.monotonic()
+        self.anchor_rec = rec.t
+
+    def internal_purge_comms(self, what: PurgeFlags):
+        pass
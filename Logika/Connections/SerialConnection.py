@@ -1,4 +1,4 @@
-from abc import ABC, abstractmethod
+from abc import abstractmethod
 from enum import Enum, IntEnum
 
 from Logika.Connections.Connection import Connection
@@ -27,9 +27,29 @@ class Parity(Enum):
     Even = 2
 
 
-class SerialConnection(ABC, Connection):
+class SerialConnection(Connection):
+    # конец кадра - пауза в линии не короче 3.5 символов, но не меньше min_frame_gap: USB-адаптеры отдают
+    # принятое порциями раз в 16 мс (latency timer), а приборы делают паузы между страницами flash в ответе
+    FRAME_GAP_CHARS = 3.5
+    MIN_FRAME_GAP = 0.05
+    BITS_PER_CHAR = 11
+
     def __init__(self, read_timeout: int, port_name: str):
         super().__init__(port_name, read_timeout)
+        self.min_frame_gap: float = self.MIN_FRAME_GAP
+
+    # межкадровый интервал в секундах для текущей скорости
+    @property
+    def frame_gap(self) -> float:
+        br = self.baud_rate
+        baud = BaudRate.b2400 if br == BaudRate.Undefined else br
+        return max(self.FRAME_GAP_CHARS * self.BITS_PER_CHAR / baud, self.min_frame_gap)
+
+    # время передачи n_bytes на текущей скорости, в секундах
+    def tx_time(self, n_bytes: int) -> float:
+        br = self.baud_rate
+        baud = BaudRate.b2400 if br == BaudRate.Undefined else br
+        return n_bytes * self.BITS_PER_CHAR / baud
 
     @property
     def can_change_baudrate(self) -> bool:
@@ -1,50 +1,155 @@
+import threading
+import time
+
 import serial
 
 from Logika.Connections.Connection import PurgeFlags, ConnectionState, Connection
 from Logika.Connections.SerialConnection import SerialConnection, BaudRate, StopBits, Parity
 from Logika.ECommException import ECommException, ExcSeverity, CommError
+from Logika.Utils.ByteQueue import ByteQueue
 
 
 class SerialPortConnection(SerialConnection):
-    def __init__(self, readTimeout: int, portName: str, baudRate: BaudRate, stopBits: StopBits):
+    RX_RING_SIZE = 0x2000
+
+    def __init__(self, readTimeout: int, portName: str, baudRate: BaudRate, stopBits: StopBits,
+                 backgroundReader: bool = False, frameGap: float = None):
+        self.port = None
         super().__init__(readTimeout, portName)
+        if frameGap is not None:
+            self.min_frame_gap = frameGap
         br = 2400 if baudRate == BaudRate.Undefined else baudRate.value
         sb = serial.STOPBITS_ONE if stopBits == StopBits.One else serial.STOPBITS_TWO
-        self.port = serial.Serial(port=portName, baudrate=br, parity=serial.PARITY_NONE, bytesize=8, stopbits=sb)
-        self.port.readTimeout = readTimeout
+        # порт открывается в internal_open, а не при создании объекта
+        self.port = serial.Serial(baudrate=br, parity=serial.PARITY_NONE, bytesize=8, stopbits=sb)
+        self.port.port = portName
+
+        # фоновый прием: поток забирает из порта все накопленное крупными порциями в кольцевой буфер,
+        # время приема последней порции (time.monotonic) - для определения конца кадра по паузе в линии
+        self.background_reader = backgroundReader
+        self.reader_thread: threading.Thread | None = None
+        self.reader_stop = threading.Event()
+        self.reader_error: Exception | None = None
+        self.rx_cond = threading.Condition()
+        self.rx_ring: ByteQueue = ByteQueue(self.RX_RING_SIZE)
+        self.last_rx_chunk_time = 0.0
+        self.last_tx_time = 0.0
+
+        self.on_set_read_timeout(readTimeout)
 
     @property
     def resource_name(self) -> str | None:
         return self.port.port
 
     def on_set_read_timeout(self, newTimeout: int):
-        self.port.readTimeout = newTimeout
+        if self.port is None:
+            return
+        if self.background_reader:
+            # поток приема опрашивает порт с шагом межкадрового интервала, чтобы вовремя заметить остановку
+            self.port.timeout = self.frame_gap
+        else:
+            self.port.timeout = newTimeout / 1000
 
     def internal_open(self, connectionDetails: str):
         connectionDetails = None
+        self.on_set_read_timeout(self.read_timeout)
         self.port.open()
         self.port.dtr = True
-        self.port.readTimeout = self.read_timeout
+        if self.background_reader:
+            self.start_reader()
 
     def internal_close(self):
+        self.stop_reader()
         self.port.close()
 
-    def internal_read(self, buf: bytes, start: int, maxLength: int) -> bytes:
+    def start_reader(self):
+        self.reader_stop.clear()
+        self.reader_error = None
+        with self.rx_cond:
+            self.rx_ring.clear()
+        self.reader_thread = threading.Thread(target=self.reader_loop, name="rx " + str(self.port.port), daemon=True)
+        self.reader_thread.start()
+
+    def stop_reader(self):
+        self.reader_stop.set()
+        if self.reader_thread is not None:
+            if self.reader_thread is not threading.current_thread():
+                self.reader_thread.join()
+            self.reader_thread = None
+
+    def reader_loop(self):
+        while not self.reader_stop.is_set():
+            try:
+                data = self.port.read(max(1, self.port.in_waiting))
+            except Exception as e:
+                with self.rx_cond:
+                    self.reader_error = e
+                    self.rx_cond.notify_all()
+                return
+
+            if data:
+                now = time.monotonic()
+                with self.rx_cond:
+                    self.rx_ring.enqueue(data, 0, len(data))
+                    self.last_rx_chunk_time = now
+                    self.rx_cond.notify_all()
+
+    def rx_frame_ended(self) -> bool:
+        if not self.background_reader or self.rx_frame_len_known:
+            return False
+        with self.rx_cond:
+            return self.rx_ring.length == 0 and self.last_rx_chunk_time > self.last_tx_time and \
+                time.monotonic() - self.last_rx_chunk_time >= self.frame_gap
+
+    def internal_read(self, buf: bytearray, start: int, maxLength: int) -> int:
+        if self.background_reader:
+            return self.read_from_ring(buf, start, maxLength)
         try:
-            return self.port.read(buf[start:start + maxLength])
+            if self.rx_deadline is not None:
+                self.port.timeout = self.rx_wait_time()
+            data = self.port.read(max(1, min(self.port.in_waiting, maxLength)))
+            if len(data) == 0:
+                raise ECommException(ExcSeverity.Error, CommError.Timeout)
+            buf[start:start + len(data)] = data
+            return len(data)
         except serial.SerialTimeoutException:
             raise ECommException(ExcSeverity.Error, CommError.Timeout)
         except Exception as e:
             raise e
+        finally:
+            if self.rx_deadline is not None:
+                self.port.timeout = self.read_timeout / 1000
+
+    def read_from_ring(self, buf: bytearray, start: int, maxLength: int) -> int:
+        deadline = time.monotonic() + self.rx_wait_time()
+        with self.rx_cond:
+            while self.rx_ring.length == 0:
+                if self.reader_error is not None:
+                    raise ECommException(ExcSeverity.Reset, CommError.SystemError, str(self.reader_error))
+                # ответ закончился, а протокол ждет продолжения кадра неизвестной длины - возвращаемся
+                # без данных, чтобы не ждать полного таймаута
+                if self.rx_buf.length > 0 and not self.rx_frame_len_known and \
+                        self.last_rx_chunk_time > self.last_tx_time and \
+                        time.monotonic() - self.last_rx_chunk_time >= self.frame_gap:
+                    return 0
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise ECommException(ExcSeverity.Error, CommError.Timeout)
+                self.rx_cond.wait(min(remaining, self.frame_gap))
+
+            return self.rx_ring.dequeue(buf, start, maxLength)
 
     def internal_write(self, buf: bytes, start: int, nBytes: int):
-        self.port.write(buf[start:start + nBytes])
+        self.last_tx_time = time.monotonic()
+        self.port.write(memoryview(buf)[start:start + nBytes])
 
     def internal_purge_comms(self, what: PurgeFlags):
-        if self.State != ConnectionState.Connected:
+        if self.state != ConnectionState.Connected:
             return
         if what & PurgeFlags.RX:
             self.port.reset_input_buffer()
+            with self.rx_cond:
+                self.rx_ring.clear()
         if what & PurgeFlags.TX:
             self.port.reset_output_buffer()
 
@@ -61,6 +166,7 @@ class SerialPortConnection(SerialConnection):
     @baud_rate.setter
     def baud_rate(self, value):
         self.port.baudrate = value.value
+        self.on_set_read_timeout(self.read_timeout)
 
     def is_conflicting_with(self, target: Connection) -> bool:
         if isinstance(target, SerialPortConnection):
@@ -73,6 +179,7 @@ class SerialPortConnection(SerialConnection):
 
     def set_params(self, baudRate: BaudRate, dataBits: int, stopBits: StopBits, parity: Parity):
         self.port.baudrate = baudRate.value
+        self.on_set_read_timeout(self.read_timeout)
         self.port.bytesize = dataBits
         self.set_stop_bits(stopBits)
         if parity == Parity.Zero:
@@ -89,6 +196,7 @@ class SerialPortConnection(SerialConnection):
 
     def dispose(self, disposing: bool):
         if disposing:
+            self.stop_reader()
             if self.port is not None:
                 self.port.close()
                 self.port = None
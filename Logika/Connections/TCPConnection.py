@@ -1,8 +1,10 @@
+import asyncio
 import socket
 import threading
 
 from select import select
 
+from Logika.Connections.AsyncConnectionProtocol import AsyncConnectionProtocol
 from Logika.Connections.Connection import ConnectionState, PurgeFlags
 from Logika.Connections.NetConnection import NetConnection
 from Logika.ECommException import ECommException, ExcSeverity, CommError
@@ -38,7 +40,7 @@ class TCPConnection(NetConnection):
         try:
             self.socket.connect((self.host, self.port))
 
-            ready, _, _ = select([], [self.socket], [], max(self.readTimeout, 15))
+            _, ready, _ = select([], [self.socket], [], max(self.read_timeout / 1000, 15))
             if not ready:
                 self.socket.close()
                 self.socket = None
@@ -53,14 +55,52 @@ class TCPConnection(NetConnection):
 
             raise ECommException(ExcSeverity.Reset, CommError.SystemError, se.strerror)
 
+    async def internal_open_async(self, connect_details: str):
+        loop = asyncio.get_running_loop()
+        try:
+            _, self.async_proto = await asyncio.wait_for(
+                loop.create_connection(AsyncConnectionProtocol, self.host, self.port),
+                max(self.read_timeout / 1000, 15))
+
+        except asyncio.TimeoutError:
+            raise ECommException(ExcSeverity.Reset, CommError.Timeout)
+
+        except socket.error as se:
+            if se.errno == 11001 or isinstance(se, socket.gaierror):
+                raise ECommException(ExcSeverity.Stop, CommError.SystemError, se.strerror)
+
+            raise ECommException(ExcSeverity.Reset, CommError.SystemError, se.strerror)
+
     def internal_close(self):
         if self.socket:
             self.socket.close()
             self.socket = None
 
+    def set_keepalive(self, idle: int, interval: int, count: int):
+        if self.socket is None:
+            return
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        # параметры keepalive доступны не на всех платформах
+        for opt, value in (("TCP_KEEPIDLE", idle), ("TCP_KEEPINTVL", interval), ("TCP_KEEPCNT", count)):
+            if hasattr(socket, opt):
+                self.socket.setsockopt(socket.IPPROTO_TCP, getattr(socket, opt), value)
+
+    # проверка без обмена с прибором: сокет, закрытый удаленной стороной, становится читаемым
+    # и recv с MSG_PEEK возвращает пустой результат
+    def is_alive(self) -> bool:
+        if self.state != ConnectionState.Connected or self.socket is None:
+            return False
+        try:
+            ready, _, _ = select([self.socket], [], [], 0)
+            if not ready:
+                return True
+            return len(self.socket.recv(1, socket.MSG_PEEK)) > 0
+        except (OSError, ValueError):
+            return False
+
     def on_set_read_timeout(self, new_timeout: int):
-        if TCPConnection.socket:
-            self.socket.settimeout(new_timeout)
+        if self.socket:
+            self.socket.settimeout(new_timeout / 1000)
 
     def on_connect(self):
         try:
@@ -82,14 +122,15 @@ class TCPConnection(NetConnection):
         errcode = 0
         nBytes: int = 0
 
-        if not self.socket.poll(self.readTimeout * 1000):
-            raise ECommException(ExcSeverity.Error, CommError.Timeout)
-
         if self.state != ConnectionState.Connected or self.socket is None:
             return 0
 
+        ready, _, _ = select([self.socket], [], [], self.rx_wait_time())
+        if not ready:
+            raise ECommException(ExcSeverity.Error, CommError.Timeout)
+
         try:
-            nBytes = self.socket.recv_into(buf, start, max_length)
+            nBytes = self.socket.recv_into(memoryview(buf)[start:], max_length)
         except socket.error as e:
             errcode = e.errno
             print(f"Error receiving data: {e}")
@@ -104,24 +145,31 @@ class TCPConnection(NetConnection):
 
     def internal_write(self, buf: bytes, start: int, length: int):
         try:
-            sent_bytes = self.socket.send(buf[start:start + length])
-            if sent_bytes != length:
-                raise Exception("Failed to send all bytes")
+            # sendall досылает остаток при частичной отправке; срез memoryview не копирует данные
+            self.socket.sendall(memoryview(buf)[start:start + length])
         except socket.error as e:
             errcode = e.errno
             raise ECommException(ExcSeverity.Reset, CommError.SystemError, errcode.__str__())
 
+    async def internal_write_async(self, buf: bytes, start: int, length: int):
+        # копия: транспорт может хранить неотправленный остаток как есть, а буфер кадра переиспользуется
+        self.async_proto.transport.write(bytes(memoryview(buf)[start:start + length]))
+        await self.async_proto.drain()
+
     def internal_purge_comms(self, flg: PurgeFlags):
         if self.state != ConnectionState.Connected:
             return
 
+        if self.async_proto is not None:
+            if flg & PurgeFlags.RX:
+                self.async_proto.purge()
+            return
+
         if flg & PurgeFlags.RX:
-            while True:
-                nBytes = self.socket.recv(1024)
-                if nBytes == 0:
+            mem = bytearray(1024)
+            while select([self.socket], [], [], 0)[0]:
+                if self.socket.recv_into(mem) == 0:
                     break
-                mem = bytearray(nBytes)
-                self.socket.recv_into(mem)
 
         if flg & PurgeFlags.TX:
             pass  # no methods for aborting tcp tx
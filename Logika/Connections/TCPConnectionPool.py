@@ -0,0 +1,161 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from Logika.Connections.Connection import ConnectionState, PurgeFlags
+from Logika.Connections.TCPConnection import TCPConnection
+from Logika.ECommException import ECommException, ExcSeverity, CommError
+from Logika.LogLevel import LogLevel
+
+
+class PooledConnection:
+    def __init__(self, conn: TCPConnection, released_at: float):
+        self.conn = conn
+        self.released_at = released_at
+
+
+# пул TCP соединений с узлами (host, port): между опросами сокет остается открытым,
+# и повторный опрос не платит за установку соединения и "прогрев" шлюза/модема.
+# одна точка подключения одновременно выдается только одному заданию (conflicts_with),
+# max_per_gateway ограничивает число открытых сокетов к одному шлюзу (host) по всем его портам
+class TCPConnectionPool:
+    IDLE_TTL = 60.0
+    MAX_PER_GATEWAY = 4
+    KEEPALIVE_IDLE = 30
+    KEEPALIVE_INTERVAL = 10
+    KEEPALIVE_COUNT = 3
+
+    def __init__(self, read_timeout: int, idle_ttl: float = IDLE_TTL, max_per_gateway: int = MAX_PER_GATEWAY,
+                 clock: Callable[[], float] = time.monotonic):
+        self.read_timeout = read_timeout
+        self.idle_ttl = idle_ttl
+        self.max_per_gateway = max_per_gateway
+        self.clock = clock
+        self.m_cond = threading.Condition()
+        self.idle: dict[tuple[str, int], PooledConnection] = {}
+        self.leased: list[TCPConnection] = []
+        self.opening: list[tuple[str, int]] = []
+        self.on_log_event = None
+        self.hits = 0
+        self.misses = 0
+
+    def log(self, level: LogLevel, msg: str, exc: Optional[Exception] = None):
+        if self.on_log_event is not None:
+            try:
+                self.on_log_event(level, msg, exc)
+            except:
+                pass
+
+    def gateway_count(self, host: str) -> int:
+        return sum(1 for k in self.idle if k[0] == host) + \
+            sum(1 for c in self.leased if c.m_srv_host_name == host) + \
+            sum(1 for k in self.opening if k[0] == host)
+
+    def is_busy(self, candidate: TCPConnection) -> bool:
+        key = (candidate.m_srv_host_name, candidate.m_srv_port)
+        return key in self.opening or any(c.conflicts_with(candidate) for c in self.leased)
+
+    def evict_idle(self):
+        with self.m_cond:
+            now = self.clock()
+            expired = [k for k, p in self.idle.items() if now - p.released_at >= self.idle_ttl]
+            for k in expired:
+                self.discard(self.idle.pop(k).conn)
+            if expired:
+                self.m_cond.notify_all()
+
+    def discard(self, conn: TCPConnection):
+        try:
+            conn.close()
+        except Exception as e:
+            self.log(LogLevel.Warn, "ошибка при закрытии соединения " + conn.address, e)
+
+    def evict_one_idle(self, host: str) -> bool:
+        keys = [k for k in self.idle if k[0] == host]
+        if not keys:
+            return False
+        oldest = min(keys, key=lambda k: self.idle[k].released_at)
+        self.discard(self.idle.pop(oldest).conn)
+        return True
+
+    def acquire(self, host: str, port: int, wait_timeout: Optional[float] = None) -> TCPConnection:
+        key = (host, port)
+        candidate = TCPConnection(self.read_timeout, host, port)
+        deadline = None if wait_timeout is None else self.clock() + wait_timeout
+
+        with self.m_cond:
+            while True:
+                self.evict_idle()
+
+                if not self.is_busy(candidate):
+                    pooled = self.idle.pop(key, None)
+                    if pooled is not None:
+                        if pooled.conn.is_alive():
+                            pooled.conn.purge_comms(PurgeFlags.RX)
+                            self.leased.append(pooled.conn)
+                            self.hits += 1
+                            return pooled.conn
+                        self.log(LogLevel.Debug, "соединение " + pooled.conn.address + " закрыто удаленной стороной")
+                        self.discard(pooled.conn)
+
+                    if self.gateway_count(host) < self.max_per_gateway or self.evict_one_idle(host):
+                        self.opening.append(key)
+                        break
+
+                remaining = None if deadline is None else deadline - self.clock()
+                if remaining is not None and remaining <= 0:
+                    raise ECommException(ExcSeverity.Error, CommError.Timeout,
+                                         "нет свободного соединения с " + candidate.address)
+                self.m_cond.wait(remaining)
+
+        self.misses += 1
+        try:
+            candidate.open()
+            candidate.set_keepalive(self.KEEPALIVE_IDLE, self.KEEPALIVE_INTERVAL, self.KEEPALIVE_COUNT)
+        except:
+            with self.m_cond:
+                self.opening.remove(key)
+                self.m_cond.notify_all()
+            raise
+
+        with self.m_cond:
+            self.opening.remove(key)
+            self.leased.append(candidate)
+        return candidate
+
+    def release(self, conn: TCPConnection, reusable: bool = True):
+        with self.m_cond:
+            if conn in self.leased:
+                self.leased.remove(conn)
+
+            if reusable and conn.state == ConnectionState.Connected and self.idle_ttl > 0:
+                key = (conn.m_srv_host_name, conn.m_srv_port)
+                self.idle[key] = PooledConnection(conn, self.clock())
+            else:
+                self.discard(conn)
+
+            self.m_cond.notify_all()
+
+    # соединение, на котором произошла ошибка уровня Reset/Stop, в пул не возвращается
+    @contextmanager
+    def lease(self, host: str, port: int, wait_timeout: Optional[float] = None):
+        conn = self.acquire(host, port, wait_timeout)
+        reusable = True
+        try:
+            yield conn
+        except ECommException as e:
+            reusable = e.Severity == ExcSeverity.Error
+            raise
+        except:
+            reusable = False
+            raise
+        finally:
+            self.release(conn, reusable)
+
+    def close_all(self):
+        with self.m_cond:
+            for pooled in self.idle.values():
+                self.discard(pooled.conn)
+            self.idle.clear()
+            self.m_cond.notify_all()
@@ -1,7 +1,9 @@
+import asyncio
 import socket
 
 import select
 
+from Logika.Connections.AsyncConnectionProtocol import AsyncConnectionProtocol
 from Logika.Connections.Connection import PurgeFlags, Connection
 from Logika.Connections.NetConnection import NetConnection
 from Logika.ECommException import ECommException, ExcSeverity, CommError
@@ -9,10 +11,14 @@ from Logika.Utils.ByteQueue import ByteQueue
 
 
 class UDPConnection(NetConnection):
+    MAX_DATAGRAM = 0xFFFF
+    RX_CHUNK_SIZE = MAX_DATAGRAM
+
+    uc = None
+
     def __init__(self, read_timeout, host, port):
         super().__init__(read_timeout, host, port)
-        self.uc: socket = None
-        self.inQue: ByteQueue = ByteQueue(65535)
+        self.inQue: ByteQueue = ByteQueue(self.MAX_DATAGRAM)
         self.ipEndpoint: socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
 
     def dispose(self, disposing: bool):
@@ -28,15 +34,15 @@ class UDPConnection(NetConnection):
         return tar_con.host == self.m_srv_host_name and tar_con.port == self.m_srv_port
 
     def internal_write(self, buf: bytes, start: int, length: int):
-        self.uc.send(buf[start:start + length])
+        self.uc.send(memoryview(buf)[start:start + length])
 
     def on_set_read_timeout(self, new_timeout: int):
         if self.uc is not None:
-            self.uc.settimeout(new_timeout)
+            self.uc.settimeout(new_timeout / 1000)
 
     def internal_open(self):
         self.uc = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.uc.settimeout(self.read_timeout)
+        self.uc.settimeout(self.read_timeout / 1000)
 
         try:
             self.uc.connect((self.host, self.port))
@@ -51,20 +57,33 @@ class UDPConnection(NetConnection):
                 raise ECommException(ExcSeverity.Stop, CommError.SystemError, se.strerror)
             raise ECommException(ExcSeverity.Reset, CommError.SystemError, se.strerror)
 
-    def internal_read(self, buf: bytes, start: int, max_length: int) -> int:
-        ptr = start
+    async def internal_open_async(self, connect_details: str):
+        loop = asyncio.get_running_loop()
+        try:
+            _, self.async_proto = await loop.create_datagram_endpoint(
+                AsyncConnectionProtocol, remote_addr=(self.m_srv_host_name, self.m_srv_port))
+
+        except socket.error as se:
+            if se.errno == 11004 or isinstance(se, socket.gaierror):
+                raise ECommException(ExcSeverity.Stop, CommError.SystemError, se.strerror)
+            raise ECommException(ExcSeverity.Reset, CommError.SystemError, se.strerror)
 
+    async def internal_write_async(self, buf: bytes, start: int, length: int):
+        self.async_proto.transport.sendto(bytes(memoryview(buf)[start:start + length]))
+
+    def internal_read(self, buf: bytes, start: int, max_length: int) -> int:
         n_read = self.inQue.dequeue(buf, start, max_length)
-        ptr += n_read
 
-        if n_read < max_length:
-            if not select.select([self.uc], [], [], self.read_timeout)[0]:
+        if n_read == 0:
+            if not select.select([self.uc], [], [], self.rx_wait_time())[0]:
                 raise ECommException(ExcSeverity.Error, CommError.Timeout)
 
-            data, addr = self.uc.recvfrom(max_length)
-            if data:
-                self.inQue.enqueue(data, 0, data.length)
-                n_read += self.inQue.dequeue(buf, ptr, max_length - n_read)
+            if max_length >= self.MAX_DATAGRAM:
+                # датаграмма гарантированно помещается - принимаем сразу в буфер вызывающего
+                n_read = self.uc.recv_into(memoryview(buf)[start:start + max_length], max_length)
+            else:
+                self.inQue.readinto(self.uc.recv_into, self.MAX_DATAGRAM)
+                n_read = self.inQue.dequeue(buf, start, max_length)
 
         return n_read
 
@@ -74,5 +93,9 @@ class UDPConnection(NetConnection):
             self.uc = None
 
     def internal_purge_comms(self, what: PurgeFlags):
+        if self.async_proto is not None:
+            if what & PurgeFlags.RX:
+                self.async_proto.purge()
+            return
         while self.uc and self.uc.recv(1024):
             pass
@@ -30,8 +30,8 @@ class UDPConnectionXamarin(NetConnection):
             ptr += 1
             n_read += 1
 
-        if n_read < length:
-            readable, _, _ = select.select([socket], [], [], self.ReadTimeout * 1000)
+        if n_read == 0:
+            readable, _, _ = select.select([self.socket], [], [], self.rx_wait_time())
             if not readable:
                 raise ECommException(ExcSeverity.Error, CommError.Timeout)
 
@@ -0,0 +1,72 @@
+import struct
+import threading
+import time
+from typing import BinaryIO, Iterator
+
+from Logika.Connections.Connection import MonitorEventType
+
+
+class CaptureRecord:
+    __slots__ = ("t", "direction", "data")
+
+    def __init__(self, t: float, direction: MonitorEventType, data: bytes):
+        self.t = t
+        self.direction = direction
+        self.data = data
+
+
+# запись обмена на уровне канала: заголовок файла, затем записи
+# <время от начала записи, нс (uint64)> <направление (uint8)> <длина (uint32)> <данные>
+class WireCapture:
+    MAGIC = b"LGKCAP\x01\x00"
+    RECORD = struct.Struct("<QBI")
+    DIRECTIONS = {MonitorEventType.Tx: 0, MonitorEventType.Rx: 1}
+
+    def __init__(self, target: str | BinaryIO):
+        self.owns_stream = isinstance(target, str)
+        self.stream: BinaryIO = open(target, "wb") if self.owns_stream else target
+        self.m_lock = threading.Lock()
+        self.t0 = time.monotonic_ns()
+        self.records = 0
+        self.stream.write(self.MAGIC)
+
+    def record(self, direction: MonitorEventType, buf: bytes, start: int, length: int):
+        if length <= 0:
+            return
+        hdr = self.RECORD.pack(time.monotonic_ns() - self.t0, self.DIRECTIONS[direction], length)
+        with self.m_lock:
+            self.stream.write(hdr)
+            self.stream.write(memoryview(buf)[start:start + length])
+            self.records += 1
+
+    def flush(self):
+        with self.m_lock:
+            self.stream.flush()
+
+    def close(self):
+        with self.m_lock:
+            if self.owns_stream:
+                self.stream.close()
+            else:
+                self.stream.flush()
+
+    @staticmethod
+    def read_records(source: str | BinaryIO) -> Iterator[CaptureRecord]:
+        stream = open(source, "rb") if isinstance(source, str) else source
+        try:
+            if stream.read(len(WireCapture.MAGIC)) != WireCapture.MAGIC:
+                raise ValueError("неизвестный формат файла записи обмена")
+            directions = {v: k for k, v in WireCapture.DIRECTIONS.items()}
+            rec_len = WireCapture.RECORD.size
+            while True:
+                hdr = stream.read(rec_len)
+                if len(hdr) < rec_len:
+                    return
+                t_ns, direction, length = WireCapture.RECORD.unpack(hdr)
+                data = stream.read(length)
+                if len(data) < length:
+                    return  # запись оборвана - последний неполный фрагмент отбрасывается
+                yield CaptureRecord(t_ns / 1e9, directions[direction], data)
+        finally:
+            if isinstance(source, str):
+                stream.close()
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from Logika.Connections.AsyncConnectionProtocol import AsyncConnectionProtocol
+from Logika.Connections.TCPConnection import TCPConnection
+from Logika.Connections.UDPConnection import UDPConnection
+from Logika.ECommException import ECommException, CommError
+
+
+class FakeTransport:
+    def __init__(self):
+        self.paused = False
+
+    def pause_reading(self):
+        self.paused = True
+
+    def resume_reading(self):
+        self.paused = False
+
+
+def feed(proto: AsyncConnectionProtocol, data: bytes):
+    view = proto.get_buffer(len(data))
+    view[:len(data)] = data
+    proto.buffer_updated(len(data))
+
+
+def test_reading_paused_above_high_water_and_resumed_when_drained():
+    async def run():
+        proto = AsyncConnectionProtocol(high_water=0x100)
+        proto.connection_made(FakeTransport())
+        feed(proto, bytes(0x101))
+        assert proto.transport.paused
+
+        buf = bytearray(0x100)
+        assert await proto.read(buf, 0, 0xC0, 1) == 0xC0
+        assert proto.transport.paused  # выше low_water
+        await proto.read(buf, 0, 0x100, 1)
+        assert not proto.transport.paused
+
+    asyncio.run(run())
+
+
+def test_read_timeout_and_remote_close():
+    async def run():
+        proto = AsyncConnectionProtocol()
+        proto.connection_made(FakeTransport())
+        with pytest.raises(ECommException) as e:
+            await proto.read(bytearray(4), 0, 4, 0.01)
+        assert e.value.Reason == CommError.Timeout
+
+        feed(proto, b"ab")
+        proto.eof_received()
+        buf = bytearray(4)
+        assert await proto.read(buf, 0, 4, 0.01) == 2  # принятое до закрытия отдается
+        with pytest.raises(ECommException) as e:
+            await proto.read(buf, 0, 4, 0.01)
+        assert e.value.Reason == CommError.SystemError
+
+    asyncio.run(run())
+
+
+def test_datagrams_over_high_water_are_dropped():
+    proto = AsyncConnectionProtocol(high_water=8)
+    proto.datagram_received(bytes(6), None)
+    proto.datagram_received(bytes(6), None)
+    assert proto.rx_que.length == 6 and proto.dropped_datagrams == 1
+
+
+def test_tcp_roundtrip_through_event_loop():
+    async def echo(reader, writer):
+        writer.write(await reader.readexactly(5))
+        await writer.drain()
+        writer.close()
+
+    async def run():
+        server = await asyncio.start_server(echo, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        conn = TCPConnection(500, "127.0.0.1", port)
+        await conn.open_async()
+        try:
+            await conn.write_async(b"xhellox", 1, 5)
+            buf = bytearray(5)
+            await conn.read_async(buf, 0, 5)
+            assert buf == b"hello"
+        finally:
+            await conn.close_async()
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(run())
+
+
+def test_udp_roundtrip_through_event_loop():
+    class Echo(asyncio.DatagramProtocol):
+        def connection_made(self, transport):
+            self.transport = transport
+
+        def datagram_received(self, data, addr):
+            self.transport.sendto(data[::-1], addr)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        server, _ = await loop.create_datagram_endpoint(Echo, local_addr=("127.0.0.1", 0))
+        port = server.get_extra_info("sockname")[1]
+        conn = UDPConnection(500, "127.0.0.1", port)
+        await conn.open_async()
+        try:
+            await conn.write_async(b"abc", 0, 3)
+            buf = bytearray(3)
+            await conn.read_async(buf, 0, 3)
+            assert buf == b"cba"
+        finally:
+            await conn.close_async()
+            server.close()
+
+    asyncio.run(run())
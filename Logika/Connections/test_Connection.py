@@ -0,0 +1,73 @@
+import socket
+import time
+
+import pytest
+
+from Logika.Connections.OfflineConnection import OfflineConnection
+from Logika.Connections.TCPConnection import TCPConnection
+from Logika.ECommException import ECommException, CommError
+from Logika.Protocols.M4.M4Opcode import M4Opcode
+from Logika.Protocols.M4.M4Protocol import M4Protocol
+
+
+# канал, по которому все время идет шум: байт каждые 20 мс, но не дольше отведенного на чтение времени
+class TrickleLink(OfflineConnection):
+    def __init__(self, read_timeout: int):
+        super().__init__(None)
+        self.read_timeout = read_timeout
+
+    def internal_read(self, buf, start: int, max_length: int) -> int:
+        time.sleep(min(0.02, self.rx_wait_time()))
+        buf[start] = 0x00
+        return 1
+
+
+def test_rx_wait_time_capped_by_deadline():
+    c = TrickleLink(1000)
+    assert c.rx_wait_time() == 1.0
+    c.rx_deadline = time.monotonic() + 0.1
+    assert 0 < c.rx_wait_time() <= 0.1
+    c.rx_deadline = time.monotonic() - 0.01
+    with pytest.raises(ECommException) as e:
+        c.rx_wait_time()
+    assert e.value.Reason == CommError.Timeout
+
+
+def test_request_deadline_not_restarted_by_incoming_bytes():
+    link = TrickleLink(100)
+    link.open()
+    proto = M4Protocol()
+    proto.connection = link
+    t0 = time.monotonic()
+    with pytest.raises(ECommException) as e:
+        proto.recv_packet(1, M4Opcode.ReadRam, None, 4)
+    assert e.value.Reason == CommError.Timeout
+    assert time.monotonic() - t0 < 0.5
+
+
+def test_caller_deadline_shorter_than_read_timeout():
+    link = TrickleLink(5000)
+    link.open()
+    proto = M4Protocol()
+    proto.connection = link
+    t0 = time.monotonic()
+    with pytest.raises(ECommException):
+        proto.recv_packet(1, M4Opcode.ReadRam, None, 4, 0, link.deadline_after(80))
+    assert time.monotonic() - t0 < 0.5
+
+
+def test_tcp_read_honours_deadline():
+    srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    srv.bind(("127.0.0.1", 0))
+    srv.listen(1)
+    conn = TCPConnection(5000, "127.0.0.1", srv.getsockname()[1])
+    conn.open()
+    try:
+        t0 = time.monotonic()
+        with pytest.raises(ECommException) as e:
+            conn.read_exact(bytearray(4), 0, 4, conn.deadline_after(50))
+        assert e.value.Reason == CommError.Timeout
+        assert time.monotonic() - t0 < 1
+    finally:
+        conn.close()
+        srv.close()
@@ -0,0 +1,54 @@
+from Logika.Connections.ConnectionStats import ConnectionStats
+from Logika.Connections.OfflineConnection import OfflineConnection
+from Logika.Protocols.M4.M4FrameBuilder import M4FrameBuilder
+from Logika.Protocols.M4.M4Opcode import M4Opcode
+from Logika.Protocols.M4.M4Protocol import M4Protocol
+
+
+def test_record_counts_errors_retries_and_rate():
+    stats = ConnectionStats()
+    stats.record("ReadRam", 10.0, 10.02, 10.05, 9, 11, True)
+    stats.record("ReadRam", 11.0, 0.0, 11.5, 9, 0, False)
+    stats.record("ReadRam", 12.0, 12.01, 12.05, 9, 11, True)
+
+    es = stats.get("ReadRam")
+    assert (es.requests, es.errors, es.retries) == (3, 1, 1)
+    assert es.ttfb.count == 2 and es.ttlb.count == 2
+    assert es.bytes == 40
+    assert round(es.bytes_per_second) == 400
+
+
+# прибор, отвечающий на запрос ReadRam четырьмя байтами
+class RamLink(OfflineConnection):
+    def __init__(self):
+        super().__init__(None)
+        self.read_timeout = 200
+        self.address = "test"
+        self.out = bytearray()
+
+    def internal_write(self, buf, start: int, n_bytes: int):
+        self.out += M4FrameBuilder().legacy(1, M4Opcode.ReadRam, b"\x01\x02\x03\x04")
+
+    def internal_read(self, buf, start: int, max_length: int) -> int:
+        n = min(max_length, len(self.out))
+        buf[start:start + n] = self.out[:n]
+        del self.out[:n]
+        return n
+
+
+def test_exchange_recorded_and_exported():
+    link = RamLink()
+    link.open()
+    proto = M4Protocol()
+    proto.connection = link
+    proto.do_legacy_request(1, M4Opcode.ReadRam, bytearray(4), 4)
+
+    es = link.stats.get("ReadRam")
+    assert es.requests == 1 and es.request_size.count == 1
+    assert es.response_size.sum == 3 + 4 + 2
+
+    text = ConnectionStats.prometheus_text([link])
+    assert '# TYPE logika_requests_total counter' in text
+    assert 'logika_requests_total{connection="test",opcode="ReadRam"} 1' in text
+    assert 'logika_request_last_byte_seconds_count{connection="test",opcode="ReadRam"} 1' in text
+    assert f'logika_tx_bytes_total{{connection="test"}} {link.tx_byte_cnt}' in text
@@ -0,0 +1,85 @@
+import io
+
+import pytest
+
+from Logika.Connections.Connection import MonitorEventType
+from Logika.Connections.OfflineConnection import OfflineConnection
+from Logika.Connections.ReplayConnection import ReplayConnection
+from Logika.Connections.WireCapture import WireCapture
+from Logika.ECommException import ECommException, CommError
+from Logika.Protocols.M4.M4FrameBuilder import M4FrameBuilder
+from Logika.Protocols.M4.M4Opcode import M4Opcode
+from Logika.Protocols.M4.M4Protocol import M4Protocol
+
+
+# прибор, отвечающий на каждый запрос ReadRam кадром с адресом запроса в данных
+class RamLink(OfflineConnection):
+    def __init__(self):
+        super().__init__(None)
+        self.read_timeout = 200
+        self.out = bytearray()
+
+    def internal_write(self, buf, start: int, n_bytes: int):
+        req = bytes(buf[start:start + n_bytes])
+        self.out += M4FrameBuilder().legacy(req[1], M4Opcode.ReadRam, req[3:5] + b"\x00\x00")
+
+    def internal_read(self, buf, start: int, max_length: int) -> int:
+        n = min(max_length, len(self.out))
+        buf[start:start + n] = self.out[:n]
+        del self.out[:n]
+        return n
+
+
+def session(conn, addrs):
+    proto = M4Protocol()
+    proto.connection = conn
+    conn.open()
+    replies = []
+    for a in addrs:
+        proto.send_legacy_packet(1, M4Opcode.ReadRam, bytearray([a, 0, 4, 0]))
+        replies.append(bytes(proto.recv_packet(1, M4Opcode.ReadRam, None, 4).Data))
+    return replies
+
+
+def capture(addrs) -> io.BytesIO:
+    stream = io.BytesIO()
+    link = RamLink()
+    link.capture = WireCapture(stream)
+    session(link, addrs)
+    link.capture.close()
+    stream.seek(0)
+    return stream
+
+
+def test_replay_reproduces_captured_session():
+    stream = capture([0x10, 0x20, 0x30])
+    records = list(WireCapture.read_records(io.BytesIO(stream.getvalue())))
+    assert [r.direction for r in records] == [MonitorEventType.Tx, MonitorEventType.Rx] * 3
+    assert records == sorted(records, key=lambda r: r.t)
+
+    replay = ReplayConnection(stream, strict=True)
+    assert session(replay, [0x10, 0x20, 0x30]) == [bytes([a, 0, 0, 0]) for a in (0x10, 0x20, 0x30)]
+    assert replay.finished
+
+
+def test_strict_replay_rejects_different_request():
+    replay = ReplayConnection(capture([0x10]), strict=True)
+    with pytest.raises(ECommException) as e:
+        session(replay, [0x11])
+    assert e.value.Reason == CommError.Unspecified
+
+
+def test_missing_reply_replays_as_timeout():
+    records = list(WireCapture.read_records(capture([0x10, 0x20])))
+    del records[1]  # ответа на первый запрос в записи нет
+    replay = ReplayConnection(records, read_timeout=50)
+    with pytest.raises(ECommException) as e:
+        session(replay, [0x10])
+    assert e.value.Reason == CommError.Timeout
+
+
+def test_truncated_and_foreign_files():
+    data = capture([0x10, 0x20]).getvalue()
+    assert len(list(WireCapture.read_records(io.BytesIO(data[:-3])))) == 3
+    with pytest.raises(ValueError):
+        list(WireCapture.read_records(io.BytesIO(b"NOTACAPTURE")))
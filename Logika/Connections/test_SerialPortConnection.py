@@ -0,0 +1,26 @@
+import time
+
+import pytest
+
+pytest.importorskip("serial")
+
+from Logika.Connections.SerialConnection import BaudRate, StopBits
+from Logika.Connections.SerialPortConnection import SerialPortConnection
+
+
+def make(**kw) -> SerialPortConnection:
+    return SerialPortConnection(200, "COM_TEST", BaudRate.b9600, StopBits.One, backgroundReader=True, **kw)
+
+
+def test_frame_gap_default_and_override():
+    assert make().frame_gap == SerialPortConnection.MIN_FRAME_GAP
+    assert make(frameGap=0.2).frame_gap == 0.2
+
+
+def test_gap_ends_frame_only_while_length_unknown():
+    c = make()
+    c.last_tx_time = time.monotonic() - 1
+    c.last_rx_chunk_time = time.monotonic() - c.frame_gap * 2
+    assert c.rx_frame_ended()
+    c.rx_frame_len_known = True
+    assert not c.rx_frame_ended()
@@ -0,0 +1,83 @@
+import socket
+
+import pytest
+
+from Logika.Connections.Connection import ConnectionState
+from Logika.Connections.TCPConnectionPool import TCPConnectionPool
+from Logika.ECommException import ECommException, ExcSeverity, CommError
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def gateway():
+    # шлюз с двумя портами; соединения принимает ядро, обмен в тестах не нужен
+    listeners = []
+    for _ in range(2):
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.bind(("127.0.0.1", 0))
+        s.listen(8)
+        listeners.append(s)
+    yield [s.getsockname()[1] for s in listeners]
+    for s in listeners:
+        s.close()
+
+
+@pytest.fixture
+def pool():
+    p = TCPConnectionPool(500, idle_ttl=60, clock=Clock())
+    yield p
+    p.close_all()
+
+
+def test_released_connection_is_reused(pool, gateway):
+    c1 = pool.acquire("127.0.0.1", gateway[0])
+    pool.release(c1)
+    c2 = pool.acquire("127.0.0.1", gateway[0])
+    assert c2 is c1 and (pool.hits, pool.misses) == (1, 1)
+    pool.release(c2)
+
+
+def test_idle_connection_evicted_after_ttl(pool, gateway):
+    c1 = pool.acquire("127.0.0.1", gateway[0])
+    pool.release(c1)
+    pool.clock.now += pool.idle_ttl
+    c2 = pool.acquire("127.0.0.1", gateway[0])
+    assert c2 is not c1 and c1.state == ConnectionState.NotConnected
+    pool.release(c2)
+
+
+def test_endpoint_leased_once(pool, gateway):
+    c1 = pool.acquire("127.0.0.1", gateway[0])
+    with pytest.raises(ECommException) as e:
+        pool.acquire("127.0.0.1", gateway[0], wait_timeout=0)
+    assert e.value.Reason == CommError.Timeout
+    pool.release(c1)
+
+
+def test_gateway_limit_evicts_oldest_idle(gateway):
+    pool = TCPConnectionPool(500, max_per_gateway=1, clock=Clock())
+    c1 = pool.acquire("127.0.0.1", gateway[0])
+    pool.release(c1)
+    c2 = pool.acquire("127.0.0.1", gateway[1])
+    assert c1.state == ConnectionState.NotConnected and not pool.idle
+    pool.release(c2)
+    pool.close_all()
+
+
+def test_lease_discards_connection_after_reset_error(pool, gateway):
+    with pytest.raises(ECommException):
+        with pool.lease("127.0.0.1", gateway[0]) as conn:
+            raise ECommException(ExcSeverity.Reset, CommError.SystemError)
+    assert conn.state == ConnectionState.NotConnected and not pool.idle
+
+    with pytest.raises(ECommException):
+        with pool.lease("127.0.0.1", gateway[0]) as conn:
+            raise ECommException(ExcSeverity.Error, CommError.Timeout)
+    assert pool.idle[("127.0.0.1", gateway[0])].conn is conn
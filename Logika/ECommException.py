@@ -20,6 +20,7 @@ class CommError(Enum):
     Checksum = "ошибка CRC"
     NotConnected = "нет соединения"
     SystemError = "ошибка"
+    ErrorReply = "прибор вернул код ошибки"
     Unspecified = "?"
 
 
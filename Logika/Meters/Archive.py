@@ -12,7 +12,7 @@ class Archive:
 
 
 class IntervalArchive(Archive):
-    def __init__(self, mtr: Meter, arType: ArchiveType, template: DataTable = None):
+    def __init__(self, mtr: Meter, arType: ArchiveType, template: 'DataTable' = None):
         super().__init__(mtr, arType)
 
         if not arType.is_interval_archive:
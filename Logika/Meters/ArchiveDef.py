@@ -1,6 +1,6 @@
 from Logika.Meters.ItemDefBase import ItemDefBase
 from Logika.Meters.Types import ArchiveType
-from Channel import ChannelDef
+from Logika.Meters.Channel import ChannelDef
 
 
 class ArchiveDef(ItemDefBase):
@@ -1,4 +1,4 @@
-from Logika.Meters import Tag
+from Logika.Meters.Tag import Tag
 from Logika.Meters.ArchiveFieldDef import ArchiveFieldDef6, ArchiveFieldDef
 
 
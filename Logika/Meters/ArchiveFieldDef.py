@@ -1,14 +1,14 @@
 from abc import ABC
 
-from Logika.Meters import TagDef
+from Logika.Meters.TagDef import TagDef
 from Logika.Meters.ArchiveDef import ArchiveDef
 from Logika.Meters.Channel import ChannelDef
 from Logika.Meters.StandardVars import StdVar
 from Logika.Meters.Types import ArchiveType
-from Logika.Meters.__4L.Logika4L import BinaryType
+from Logika.Meters.Types import BinaryType
 
 
-class ArchiveFieldDef(ABC, TagDef):
+class ArchiveFieldDef(TagDef, ABC):
     def __init__(self, channel: ChannelDef, ordinal: int, at: ArchiveType, name: str, description: str, stndVar: StdVar,
                  data_type: type, dbType: str, displayFormat: str):
         super().__init__(channel, ordinal, name, stndVar, description, data_type, dbType, displayFormat)
@@ -46,7 +46,7 @@ class ArchiveFieldDef6(ArchiveFieldDef):
         return self.address
 
 
-class ArchiveFieldDef4(ABC, ArchiveFieldDef):
+class ArchiveFieldDef4(ArchiveFieldDef, ABC):
     def __init__(self, ar: ArchiveDef, name: str, desc: str, stdVar: StdVar, data_type: type, dbType: str,
                  displayFormat: str, units: str):
         super().__init__(ar.ChannelDef, -1, ar.ArchiveType, name, desc, stdVar, data_type, dbType, displayFormat)
@@ -1,5 +1,4 @@
 from enum import Enum
-from Meter import Meter
 
 
 class ChannelKind(Enum):
@@ -14,7 +13,7 @@ class ChannelKind(Enum):
 class ChannelDef:
     Prefix = None
 
-    def __init__(self, meter: Meter, Prefix: str, Start: int, Count: int, Description: str, a: 'ChannelDef' = None):
+    def __init__(self, meter: 'Meter', Prefix: str, Start: int, Count: int, Description: str, a: 'ChannelDef' = None):
         if a:
             self.Meter = a.Meter
             self.Kind = a.Kind
@@ -36,7 +35,7 @@ class ChannelDef:
 
 class Channel(ChannelDef):
     def __init__(self, cdef: 'ChannelDef', channelNo: int):
-        super().__init__(Meter(), '', 0, 0, '', cdef)
+        super().__init__(cdef.Meter, '', 0, 0, '', cdef)
         self.No = channelNo
         self.Name = cdef.Prefix + (str(channelNo) if channelNo > 0 else "")
 
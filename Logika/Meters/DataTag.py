@@ -1,6 +1,6 @@
 from typing import List
 
-from Logika.Meters import Tag
+from Logika.Meters.Tag import Tag
 from Logika.Meters.TagDef import DataTagDef6, DataTagDef
 
 
@@ -12,7 +12,6 @@ class DataTag(Tag):
             self.EU = t.EU
             self.Oper = t.Oper
             self.addr = t.addr
-            self.Name = t.name
         else:
             super().__init__(refTag, channelNo)
             if isinstance(refTag, DataTagDef6):
@@ -21,7 +20,7 @@ class DataTag(Tag):
                     self.addr += refTag.ChannelDef.Prefix + str(channelNo)
             else:
                 td = refTag
-                self.addr = (td.ChannelDef.Prefix + str(channelNo) + "_" if channelNo > 0 else "") + td.name
+                self.addr = (td.ChannelDef.Prefix + str(channelNo) + "_" if channelNo > 0 else "") + td.Name
 
     @property
     def index(self):
@@ -12,3 +12,8 @@ class ItemDefBase:
     @property
     def meter(self):
         return self.ChannelDef.Meter
+
+    # имя свойства, как в протоколах (deffinition.Meter)
+    @property
+    def Meter(self):
+        return self.ChannelDef.Meter
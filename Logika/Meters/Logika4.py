@@ -8,9 +8,10 @@ from Logika.Meters.Meter import Meter
 from Logika.Meters.StandardVars import StdVar
 from Logika.Meters.TagDef import TagDef
 from Logika.Meters.Types import ArchiveType, BusProtocolType
+from Logika.Utils.Checksum import Checksum8
 
 
-class Logika4(ABC, Meter):
+class Logika4(Meter, ABC):
     dfPressure = "0.000"
     dfMass = "0.000"
     dfVolume = "0.000"
@@ -168,14 +169,10 @@ class Logika4(ABC, Meter):
 
     @staticmethod
     def checksum8(buf: bytes, start: int, length: int):
-        a = 0xFF
-        for i in range(length):
-            a -= buf[start + i]
-
-        return a
+        return Checksum8.compute(buf, start, length)
 
     @staticmethod
-    def get_channel_kind(channel_start: int) -> ChannelKind:
+    def get_channel_kind(channel_start: int, channel_count: int = None, channel_name: str = None) -> ChannelKind:
         if channel_start == 0:
             return ChannelKind.Common
         else:
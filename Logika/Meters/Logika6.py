@@ -10,7 +10,7 @@ from Logika.Meters.TagDef import TagDef, DataTagDef6, Tag6NodeType
 from Logika.Meters.Types import ArchiveType, BusProtocolType, ImportantTag, MeasureKind, TagKind
 
 
-class Logika6(ABC, Meter):
+class Logika6(Meter, ABC):
     def __init__(self):
         self.channel_suffixes = ['т', 'п', 'г', 'к']
         super().__init__()
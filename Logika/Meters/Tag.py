@@ -1,12 +1,10 @@
 from Logika.Meters.Channel import Channel
-from Logika.Meters.Logika4 import Logika4
-from Logika.Meters.Logika6 import Logika6
 from Logika.Meters.TagDef import TagDef
 
 
 class Tag:
     def __init__(self, refTag: TagDef = None, channelNo: int = None, vt: 'Tag' = None):
-        if refTag and channelNo:
+        if refTag and channelNo is not None:
             self.deffinition = refTag
             if channelNo < refTag.ChannelDef.Start or channelNo >= refTag.ChannelDef.Start + refTag.ChannelDef.Count:
                 raise ValueError("некорректный номер канала")
@@ -19,8 +17,24 @@ class Tag:
     def name(self):
         return self.deffinition.Name
 
+    # имена свойств, как в протоколах (t.Channel.No, t.Ordinal, t.Name)
+    @property
+    def Channel(self):
+        return self.channel
+
+    @property
+    def Ordinal(self) -> int:
+        return self.deffinition.Ordinal
+
+    @property
+    def Name(self):
+        return self.deffinition.Name
+
     @property
     def field_name(self) -> str:
+        # Logika4/Logika6 импортируют модуль тэгов - импорт здесь, а не в заголовке модуля
+        from Logika.Meters.Logika4 import Logika4
+        from Logika.Meters.Logika6 import Logika6
         if isinstance(self.deffinition.meter, Logika4):
             if self.deffinition.ChannelDef.Prefix == "ТВ":
                 return f"{self.channel.Name}_{self.deffinition.Name}"
@@ -5,7 +5,7 @@ from Logika.Meters.Channel import ChannelDef
 from Logika.Meters.ItemDefBase import ItemDefBase
 from Logika.Meters.StandardVars import StdVar
 from Logika.Meters.Types import TagKind
-from Logika.Meters.__4L.Logika4L import BinaryType
+from Logika.Meters.Types import BinaryType
 
 
 class Tag6NodeType(Enum):
@@ -14,7 +14,7 @@ class Tag6NodeType(Enum):
     Structure = 2
 
 
-class TagDef(ABC, ItemDefBase):
+class TagDef(ItemDefBase, ABC):
     def __init__(self, channelDef: ChannelDef, ordinal: int, name: str, stdVar: StdVar, desc: str, dataType: type,
                  dbType: str, displayFormat: str):
         super().__init__(channelDef, ordinal, name, desc, dataType)
@@ -46,7 +46,7 @@ class TagDef(ABC, ItemDefBase):
                 raise NotImplementedError("cannot map DataType to DbType")
 
 
-class DataTagDef(ABC, TagDef):
+class DataTagDef(TagDef, ABC):
     def __init__(self, channel: ChannelDef, name: str, stdVar: StdVar, desc: str, dataType: type, dbType: str, displayFormat: str, tagKind: TagKind, basicParam: bool, updateRate: int,
                  order: int, descEx: str, ranging: str):
         super().__init__(channel, order, name, stdVar, desc, dataType, dbType, displayFormat)
@@ -100,7 +100,7 @@ class TagDef4L(TagDef4):
                  addonChnOffs: int):
         super().__init__(parentChannel, name, stdVar, tagKind, basicParam, updateRate, order, desc, dataType, sDbType,
                          units, displayFormat, descEx, ranging)
-        if addr < 0 or chnOffs < 0 or addonAddr < 0 or addonChnOffs < 0:
+        if any(v is not None and v < 0 for v in (addr, chnOffs, addonAddr, addonChnOffs)):
             raise ValueError("Nullable address value cannot be < 0")
         self.internalType = binType
         self.inRAM = inRam
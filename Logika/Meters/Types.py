@@ -3,6 +3,32 @@ from enum import Enum, auto
 from typing import List, Dict
 
 
+class BinaryType(Enum):
+    undefined = 0
+    r32 = 1  # single microchip-float
+    r32x3 = 2  # triple consequtive microchip floats, sum to obtain result
+    time = 3  # HH MM SS (3 bytes)
+    date = 4  # YY MM DD (3 bytes)
+    MMDD = 5  # ММ-DD-xx-xx (32-bit) (дата перехода на летнее/зимнее время)
+    bitArray32 = 6  # сборки НС
+    bitArray24 = 7
+    bitArray16 = 8
+    bitArray8 = 9
+    # параметр БД приборов 942, 741, (943?), структура, используется строка
+    dbentry = 10
+    # параметр БД приборов, используется бинарное представление ([P], [dP] - единицы измерения 741)
+    dbentry_byte = 11
+    u8 = 12  # unsigned 8bit char
+    i32r32 = 13  # int32+float во FLASH (+ float приращение за текущий час в ОЗУ, не читаем и не добавляем)
+    MMHH = 14  # minutes, hours (941: 'ТО' )
+    NSrecord = 15
+    IZMrecord = 16
+    archiveStruct = 17  # архивный срез (структура, определяемая прибором)
+    modelChar = 18  # код модели прибора
+    u24 = 19  # серийный номер прибора
+    svcRecordTimestamp = 20  # метка времени записи сервисного архива
+
+
 class MeasureKind(Enum):
     T = "тепло/вода"
     G = "газ"
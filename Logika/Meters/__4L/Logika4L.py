@@ -8,43 +8,17 @@ from Logika.Meters.ArchiveFieldDef import ArchiveFieldDef4L
 from Logika.Meters.Logika4 import Logika4
 from Logika.Meters.StandardVars import StdVar
 from Logika.Meters.TagDef import TagDef4L
-from Logika.Meters.Types import ArchiveType
+from Logika.Meters.Types import ArchiveType, BinaryType
 from Logika.Meters.Meter import Meter
 
 
-class BinaryType(Enum):
-    undefined = 0
-    r32 = 1  # single microchip-float
-    r32x3 = 2  # triple consequtive microchip floats, sum to obtain result
-    time = 3  # HH MM SS (3 bytes)
-    date = 4  # YY MM DD (3 bytes)
-    MMDD = 5  # ММ-DD-xx-xx (32-bit) (дата перехода на летнее/зимнее время)
-    bitArray32 = 6  # сборки НС
-    bitArray24 = 7
-    bitArray16 = 8
-    bitArray8 = 9
-    # параметр БД приборов 942, 741, (943?), структура, используется строка
-    dbentry = 10
-    # параметр БД приборов, используется бинарное представление ([P], [dP] - единицы измерения 741)
-    dbentry_byte = 11
-    u8 = 12  # unsigned 8bit char
-    i32r32 = 13  # int32+float во FLASH (+ float приращение за текущий час в ОЗУ, не читаем и не добавляем)
-    MMHH = 14  # minutes, hours (941: 'ТО' )
-    NSrecord = 15
-    IZMrecord = 16
-    archiveStruct = 17  # архивный срез (структура, определяемая прибором)
-    modelChar = 18  # код модели прибора
-    u24 = 19  # серийный номер прибора
-    svcRecordTimestamp = 20  # метка времени записи сервисного архива
-
-
 class ADSFlashRun:
     def __init__(self, start, length):
         self.Start = start
         self.Length = length
 
 
-class Logika4L(ABC, Logika4):
+class Logika4L(Logika4, ABC):
     def __init__(self):
         super().__init__()
 
@@ -167,6 +141,15 @@ class Logika4L(ABC, Logika4):
         else:
             raise Exception(f"unsupported binary type in GetValue: '{binaryType}'")
 
+    # признак оперативного параметра (out-параметр operFlag get_value): есть только у записей БД параметров
+    @staticmethod
+    def get_oper_flag(binaryType, buffer, offset) -> bool:
+        if binaryType == BinaryType.dbentry:
+            return buffer[offset + 4] != 0xFF and (buffer[offset] & 0x01) > 0
+        elif binaryType == BinaryType.dbentry_byte:
+            return (buffer[offset] & 0x01) > 0
+        return False
+
     @staticmethod
     def size_of(dataType) -> int:
         if dataType == BinaryType.u8 or dataType == BinaryType.bitArray8:
@@ -4,7 +4,7 @@ from typing import List, Dict
 from Logika.Meters.DataTag import DataTag
 from Logika.Meters.Logika4 import Logika4
 from Logika.Meters.Types import MeasureKind, ImportantTag
-from Logika4L import Logika4L, ADSFlashRun
+from Logika.Meters.__4L.Logika4L import Logika4L, ADSFlashRun
 
 
 class TSPG741(Logika4L):
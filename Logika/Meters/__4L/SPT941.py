@@ -1,7 +1,7 @@
 from datetime import timedelta
 
 from Logika.Meters.Types import MeasureKind, ImportantTag
-from Logika4L import Logika4L, ADSFlashRun
+from Logika.Meters.__4L.Logika4L import Logika4L, ADSFlashRun
 
 
 class TSPT941(Logika4L):
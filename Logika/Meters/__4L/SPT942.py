@@ -8,7 +8,7 @@ from Logika.Meters.DataTag import DataTag
 from Logika.Meters.Logika4 import CalcFieldDef
 from Logika.Meters.StandardVars import StdVar
 from Logika.Meters.Types import MeasureKind, ImportantTag, ArchiveType
-from Logika4L import Logika4L, ADSFlashRun
+from Logika.Meters.__4L.Logika4L import Logika4L, ADSFlashRun
 
 
 class TSPT942(Logika4L):
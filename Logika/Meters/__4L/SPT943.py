@@ -6,8 +6,8 @@ from Logika.Meters.DataTag import DataTag
 from Logika.Meters.Logika4 import CalcFieldDef
 from Logika.Meters.StandardVars import StdVar
 from Logika.Meters.Types import MeasureKind, ImportantTag
-from Logika4L import Logika4L, ADSFlashRun
-from SPT942 import TSPT942
+from Logika.Meters.__4L.Logika4L import Logika4L, ADSFlashRun
+from Logika.Meters.__4L.SPT942 import TSPT942
 
 
 class TSPT943(Logika4L):
@@ -1,7 +1,7 @@
 from typing import Dict
 
 from Logika.Meters.Types import MeasureKind, ImportantTag
-from Logika4M import Logika4M
+from Logika.Meters.__4M.Logika4M import Logika4M
 
 
 class TLGK410(Logika4M):
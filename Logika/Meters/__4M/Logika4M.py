@@ -1,4 +1,3 @@
-import array
 import struct
 from abc import ABC, abstractmethod
 from datetime import datetime
@@ -38,7 +37,7 @@ class AdsTagBlock:
                     self.ords.append(int(tag))
 
 
-class Logika4M(ABC, Logika4):
+class Logika4M(Logika4, ABC):
     ND_STR = "#н/д"
 
     def __init__(self):
@@ -93,68 +92,48 @@ class Logika4M(ABC, Logika4):
             t_len = tl
             return 1, t_len
 
+    # разбор тэга по таблице TAG_PARSERS; возвращает (длина тэга в буфере, значение)
     @staticmethod
     def parse_tag(buf: bytearray, idx: int):
         tID = buf[idx]
-        lenLen, t_len = Logika4M.get_tag_length(buf, idx + 1)
-        iSt = idx + 1 + lenLen
-
-        if tID == 0x05:
-            v = None
-        elif tID == 0x43:
-            v = struct.unpack('<f', buf[iSt:iSt + 4])[0]
-        elif tID == 0x41:
-            if t_len == 1:
-                v = struct.unpack('<I', buf[iSt:iSt + 1])[0]
-            elif t_len == 2:
-                v = struct.unpack('<I', buf[iSt:iSt + 2])[0]
-            elif t_len == 4:
-                v = struct.unpack('<I', buf[iSt:iSt + 4])[0]
-            else:
-                raise Exception("Unsupported tag length for 'uint' type")
-        elif tID == 0x04:
-            v = array.array('B', buf[iSt:iSt + t_len])
-        elif tID == 0x16:
-            v = buf[iSt:iSt + t_len].decode('cp1251')
-        elif tID == 0x44:
-            int_val = struct.unpack('<i', buf[iSt:iSt + 4])[0]
-            float_val = struct.unpack('<f', buf[iSt + 4:iSt + 8])[0]
-            v = float(int_val) + float_val
-        elif tID == 0x45:
-            if t_len > 0:
-                v = OperParamFlag.Yes if buf[iSt] > 0 else OperParamFlag.No
-            else:
-                v = OperParamFlag.No
-        elif tID == 0x46:
-            v = buf[iSt] if t_len == 1 else None
-        elif tID == 0x47:
-            v = "{:02}:{:02}:{:02}".format(buf[iSt + 3], buf[iSt + 2], buf[iSt + 1])
-        elif tID == 0x48:
-            v = "{:02}-{:02}-{:02}".format(buf[iSt], buf[iSt + 1], buf[iSt + 2])
-        elif tID == 0x49:
-            tv = [0, 1, 1, 0, 0, 0, 0, 0]
-            if t_len > 0:
-                for t in range(min(t_len, len(tv))):
-                    tv[t] = buf[iSt + t]
-                ms = (tv[7] << 8) | tv[6]
-                if ms > 999:
-                    raise Exception("Incorrect millisecond field in timestamp of archive record: " + str(ms))
-                v = datetime(2000 + tv[0], tv[1], tv[2], tv[3], tv[4], tv[5], ms)
-            else:
-                v = datetime.min
-        elif tID == 0x4A:
-            v = (buf[iSt], struct.unpack('<H', buf[iSt + 1:iSt + 3])[0])
-        elif tID == 0x4B:
-            if t_len <= 16:
-                v = Logika4.bit_numbers_from_array(buf, iSt, t_len * 8)
-            else:
-                raise Exception("FLAGS tag length unsupported")
-        elif tID == 0x55:  # ERR
-            v = buf[iSt]
+        t_len = buf[idx + 1]
+        if t_len < 0x80:
+            iSt = idx + 2
         else:
-            raise Exception("unknown tag type 0x{:X2}".format(tID))
+            lenLen, t_len = Logika4M.get_tag_length(buf, idx + 1)
+            iSt = idx + 1 + lenLen
+
+        parser = TAG_PARSERS.get(tID)
+        if parser is None:
+            raise Exception(f"unknown tag type 0x{tID:02X}")
 
-        return 1 + lenLen + t_len, v  # tag code + length field + payload
+        return iSt - idx + t_len, parser(buf, iSt, t_len)  # tag code + length field + payload
+
+    # разбор всех тэгов буфера [start, end) за один вызов
+    @staticmethod
+    def parse_tags(buf: bytearray, start: int = 0, end: int = None) -> list:
+        parsers = TAG_PARSERS
+        get_tag_length = Logika4M.get_tag_length
+        end = len(buf) if end is None else end
+        values = []
+        append = values.append
+        idx = start
+        while idx < end:
+            tID = buf[idx]
+            t_len = buf[idx + 1]
+            if t_len < 0x80:
+                iSt = idx + 2
+            else:
+                lenLen, t_len = get_tag_length(buf, idx + 1)
+                iSt = idx + 1 + lenLen
+
+            parser = parsers.get(tID)
+            if parser is None:
+                raise Exception(f"unknown tag type 0x{tID:02X}")
+            append(parser(buf, iSt, t_len))
+            idx = iSt + t_len
+
+        return values
 
     def read_tag_def(self, r):
         chKey, name, ordinal, kind, is_basic_param, updRate, dataType, stv, desc, description_ex, ranging = (
@@ -204,3 +183,103 @@ class Logika4M(ABC, Logika4):
         display_format = str(r["display_format"])
 
         return ArchiveFieldDef4M(ra, idx, name, desc, stv, t, s_db_type, display_format, units)
+
+
+# разбор значений тэгов M4 по коду тэга: функция (буфер, начало данных, длина данных) -> значение
+_F32 = struct.Struct('<f')
+_I32_F32 = struct.Struct('<if')
+_PNUM = struct.Struct('<BH')
+_TIMESTAMP = struct.Struct('<6BH')
+_UINT = {1: struct.Struct('<B'), 2: struct.Struct('<H'), 4: struct.Struct('<I')}
+_DD = [f"{i:02}" for i in range(256)]
+
+
+def _tag_null(buf, i, n):
+    return None
+
+
+def _tag_float(buf, i, n):
+    return _F32.unpack_from(buf, i)[0]
+
+
+def _tag_uint(buf, i, n):
+    st = _UINT.get(n)
+    if st is None:
+        raise Exception("Unsupported tag length for 'uint' type")
+    return st.unpack_from(buf, i)[0]
+
+
+def _tag_octets(buf, i, n):
+    return bytes(buf[i:i + n])
+
+
+def _tag_string(buf, i, n):
+    return str(memoryview(buf)[i:i + n], 'cp1251')
+
+
+def _tag_mixed(buf, i, n):
+    int_val, float_val = _I32_F32.unpack_from(buf, i)
+    return float(int_val) + float_val
+
+
+def _tag_oper(buf, i, n):
+    return OperParamFlag.Yes if n > 0 and buf[i] > 0 else OperParamFlag.No
+
+
+def _tag_ack(buf, i, n):
+    return buf[i] if n == 1 else None
+
+
+def _tag_time(buf, i, n):
+    return _DD[buf[i + 3]] + ":" + _DD[buf[i + 2]] + ":" + _DD[buf[i + 1]]
+
+
+def _tag_date(buf, i, n):
+    return _DD[buf[i]] + "-" + _DD[buf[i + 1]] + "-" + _DD[buf[i + 2]]
+
+
+def _tag_timestamp(buf, i, n):
+    if n == 0:
+        return datetime.min
+    if n >= 8:
+        yy, mm, dd, hh, mi, ss, ms = _TIMESTAMP.unpack_from(buf, i)
+    else:
+        tv = [0, 1, 1, 0, 0, 0, 0, 0]
+        tv[:n] = buf[i:i + n]
+        yy, mm, dd, hh, mi, ss = tv[:6]
+        ms = (tv[7] << 8) | tv[6]
+    if ms > 999:
+        raise Exception("Incorrect millisecond field in timestamp of archive record: " + str(ms))
+    return datetime(2000 + yy, mm, dd, hh, mi, ss, ms * 1000)
+
+
+def _tag_pnum(buf, i, n):
+    return _PNUM.unpack_from(buf, i)
+
+
+def _tag_flags(buf, i, n):
+    if n > 16:
+        raise Exception("FLAGS tag length unsupported")
+    return Logika4.bit_numbers_from_array(buf, i, n * 8)
+
+
+def _tag_err(buf, i, n):
+    return buf[i]
+
+
+TAG_PARSERS = {
+    0x05: _tag_null,
+    0x43: _tag_float,
+    0x41: _tag_uint,
+    0x04: _tag_octets,
+    0x16: _tag_string,
+    0x44: _tag_mixed,
+    0x45: _tag_oper,
+    0x46: _tag_ack,
+    0x47: _tag_time,
+    0x48: _tag_date,
+    0x49: _tag_timestamp,
+    0x4A: _tag_pnum,
+    0x4B: _tag_flags,
+    0x55: _tag_err,
+}
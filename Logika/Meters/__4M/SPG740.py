@@ -2,13 +2,13 @@ from datetime import timedelta
 from typing import Dict, List
 
 from Logika.Meters.Types import MeasureKind, ImportantTag
-from Logika4M import Logika4M, AdsTagBlock
-from SPG742 import TSPG742
+from Logika.Meters.__4M.Logika4M import Logika4M, AdsTagBlock
+from Logika.Meters.__4M.SPG742 import TSPG742
 
 
 class TSPG740(Logika4M):
     def __init__(self):
-        super.__init__(self)
+        super().__init__()
 
     @property
     def ident_word(self):
@@ -4,12 +4,12 @@ from typing import List, Dict
 from Logika.Meters.DataTag import DataTag
 from Logika.Meters.Logika4 import Logika4
 from Logika.Meters.Types import MeasureKind, ImportantTag
-from Logika4M import Logika4M, AdsTagBlock
+from Logika.Meters.__4M.Logika4M import Logika4M, AdsTagBlock
 
 
 class TSPG742(Logika4M):
     def __init__(self):
-        super.__init__(self)
+        super().__init__()
 
     @property
     def ident_word(self):
@@ -2,8 +2,8 @@ from datetime import timedelta
 from typing import List
 
 from Logika.Meters.Types import MeasureKind, ImportantTag
-from Logika4M import Logika4M, AdsTagBlock
-from SPT941_20 import TSPT941_20
+from Logika.Meters.__4M.Logika4M import Logika4M, AdsTagBlock
+from Logika.Meters.__4M.SPT941_20 import TSPT941_20
 
 
 class TSPT940(Logika4M):
@@ -2,7 +2,7 @@ from datetime import timedelta
 from typing import List
 
 from Logika.Meters.Types import MeasureKind, ImportantTag
-from Logika4M import Logika4M, AdsTagBlock
+from Logika.Meters.__4M.Logika4M import Logika4M, AdsTagBlock
 
 
 class TSPT941_20(Logika4M):
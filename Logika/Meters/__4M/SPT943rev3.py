@@ -3,8 +3,8 @@ from typing import List, Dict
 
 from Logika.Meters.DataTag import DataTag
 from Logika.Meters.Types import MeasureKind, ImportantTag
-from Logika4M import Logika4M, AdsTagBlock
-from SPT941_20 import TSPT941_20
+from Logika.Meters.__4M.Logika4M import Logika4M, AdsTagBlock
+from Logika.Meters.__4M.SPT941_20 import TSPT941_20
 
 
 class TSPT943rev3(Logika4M):
@@ -0,0 +1,65 @@
+import struct
+from datetime import datetime
+
+import pytest
+
+from Logika.Meters.__4M.Logika4M import Logika4M, OperParamFlag
+
+
+def tag(tid: int, payload: bytes) -> bytes:
+    return bytes((tid, len(payload))) + payload
+
+
+CASES = [
+    (tag(0x05, b""), None),
+    (tag(0x43, struct.pack('<f', 20.5)), 20.5),
+    (tag(0x41, b"\x07"), 7),
+    (tag(0x41, struct.pack('<H', 0x1234)), 0x1234),
+    (tag(0x41, struct.pack('<I', 0x10000)), 0x10000),
+    (tag(0x04, b"\x01\x02"), b"\x01\x02"),
+    (tag(0x16, "СПТ943".encode('cp1251')), "СПТ943"),
+    (tag(0x44, struct.pack('<if', 1000, 0.25)), 1000.25),
+    (tag(0x45, b"\x01"), OperParamFlag.Yes),
+    (tag(0x45, b"\x00"), OperParamFlag.No),
+    (tag(0x46, b"\x02"), 2),
+    (tag(0x47, bytes((0, 5, 30, 12))), "12:30:05"),
+    (tag(0x48, bytes((18, 10, 26))), "18-10-26"),
+    (tag(0x49, bytes((26, 10, 18, 7, 15, 0, 0xF4, 0x01))), datetime(2026, 10, 18, 7, 15, 0, 500000)),
+    (tag(0x49, bytes((26, 10))), datetime(2026, 10, 1)),
+    (tag(0x4A, bytes((1, 0x34, 0x12))), (1, 0x1234)),
+    (tag(0x4B, bytes((0x05, 0x80))), [0, 2, 15]),
+    (tag(0x55, b"\x03"), 3),
+]
+
+
+@pytest.mark.parametrize("raw, value", CASES)
+def test_parse_tag_by_type(raw, value):
+    assert Logika4M.parse_tag(bytearray(raw), 0) == (len(raw), value)
+
+
+def test_parse_tags_whole_buffer_and_range():
+    raw = b"".join(r for r, _ in CASES)
+    expected = [v for _, v in CASES]
+    assert Logika4M.parse_tags(bytearray(raw)) == expected
+    assert Logika4M.parse_tags(memoryview(raw)) == expected
+
+    st = len(CASES[0][0])
+    en = st + len(CASES[1][0]) + len(CASES[2][0])
+    assert Logika4M.parse_tags(b"\xEE" + raw, st + 1, en + 1) == [20.5, 7]
+
+
+def test_long_length_field():
+    s = "Ж" * 200
+    raw = bytes((0x16, 0x81, 200)) + s.encode('cp1251')
+    assert Logika4M.parse_tag(raw, 0) == (len(raw), s)
+    raw = bytes((0x04, 0x82, 0x01, 0x00)) + bytes(256)
+    assert Logika4M.parse_tags(raw) == [bytes(256)]
+
+
+def test_unknown_and_malformed_tags():
+    with pytest.raises(Exception, match="unknown tag type 0x99"):
+        Logika4M.parse_tags(tag(0x99, b"\x00"))
+    with pytest.raises(Exception, match="uint"):
+        Logika4M.parse_tag(tag(0x41, b"\x00\x00\x00"), 0)
+    with pytest.raises(Exception, match="millisecond"):
+        Logika4M.parse_tag(tag(0x49, bytes((26, 10, 18, 0, 0, 0, 0xE8, 0x03))), 0)
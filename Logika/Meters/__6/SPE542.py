@@ -8,7 +8,7 @@ class TSPE542(Logika6):
     def __init__(self):
         self.channels_per_cluster = 16
         self.groups_per_cluster = 4
-        super.__init__(self)
+        super().__init__()
 
     @property
     def measure_kind(self) -> MeasureKind:
@@ -9,7 +9,7 @@ class TSPG762(Logika6):
         self.mdb_R_ords = [81]
         self.mdb_P_ords = [251, 201, 206, 211, 221, 231]
         self.mdb_C_ords = [411, 421]
-        super.__init__(self)
+        super().__init__()
 
     @property
     def measure_kind(self) -> MeasureKind:
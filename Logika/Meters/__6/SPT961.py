@@ -7,7 +7,7 @@ class TSPT961(Logika6):
         self.mdb_R_ords = [71, 75]
         self.mdb_P_ords = [201, 206, 211, 216, 231, 241, 221]
         self.mdb_C_ords = [401, 406]
-        super.__init__(self)
+        super().__init__()
 
     @property
     def measure_kind(self) -> MeasureKind:
@@ -7,7 +7,7 @@ class TSPT961M(Logika6):
         self.mdb_R_ords = [91, 72, 75, 79, 83, 87]
         self.mdb_P_ords = [235, 196, 201, 206, 239, 243, 211, 216, 221]
         self.mdb_C_ords = [401, 406]
-        super.__init__(self)
+        super().__init__()
 
     @property
     def measure_kind(self) -> MeasureKind:
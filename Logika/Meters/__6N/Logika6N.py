@@ -5,7 +5,7 @@ from Logika.Meters.Logika6 import Logika6
 from Logika.Meters.Types import ImportantTag
 
 
-class Logika6N(ABC, Logika6):
+class Logika6N(Logika6, ABC):
     def __init__(self):
         self.dfNS = "00000000"  # формат отображения поля НС
         super().__init__()
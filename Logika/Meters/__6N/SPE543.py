@@ -1,12 +1,12 @@
 from typing import Dict
 
 from Logika.Meters.Types import MeasureKind, ImportantTag
-from Logika6N import Logika6N
+from Logika.Meters.__6N.Logika6N import Logika6N
 
 
 class TSPE543(Logika6N):
     def __init__(self):
-        super.__init__(self)
+        super().__init__()
 
     @property
     def measure_kind(self) -> MeasureKind:
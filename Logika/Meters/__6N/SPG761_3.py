@@ -1,10 +1,10 @@
 from Logika.Meters.Types import MeasureKind
-from Logika6N import Logika6N
+from Logika.Meters.__6N.Logika6N import Logika6N
 
 
 class TSPG761_3(Logika6N):
     def __init__(self):
-        super.__init__(self)
+        super().__init__()
 
     @property
     def measure_kind(self) -> MeasureKind:
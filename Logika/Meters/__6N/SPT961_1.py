@@ -1,5 +1,5 @@
 from Logika.Meters.Types import MeasureKind
-from Logika6N import Logika6N
+from Logika.Meters.__6N.Logika6N import Logika6N
 
 
 class TSPT961_1(Logika6N):
@@ -7,7 +7,7 @@ class TSPT961_1(Logika6N):
         self.mdb_R_ords = [91, 72, 75, 79, 83]
         self.mdb_P_ords = [235, 196, 201, 206, 239, 243, 211, 216, 221, 246]
         self.mdb_C_ords = [401, 406]
-        super.__init__(self)
+        super().__init__()
 
     @property
     def measure_kind(self) -> MeasureKind:
@@ -0,0 +1,2 @@
+# модуль Meter первым: классы приборов, которые он создает, импортируют его сами
+import Logika.Meters.Meter  # noqa: F401
@@ -0,0 +1,48 @@
+import time
+from typing import Callable, Hashable, List
+
+from Logika.Connections.SerialConnection import BaudRate
+
+
+# выбор скорости обмена для перехода после рукопожатия. для каждой пары (порт, прибор) запоминается
+# скорость, на которой обмен заработал, и скорости, на которых переход не удался; неудавшиеся скорости
+# повторно пробуются не раньше чем через RETRY_INTERVAL секунд.
+# неудачная попытка стоит прибору ALT_SPEED_FALLBACK_TIME ожидания, поэтому за сеанс - не более MAX_ATTEMPTS
+class BaudRatePolicy:
+    M4_BAUD_RATES = (BaudRate.b2400, BaudRate.b4800, BaudRate.b9600, BaudRate.b19200, BaudRate.b38400,
+                     BaudRate.b57600, BaudRate.b115200)
+    RETRY_INTERVAL = 3600.0
+    MAX_ATTEMPTS = 2
+
+    def __init__(self, target: BaudRate, clock: Callable[[], float] = time.monotonic):
+        self.target = target
+        self.clock = clock
+        self.good: dict[Hashable, BaudRate] = {}
+        self.failed: dict[Hashable, dict[BaudRate, float]] = {}
+
+    # скорости для попыток перехода по убыванию; пустой список - переход не нужен или все скорости выше
+    # текущей недавно не удались
+    def candidates(self, key: Hashable, current: BaudRate, max_baud_rate: int) -> List[BaudRate]:
+        limit = min(int(self.target), int(max_baud_rate))
+        now = self.clock()
+        failed = self.failed.get(key, {})
+        rates = [br for br in reversed(self.M4_BAUD_RATES)
+                 if int(current) < br <= limit and now - failed.get(br, -self.RETRY_INTERVAL) >= self.RETRY_INTERVAL]
+        return rates[:self.MAX_ATTEMPTS]
+
+    def report(self, key: Hashable, baud_rate: BaudRate, ok: bool):
+        if ok:
+            self.good[key] = baud_rate
+            self.failed.get(key, {}).pop(baud_rate, None)
+        else:
+            self.failed.setdefault(key, {})[baud_rate] = self.clock()
+            if self.good.get(key) == baud_rate:
+                del self.good[key]
+
+    def report_text(self) -> str:
+        lines = []
+        for key in sorted(set(self.good) | set(self.failed), key=str):
+            good = self.good.get(key)
+            failed = ", ".join(str(int(br)) for br in sorted(self.failed.get(key, {})))
+            lines.append(f"{key}: {int(good) if good else '-'} bps, неудачно: {failed or '-'}")
+        return "\n".join(lines)
@@ -5,3 +5,11 @@ class ErrorCode(Enum):
     BadRequest = (0, "нарушение структуры запроса")
     WriteProtected = (1, "защита от записи")
     ArgumentError = (2, "недопустимое значение")
+
+    # поиск по коду из ответа прибора
+    @classmethod
+    def _missing_(cls, value):
+        for ec in cls:
+            if ec.value[0] == value:
+                return ec
+        return None
@@ -3,7 +3,6 @@ from typing import List
 from Logika.Meters.ArchiveDef import ArchiveDef4L
 from Logika.Meters.__4L.Logika4L import Logika4L
 from Logika.Protocols.M4.FlashRingBuffer import FRBIndex, FlashArray, FlashRingBuffer
-from Logika.Protocols.M4.M4Protocol import MeterInstance
 
 
 class Logika4LTVReadState:
@@ -30,7 +29,7 @@ class VQT:
 
 
 class FlashArchive4:
-    def __init__(self, mi: MeterInstance, arDef, channelNo, elementSize, HeaderTimeGetter, HeaderValueGetter):
+    def __init__(self, mi: 'MeterInstance', arDef, channelNo, elementSize, HeaderTimeGetter, HeaderValueGetter):
         self.mi = mi
         self.deffinition = arDef
         idxAddr = self.deffinition.IndexAddr2 if channelNo == 2 else self.deffinition.IndexAddr
@@ -116,7 +115,7 @@ class SyncFlashArchive4(FlashArchive4):
 
 
 class AsyncFlashArchive4(FlashArchive4):
-    def __init__(self, mi: MeterInstance, arDef: ArchiveDef4L, channelNo: int, ValueGetter):
+    def __init__(self, mi: 'MeterInstance', arDef: ArchiveDef4L, channelNo: int, ValueGetter):
         super().__init__(mi, arDef, channelNo, arDef.RecordSize, self.get_async_record_time, ValueGetter)
 
     @staticmethod
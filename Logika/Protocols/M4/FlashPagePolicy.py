@@ -0,0 +1,80 @@
+import time
+from array import array
+from enum import IntEnum
+from typing import Callable, Iterable
+
+from Logika.Meters.Types import TagKind
+from Logika.Meters.__4L.Logika4L import Logika4L
+
+
+class PageClass(IntEnum):
+    Params = 0  # настроечные параметры: меняются только при изменении БД прибора
+    Totals = 1  # тотальные счетчики и прочие значения, обновляемые прибором (раз в час)
+
+
+# срок действия страниц flash прибора 4L в кэше MeterInstance, по классу страницы.
+# класс определяется по описаниям тэгов: страница с хотя бы одним обновляемым значением - Totals.
+# Totals перечитываются, если загружены раньше TOTALS_TTL назад; Params - при смене контрольной суммы
+# параметров (проверяется не чаще PARAMS_CHECK_INTERVAL, и только когда запрошены страницы Params)
+# или по истечении PARAMS_MAX_AGE. страницы архивов сюда не входят - их обновляет FlashRingBuffer по индексу записи
+class FlashPagePolicy:
+    TOTALS_TTL = 600.0  # с
+    PARAMS_MAX_AGE = 7 * 24 * 3600.0  # с, как M4Protocol.FLASH_STORE_MAX_AGE
+    PARAMS_CHECK_INTERVAL = 600.0  # с
+
+    def __init__(self, page_count: int, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.classes = bytearray(page_count)
+        self.loaded = array('d', [float('-inf')]) * page_count  # clock() загрузки страницы
+        self.params_csum: int | None = None
+        self.params_checked = float('-inf')
+
+    def classify(self, tag_defs: Iterable, page_size: int):
+        for td in tag_defs:
+            if td.inRAM:
+                continue
+            cls = PageClass.Params if td.Kind in (TagKind.Parameter, TagKind.Info) else PageClass.Totals
+            size = Logika4L.size_of(td.internalType)
+            for addr in {td.address, td.address + (td.channelOffset or 0)}:
+                for p in range(addr // page_size, min((addr + size - 1) // page_size + 1, len(self.classes))):
+                    self.classes[p] = max(self.classes[p], cls)
+
+    def ttl(self, page: int) -> float:
+        return self.TOTALS_TTL if self.classes[page] == PageClass.Totals else self.PARAMS_MAX_AGE
+
+    # страницы загружены age секунд назад (0 - только что прочитаны из прибора)
+    def on_loaded(self, start_page: int, count: int, age: float = 0.0):
+        t = self.clock() - age
+        for p in range(start_page, start_page + count):
+            self.loaded[p] = t
+
+    def expired(self, page: int) -> bool:
+        return self.clock() - self.loaded[page] >= self.ttl(page)
+
+    # снимает с page_map устаревшие страницы из pages; возвращает число снятых
+    def expire(self, pages: Iterable[int], page_map) -> int:
+        n = 0
+        for p in pages:
+            if page_map[p] and self.expired(p):
+                page_map[p] = False
+                n += 1
+        return n
+
+    def has_params(self, pages: Iterable[int]) -> bool:
+        return any(self.classes[p] == PageClass.Params for p in pages)
+
+    def params_check_due(self) -> bool:
+        return self.clock() - self.params_checked >= self.PARAMS_CHECK_INTERVAL
+
+    # новое значение контрольной суммы параметров; True - сумма изменилась и страницы Params недействительны
+    def update_params_csum(self, csum: int) -> bool:
+        self.params_checked = self.clock()
+        changed = self.params_csum is not None and csum != self.params_csum
+        self.params_csum = csum
+        return changed
+
+    def invalidate_params(self, page_map):
+        for p, cls in enumerate(self.classes):
+            if cls == PageClass.Params:
+                page_map[p] = False
+                self.loaded[p] = float('-inf')
@@ -0,0 +1,81 @@
+import mmap
+import os
+import struct
+import time
+
+
+# постоянный кэш страниц flash прибора 4L - отображаемый в память файл:
+# заголовок, время загрузки каждой страницы (time.time(), 0 - страницы нет), образ flash.
+# params_csum - контрольная сумма, при которой страницы действительны; ее смена делает недействительными все страницы
+class FlashPageStore:
+    MAGIC = b"L4FP"
+    VERSION = 1
+    HEADER = struct.Struct('<4sHHII')  # сигнатура, версия, размер страницы, число страниц, params_csum
+    PAGE_TIME = struct.Struct('<d')
+
+    def __init__(self, path: str, page_count: int, page_size: int):
+        self.path = path
+        self.page_count = page_count
+        self.page_size = page_size
+        self.times_offset = self.HEADER.size
+        self.data_offset = self.times_offset + page_count * self.PAGE_TIME.size
+        size = self.data_offset + page_count * page_size
+
+        exists = os.path.exists(path) and os.path.getsize(path) == size
+        with open(path, "r+b" if exists else "w+b") as f:
+            if not exists:
+                f.truncate(size)
+            self.mm = mmap.mmap(f.fileno(), size)
+
+        magic, version, ps, pc, _ = self.HEADER.unpack_from(self.mm, 0)
+        if (magic, version, ps, pc) != (self.MAGIC, self.VERSION, page_size, page_count):
+            self.mm[:self.data_offset] = bytes(self.data_offset)
+            self.HEADER.pack_into(self.mm, 0, self.MAGIC, self.VERSION, page_size, page_count, 0)
+
+    # имя файла кэша: тип прибора и его идентификатор (байты тэга ИД из БД параметров)
+    @staticmethod
+    def file_name(mtr, ident: bytes) -> str:
+        return f"{type(mtr).__name__}_{ident.hex()}.l4flash"
+
+    @property
+    def params_csum(self) -> int:
+        return self.HEADER.unpack_from(self.mm, 0)[4]
+
+    @params_csum.setter
+    def params_csum(self, value: int):
+        if value != self.params_csum:
+            self.invalidate()
+            self.HEADER.pack_into(self.mm, 0, self.MAGIC, self.VERSION, self.page_size, self.page_count, value)
+
+    def page_time(self, page: int) -> float:
+        return self.PAGE_TIME.unpack_from(self.mm, self.times_offset + page * self.PAGE_TIME.size)[0]
+
+    def valid(self, page: int, max_age: float) -> bool:
+        t = self.page_time(page)
+        return t > 0 and time.time() - t < max_age
+
+    def page(self, page: int) -> bytes:
+        off = self.data_offset + page * self.page_size
+        return self.mm[off:off + self.page_size]
+
+    def store_pages(self, start_page: int, data, fetched_at: float = None):
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        n = min(len(data) // self.page_size, self.page_count - start_page)
+        off = self.data_offset + start_page * self.page_size
+        self.mm[off:off + n * self.page_size] = data[:n * self.page_size]
+        for p in range(start_page, start_page + n):
+            self.PAGE_TIME.pack_into(self.mm, self.times_offset + p * self.PAGE_TIME.size, fetched_at)
+
+    def invalidate(self, page: int = None):
+        if page is None:
+            self.mm[self.times_offset:self.data_offset] = bytes(self.data_offset - self.times_offset)
+        elif 0 <= page < self.page_count:
+            self.PAGE_TIME.pack_into(self.mm, self.times_offset + page * self.PAGE_TIME.size, 0.0)
+
+    def flush(self):
+        self.mm.flush()
+
+    def close(self):
+        if not self.mm.closed:
+            self.mm.flush()
+            self.mm.close()
@@ -0,0 +1,46 @@
+from typing import Iterable, List, Tuple
+
+
+# план чтения страниц flash прибора 4L для набора тэгов: недостающие страницы объединяются в диапазоны
+# не длиннее max_block страниц (один запрос ReadFlash на диапазон). промежуток из уже имеющихся или
+# ненужных страниц включается в диапазон, если его передача дешевле отдельного запроса:
+# страница стоит PAGE_FRAME_BYTES на скорости линии, запрос - время до первого байта ответа (rtt)
+class FlashReadPlanner:
+    BITS_PER_CHAR = 11
+    PAGE_FRAME_BYTES = 3 + 64 + 2  # заголовок, страница, контрольная сумма и конец кадра
+    REQUEST_BYTES = 3 + 4 + 2
+    DEFAULT_RTT = 0.1  # с, реакция прибора, пока нет замеров
+
+    def __init__(self, baud_rate: int = 2400, rtt: float = None, max_block: int = 8):
+        self.baud_rate = baud_rate
+        self.rtt = self.DEFAULT_RTT + self.REQUEST_BYTES * self.BITS_PER_CHAR / baud_rate if rtt is None else rtt
+        self.max_block = max_block
+
+    @property
+    def page_cost(self) -> float:
+        return self.PAGE_FRAME_BYTES * self.BITS_PER_CHAR / self.baud_rate
+
+    @property
+    def request_cost(self) -> float:
+        return self.rtt
+
+    @staticmethod
+    def pages_of(addr: int, size: int, page_size: int) -> range:
+        return range(addr // page_size, (addr + size - 1) // page_size + 1)
+
+    # диапазоны (первая страница, число страниц) для чтения страниц pages, отсутствующих в page_map
+    def plan(self, pages: Iterable[int], page_map: List[bool]) -> List[Tuple[int, int]]:
+        ranges: List[Tuple[int, int]] = []
+        for p in sorted(set(p for p in pages if not page_map[p])):
+            if ranges:
+                st, ct = ranges[-1]
+                gap = p - (st + ct)
+                if p - st + 1 <= self.max_block and gap * self.page_cost < self.request_cost:
+                    ranges[-1] = (st, p - st + 1)
+                    continue
+            ranges.append((p, 1))
+        return ranges
+
+    # оценка времени обмена по плану, с
+    def cost(self, ranges: List[Tuple[int, int]]) -> float:
+        return sum(self.request_cost + ct * self.page_cost for _, ct in ranges)
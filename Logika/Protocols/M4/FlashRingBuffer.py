@@ -2,8 +2,7 @@ from datetime import datetime
 from typing import List
 
 from Logika.Meters.__4L.Logika4L import Logika4L
-from Logika.Protocols.M4.FlashArchive4L import FlashArchive4
-from Logika.Protocols.M4.M4Protocol import MeterInstance, M4Protocol
+from Logika.Utils.PageBitmap import PageBitmap
 
 
 class FRBIndex:
@@ -30,18 +29,20 @@ class ObjCollection:
 
 
 class FlashArray:
-    def __init__(self, meter_instance: MeterInstance, data_addr: int, element_count: int, element_size: int):
+    def __init__(self, meter_instance: 'MeterInstance', data_addr: int, element_count: int, element_size: int):
         self.PAGE_SIZE: int = Logika4L.FLASH_PAGE_SIZE
-        start_page: int = self.start_page(0)
-        self.page_0_number: int = start_page
-
         self.data_addr: int = data_addr
         self.element_count: int = element_count
         self.element_size: int = element_size
-        self.mtr_instance: MeterInstance = meter_instance
+        self.mtr_instance: 'MeterInstance' = meter_instance
 
-        self.flash: bytearray = bytearray()
-        self.page_map: List[bool] = []
+        start_page: int = self.start_page(0)
+        self.page_0_number: int = start_page
+
+        # образ страниц массива: страница page_0_number + n по смещению n * PAGE_SIZE
+        page_count = self.end_page(element_count - 1) - start_page + 1
+        self.flash: bytearray = bytearray(page_count * self.PAGE_SIZE)
+        self.page_map: PageBitmap = PageBitmap(page_count)
 
         self.first_element_offset: int = data_addr - start_page * self.PAGE_SIZE
 
@@ -65,28 +66,21 @@ class FlashArray:
 
     def element_available(self, index: int):
         sp = self.start_page(index)
-        ep = self.end_page(index)
-        for p in range(sp, ep + 1):
-            if not self.page_map[p - self.page_0_number]:
-                return False
-        return True
+        return self.page_map.all_set(sp - self.page_0_number, self.end_page(index) - sp + 1)
 
     def invalidate_element(self, index: int):
         sp = self.start_page(index)
-        ep = self.end_page(index)
-        for p in range(sp, ep + 1):
-            self.page_map[p - self.page_0_number] = False
+        self.page_map.set_range(sp - self.page_0_number, self.end_page(index) - sp + 1, False)
 
     def update_pages(self, start_page: int, end_page: int):
         page_count = end_page - start_page + 1
 
-        mtr_4L = self.mtr_instance.mtr.__class__ = Logika4L()
+        mtr_4L = self.mtr_instance.mtr
         rbuf = self.mtr_instance.proto.read_flash_pages(mtr_4L, self.mtr_instance.nt, start_page, page_count)
 
         rPage = start_page - self.page_0_number
-        self.flash = rbuf
-        for v in range(page_count):
-            self.page_map[rPage + v] = True
+        self.flash[rPage * self.PAGE_SIZE:(rPage + page_count) * self.PAGE_SIZE] = rbuf
+        self.page_map.set_range(rPage, page_count)
 
     def update_elements(self, indexes: List[FRBIndex]):
         self.start_page_elem = -1
@@ -132,7 +126,7 @@ class FlashArray:
         else:
             return False
 
-        if n_ep - n_sp >= M4Protocol.MAX_PAGE_BLOCK:
+        if n_ep - n_sp >= self.mtr_instance.proto.MAX_PAGE_BLOCK:
             return False
 
         self.start_page_elem = n_sp
@@ -140,7 +134,7 @@ class FlashArray:
         return True
 
     def reset(self):
-        self.page_map = []
+        self.page_map.clear()
 
 
 class FlashRingBuffer(FlashArray):
@@ -149,7 +143,7 @@ class FlashRingBuffer(FlashArray):
         self.prev_idx: int = -1
         self.ts_prev_idx: datetime = datetime.now()
         self.prevIdx_devTime: datetime = datetime.min
-        self.parentArchive: FlashArchive4 = Parent
+        self.parentArchive: 'FlashArchive4' = Parent
         self.IndexAddress: int = IndexAddress
 
         self.Times = ObjCollection(self, HeaderTimeGetter)
@@ -234,7 +228,7 @@ class FlashRingBuffer(FlashArray):
                 currentIndex = self.prev_idx
                 return outdatedList, currentIndex
 
-        mtr_4L = self.parentArchive.mi.mtr.__class__ = Logika4L()
+        mtr_4L = self.parentArchive.mi.mtr
         ibytes = self.parentArchive.mi.proto.read_flash_bytes(mtr_4L, self.parentArchive.mi.nt, self.IndexAddress, 2)
         currentIndex = int.from_bytes(ibytes, byteorder='little')
 
@@ -0,0 +1,108 @@
+import math
+import time
+from datetime import timedelta
+from typing import Callable, Hashable
+
+
+class KeepaliveEntry:
+    __slots__ = ("next_poll", "poll_interval", "pings", "failures")
+
+    def __init__(self):
+        self.next_poll: float | None = None  # time.monotonic() следующего опроса
+        self.poll_interval: float | None = None
+        self.pings = 0
+        self.failures = 0
+
+
+# поддержание сеанса с прибором между опросами. сеанс закрывается прибором через session_timeout после
+# последнего обмена, после чего следующий опрос начинается с пробуждения (у приборов 4L - медленного).
+# незадолго до истечения сеанса прибору отправляется самый короткий допустимый запрос (рукопожатие без
+# пробуждения) - но только если очередной опрос этого прибора ожидается и суммарная стоимость запросов
+# поддержания до него меньше стоимости пробуждения с рукопожатием
+class KeepaliveScheduler:
+    MARGIN = 0.8  # доля session_timeout, после которой отправляется запрос поддержания
+    PING_BYTES = 9 + 8  # кадр рукопожатия и ответ на него
+    TURNAROUND = 0.05  # с, задержка ответа прибора
+    SLOW_WAKE_STEP = 0.02  # с, пауза между FF при медленном пробуждении
+    WAKE_BYTES = 16
+    WAKE_SETTLE = 0.1  # с, ожидание тишины в линии после пробуждения
+    BITS_PER_CHAR = 11
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.entries: dict[Hashable, KeepaliveEntry] = {}
+
+    def entry(self, nt: Hashable) -> KeepaliveEntry:
+        e = self.entries.get(nt)
+        if e is None:
+            e = KeepaliveEntry()
+            self.entries[nt] = e
+        return e
+
+    # время следующего опроса прибора: через interval секунд, далее - с тем же периодом
+    def expect_poll(self, nt: Hashable, interval: float):
+        e = self.entry(nt)
+        e.poll_interval = interval
+        e.next_poll = self.clock() + interval
+
+    # опрос прибора выполнен; при известном периоде - сдвиг ожидаемого времени следующего
+    def on_poll(self, nt: Hashable):
+        e = self.entry(nt)
+        e.next_poll = self.clock() + e.poll_interval if e.poll_interval is not None else None
+
+    def forget(self, nt: Hashable):
+        self.entries.pop(nt, None)
+
+    @staticmethod
+    def timeout_seconds(session_timeout) -> float:
+        if isinstance(session_timeout, timedelta):
+            return session_timeout.total_seconds()
+        return float(session_timeout)
+
+    def ping_cost(self, baud_rate: int) -> float:
+        return self.PING_BYTES * self.BITS_PER_CHAR / baud_rate + self.TURNAROUND
+
+    def wake_cost(self, baud_rate: int, slow: bool) -> float:
+        if slow:
+            wake = self.WAKE_BYTES * self.SLOW_WAKE_STEP
+        else:
+            wake = self.WAKE_BYTES * self.BITS_PER_CHAR / baud_rate
+        return wake + self.WAKE_SETTLE + self.ping_cost(baud_rate)
+
+    # число запросов поддержания, нужных чтобы дотянуть сеанс до опроса через gap секунд после последнего обмена
+    def pings_needed(self, gap: float, timeout: float) -> int:
+        if gap < timeout:
+            return 0
+        return math.floor(gap / (timeout * self.MARGIN))
+
+    # пора ли отправить запрос поддержания прибору nt, с последнего обмена с которым прошло idle секунд
+    def due(self, nt: Hashable, session_timeout, idle: float, baud_rate: int, slow_wake: bool) -> bool:
+        e = self.entries.get(nt)
+        timeout = self.timeout_seconds(session_timeout)
+        if e is None or e.next_poll is None or math.isinf(timeout) or idle >= timeout:
+            return False
+        if idle < timeout * self.MARGIN:
+            return False
+
+        now = self.clock()
+        n = self.pings_needed(e.next_poll - now + idle, timeout)
+        if n == 0:
+            return False
+        return n * self.ping_cost(baud_rate) < self.wake_cost(baud_rate, slow_wake)
+
+    # секунды до ближайшей проверки due() для прибора, None - поддержание не планируется
+    def next_check_in(self, nt: Hashable, session_timeout, idle: float) -> float | None:
+        e = self.entries.get(nt)
+        timeout = self.timeout_seconds(session_timeout)
+        if e is None or e.next_poll is None or math.isinf(timeout):
+            return None
+        return max(0.0, timeout * self.MARGIN - idle)
+
+    def report(self, nt: Hashable, ok: bool):
+        e = self.entry(nt)
+        e.pings += 1
+        if not ok:
+            e.failures += 1
+
+    def report_text(self) -> str:
+        return ", ".join(f"NT {nt}: запросов {e.pings}, неудачно {e.failures}" for nt, e in self.entries.items())
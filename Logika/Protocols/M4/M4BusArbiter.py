@@ -0,0 +1,190 @@
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Optional, Hashable
+
+from Logika.Connections.Connection import Connection, ConnectionState
+from Logika.ECommException import ECommException, ExcSeverity, CommError
+from Logika.LogLevel import LogLevel
+from Logika.Meters.Logika4 import Logika4
+from Logika.Protocols.M4.M4Protocol import M4Protocol
+
+
+class BusJob:
+    def __init__(self, caller: Hashable, mtr: Logika4, nt: int, tv: int, func: Callable[[M4Protocol], object],
+                 deadline: Optional[float], seq: int):
+        self.caller = caller
+        self.mtr = mtr
+        self.nt = nt
+        self.tv = tv
+        self.func = func
+        self.deadline = deadline
+        self.seq = seq
+        self.future: Future = Future()
+
+    @property
+    def target(self) -> tuple[int, int]:
+        return self.nt, self.tv
+
+
+# арбитр общей шины (RS-485 или TCP-шлюз): владеет одним соединением и выполняет задания многих
+# клиентов в одном потоке. задания к одному прибору/каналу (nt, tv) выполняются подряд, чтобы
+# select_device_and_channel не повторял рукопожатие при каждом переключении.
+# порядок заданий одного клиента сохраняется, между клиентами - круговая очередь;
+# серия заданий к одному прибору ограничена max_batch, задания с близким сроком выполняются вне очереди
+class M4BusArbiter:
+    MAX_BATCH = 16
+    URGENCY = 1.0
+
+    def __init__(self, connection: Connection, proto: Optional[M4Protocol] = None, max_batch: int = MAX_BATCH,
+                 urgency: float = URGENCY, clock: Callable[[], float] = time.monotonic):
+        self.connection = connection
+        self.proto = proto if proto is not None else M4Protocol()
+        self.proto.connection = connection
+        self.max_batch = max_batch
+        self.urgency = urgency
+        self.clock = clock
+
+        self.m_cond = threading.Condition()
+        self.queues: dict[Hashable, deque[BusJob]] = {}
+        self.callers: list[Hashable] = []
+        self.rr = 0
+        self.seq = itertools.count()
+        self.current: Optional[tuple[int, int]] = None
+        self.batch_len = 0
+        self.switches = 0
+        self.jobs_done = 0
+        self.stopped = False
+        self.worker = threading.Thread(target=self.run, name="bus " + connection.address, daemon=True)
+        self.worker.start()
+
+    def submit(self, caller: Hashable, mtr: Logika4, nt: int, tv: int, func: Callable[[M4Protocol], object],
+               timeout: Optional[float] = None, callback: Optional[Callable[[Future], None]] = None) -> Future:
+        nt = M4Protocol.BROADCAST if nt is None else nt
+        deadline = None if timeout is None else self.clock() + timeout
+
+        with self.m_cond:
+            if self.stopped:
+                raise ECommException(ExcSeverity.Stop, CommError.NotConnected)
+            job = BusJob(caller, mtr, nt, tv, func, deadline, next(self.seq))
+            if callback is not None:
+                job.future.add_done_callback(callback)
+            if caller not in self.queues:
+                self.queues[caller] = deque()
+                self.callers.append(caller)
+            self.queues[caller].append(job)
+            self.m_cond.notify()
+
+        return job.future
+
+    def pending(self) -> int:
+        with self.m_cond:
+            return sum(len(q) for q in self.queues.values())
+
+    @staticmethod
+    def fail(job: BusJob, exc: Exception):
+        if job.future.set_running_or_notify_cancel():
+            job.future.set_exception(exc)
+
+    def expire(self, now: float):
+        for q in self.queues.values():
+            while q and q[0].deadline is not None and q[0].deadline <= now:
+                self.fail(q.popleft(), ECommException(ExcSeverity.Error, CommError.Timeout,
+                                                      "истек срок ожидания в очереди шины"))
+
+    def round_robin(self, accept: Callable[[BusJob], bool]) -> Optional[BusJob]:
+        n = len(self.callers)
+        for i in range(n):
+            caller = self.callers[(self.rr + i) % n]
+            q = self.queues[caller]
+            if q and accept(q[0]):
+                self.rr = (self.rr + i + 1) % n
+                return q.popleft()
+        return None
+
+    def pick(self) -> Optional[BusJob]:
+        now = self.clock()
+        self.expire(now)
+
+        heads = [q[0] for q in self.queues.values() if q]
+        if not heads:
+            return None
+
+        urgent = [j for j in heads if j.deadline is not None and j.deadline - now <= self.urgency]
+        if urgent:
+            job = min(urgent, key=lambda j: (j.deadline, j.seq))
+            self.queues[job.caller].popleft()
+            return job
+
+        if self.current is not None and self.batch_len < self.max_batch:
+            job = self.round_robin(lambda j: j.target == self.current)
+            if job is not None:
+                return job
+
+        return self.round_robin(lambda j: True)
+
+    def next_job(self) -> Optional[BusJob]:
+        with self.m_cond:
+            while True:
+                if self.stopped:
+                    return None
+                job = self.pick()
+                if job is not None:
+                    if not job.future.set_running_or_notify_cancel():
+                        continue
+                    return job
+
+                deadlines = [q[0].deadline for q in self.queues.values() if q and q[0].deadline is not None]
+                self.m_cond.wait(None if not deadlines else max(min(deadlines) - self.clock(), 0))
+
+    def run(self):
+        while True:
+            job = self.next_job()
+            if job is None:
+                return
+
+            if job.target == self.current:
+                self.batch_len += 1
+            else:
+                self.current = job.target
+                self.batch_len = 1
+                self.switches += 1
+
+            try:
+                if self.connection.state != ConnectionState.Connected:
+                    self.connection.open()
+                self.proto.select_device_and_channel(job.mtr, job.nt, job.tv)
+                result = job.func(self.proto)
+
+            except ECommException as e:
+                if e.Severity != ExcSeverity.Error:
+                    self.current = None
+                    self.proto.reset_internal_bus_state()
+                if e.Severity == ExcSeverity.Reset:
+                    self.connection.close()
+                self.connection.log(LogLevel.Warn, f"ошибка задания шины (NT={job.nt}, ТВ={job.tv})", e)
+                job.future.set_exception(e)
+
+            except Exception as e:
+                self.current = None
+                self.proto.reset_internal_bus_state()
+                job.future.set_exception(e)
+
+            else:
+                job.future.set_result(result)
+
+            self.jobs_done += 1
+
+    def close(self):
+        with self.m_cond:
+            self.stopped = True
+            for q in self.queues.values():
+                while q:
+                    self.fail(q.popleft(), ECommException(ExcSeverity.Stop, CommError.NotConnected))
+            self.m_cond.notify_all()
+
+        if self.worker is not threading.current_thread():
+            self.worker.join()
+        self.connection.close()
@@ -0,0 +1,140 @@
+import json
+import os
+from typing import Iterable, List, Optional, Tuple
+
+from Logika.Connections.Connection import PurgeFlags
+from Logika.Connections.NetConnection import NetConnection
+from Logika.ECommException import ECommException, CommError
+from Logika.LogLevel import LogLevel
+from Logika.Meters.Logika4 import Logika4
+from Logika.Protocols.M4.M4Opcode import M4Opcode
+from Logika.Protocols.M4.M4Protocol import M4Protocol, RecvFlags
+
+
+# поиск приборов на шине одного соединения: рукопожатие по каждому NT с коротким таймаутом.
+# через TCP/UDP-шлюз рукопожатия отправляются пачками по interleave штук, ответы разбираются по NT;
+# при искажении ответов (коллизии на шине за шлюзом) поиск продолжается по одному адресу.
+# опрошенные адреса и найденные приборы запоминаются для каждого адреса соединения, прерванный поиск
+# продолжается с места остановки
+class M4Discovery:
+    PROBE_TIMEOUT = 300  # мс, ожидание ответа на рукопожатие
+    INTERLEAVE = 4
+    INTERLEAVE_STEP = 100  # мс, добавка к ожиданию на каждое следующее рукопожатие группы (кадр и ответ на 2400)
+    LAST_NT = 254
+
+    def __init__(self, proto: M4Protocol, cache_path: str = None, probe_timeout: int = PROBE_TIMEOUT,
+                 interleave: int = None, read_model: bool = True):
+        self.proto = proto
+        self.cache_path = cache_path
+        self.probe_timeout = probe_timeout
+        if interleave is None:
+            interleave = self.INTERLEAVE if isinstance(proto.connection, NetConnection) else 1
+        self.interleave = interleave
+        self.read_model = read_model
+        self.cache: dict = {}
+        if cache_path is not None and os.path.exists(cache_path):
+            with open(cache_path, "r", encoding="utf-8") as f:
+                self.cache = json.load(f)
+
+    # результаты поиска для текущего соединения: {"probed": [NT...], "found": {"NT": {"ident": hex, "model": str}}}
+    def endpoint_state(self) -> dict:
+        return self.cache.setdefault(self.proto.connection.address, {"probed": [], "found": {}})
+
+    def forget(self):
+        self.cache.pop(self.proto.connection.address, None)
+
+    # max_silent_run - прекратить поиск после стольких адресов подряд без ответа
+    def scan(self, nts: Iterable[int] = None, max_silent_run: int = None) -> List[Tuple[int, Optional[Logika4], str]]:
+        st = self.endpoint_state()
+        probed = set(st["probed"])
+        todo = [nt for nt in (nts if nts is not None else range(self.LAST_NT + 1)) if nt not in probed]
+
+        proto = self.proto
+        proto.reset_internal_bus_state()
+        if todo:
+            # одно медленное пробуждение всех приборов шины перед серией рукопожатий
+            proto.send_attention(True)
+            proto.wait_wake_idle(True)
+
+        silent = 0
+        i = 0
+        try:
+            while i < len(todo):
+                batch = todo[i:i + self.interleave]
+                replies = self.probe(batch)
+                for nt, ident in replies.items():
+                    st["found"].setdefault(str(nt), {"ident": ident.hex(), "model": None})
+                for nt in batch:
+                    silent = 0 if nt in replies else silent + 1
+                    st["probed"].append(nt)
+                i += len(batch)
+                if max_silent_run is not None and silent >= max_silent_run:
+                    proto.log(LogLevel.Debug, f"поиск остановлен: нет ответа от {silent} адресов подряд")
+                    break
+        finally:
+            proto.reset_internal_bus_state()
+            self.save()
+
+        res = self.results()
+        self.save()
+        return res
+
+    # рукопожатие с группой адресов; ответы - {NT: (id0, id1, ver)}, включая запоздавшие ответы других NT
+    def probe(self, nts: List[int]) -> dict[int, bytes]:
+        proto = self.proto
+        proto.connection.purge_comms(PurgeFlags.RX)
+        for nt in nts:
+            proto.send_legacy_packet(nt, M4Opcode.Handshake, bytes(4))
+
+        deadline = proto.connection.deadline_after(self.probe_timeout + self.INTERLEAVE_STEP * (len(nts) - 1))
+        replies: dict[int, bytes] = {}
+        while not all(nt in replies for nt in nts):
+            try:
+                p = proto.recv_packet(None, M4Opcode.Handshake, None, 3, RecvFlags.DontThrowOnErrorReply, deadline)
+            except ECommException as e:
+                if e.Reason == CommError.Checksum and len(nts) > 1:
+                    proto.log(LogLevel.Warn, "искажение ответов при групповом поиске, поиск по одному адресу")
+                    self.interleave = 1
+                    for nt in nts:
+                        if nt not in replies:
+                            replies.update(self.probe([nt]))
+                    break
+                if e.Reason not in (CommError.Timeout, CommError.Checksum):
+                    raise
+                break
+
+            if p.FunctionCode == M4Opcode.Handshake:
+                replies[p.NT] = bytes(p.Data[:3])
+
+        return replies
+
+    def results(self) -> List[Tuple[int, Optional[Logika4], str]]:
+        found = self.endpoint_state()["found"]
+        res = []
+        for snt in sorted(found, key=int):
+            nt = int(snt)
+            d = found[snt]
+            ident = bytes.fromhex(d["ident"])
+            try:
+                mtr = Logika4.meter_type_from_response(ident[0], ident[1], ident[2])
+            except Exception:
+                self.proto.log(LogLevel.Warn, f"NT {nt}: неподдерживаемый прибор {d['ident']}")
+                res.append((nt, None, ""))
+                continue
+
+            if d["model"] is None and self.read_model:
+                try:
+                    d["model"] = self.proto.get_meter_instance(mtr, nt).model
+                except ECommException as e:
+                    self.proto.log(LogLevel.Warn, f"NT {nt}: не удалось прочитать модель прибора: {e}")
+            res.append((nt, mtr, d["model"] or ""))
+        return res
+
+    def save(self, path: str = None):
+        path = path or self.cache_path
+        if path is None:
+            return
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.cache, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, path)
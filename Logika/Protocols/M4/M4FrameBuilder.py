@@ -0,0 +1,77 @@
+from Logika.Protocols.M4.M4Opcode import M4Opcode
+from Logika.Utils.Checksum import Crc16, Checksum8
+
+
+# сборка исходящих кадров M4 в предварительно выделенный буфер: заголовок, данные и контрольная сумма
+# пишутся на место, кадр возвращается как memoryview без промежуточных копий.
+# представление действительно до следующего вызова legacy()/extended() этого же экземпляра
+class M4FrameBuilder:
+    FRAME_START = 0x10
+    FRAME_END = 0x16
+    EXT_PROTO = 0x90
+    BROADCAST = 0xFF
+    LEGACY_HDR_LEN = 3
+    EXT_HDR_LEN = 8
+    CHECK_LEN = 2
+
+    # неизменяемые кадры - общие для всех экземпляров
+    WAKEUP_SEQUENCE = b"\xFF" * 16
+    handshake_frames: dict[int, bytes] = {}
+
+    def __init__(self, initial_size: int = 0x100):
+        self.buf = bytearray(initial_size)
+        self.view = memoryview(self.buf)
+
+    def ensure_capacity(self, size: int):
+        if size > len(self.buf):
+            # новый буфер, а не расширение старого: ранее выданные представления остаются корректными
+            self.buf = bytearray(max(size, len(self.buf) * 2))
+            self.view = memoryview(self.buf)
+
+    def legacy(self, nt: int, func: M4Opcode, data: bytes) -> memoryview:
+        n = len(data)
+        HDR_LEN = self.LEGACY_HDR_LEN
+        self.ensure_capacity(HDR_LEN + n + self.CHECK_LEN)
+        buf = self.buf
+
+        buf[0] = self.FRAME_START
+        buf[1] = nt if nt is not None else self.BROADCAST
+        buf[2] = func.value
+        buf[HDR_LEN:HDR_LEN + n] = data
+        buf[HDR_LEN + n] = Checksum8.compute(buf, 1, n + 2)
+        buf[HDR_LEN + n + 1] = self.FRAME_END
+
+        return self.view[:HDR_LEN + n + self.CHECK_LEN]
+
+    def extended(self, nt: int, packet_id: int, opcode: M4Opcode, data: bytes) -> memoryview:
+        n = len(data)
+        HDR_LEN = self.EXT_HDR_LEN
+        self.ensure_capacity(HDR_LEN + n + self.CHECK_LEN)
+        buf = self.buf
+
+        buf[0] = self.FRAME_START
+        buf[1] = nt if nt is not None else self.BROADCAST
+        buf[2] = self.EXT_PROTO
+        buf[3] = packet_id & 0xFF
+        buf[4] = 0x00
+        payload_len = 1 + n
+        buf[5] = payload_len & 0xFF
+        buf[6] = payload_len >> 8
+        buf[7] = opcode.value
+        buf[HDR_LEN:HDR_LEN + n] = data
+
+        check = Crc16.fold(0, self.view[1:HDR_LEN + n])
+        buf[HDR_LEN + n] = check >> 8
+        buf[HDR_LEN + n + 1] = check & 0xFF
+
+        return self.view[:HDR_LEN + n + self.CHECK_LEN]
+
+    # кадр рукопожатия (opcode Handshake, нулевые аргументы) - используется при поиске приборов
+    @staticmethod
+    def handshake(nt: int) -> bytes:
+        nt = nt if nt else M4FrameBuilder.BROADCAST
+        frame = M4FrameBuilder.handshake_frames.get(nt)
+        if frame is None:
+            frame = bytes(M4FrameBuilder().legacy(nt, M4Opcode.Handshake, bytes(4)))
+            M4FrameBuilder.handshake_frames[nt] = frame
+        return frame
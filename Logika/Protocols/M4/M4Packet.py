@@ -1,8 +1,12 @@
+from Logika.Protocols.M4.M4FrameBuilder import M4FrameBuilder
 from Logika.Protocols.M4.M4Opcode import M4Opcode
-from Logika.Protocols.M4.M4Protocol import M4Protocol
 
 
+# принятый пакет M4. Data - представление (memoryview) данных в приемном буфере соединения, действительное
+# до следующего приема; пакет, который нужен после следующего приема, отделяется от буфера вызовом detach()
 class M4Packet:
+    __slots__ = ("NT", "Extended", "ID", "Attributes", "FunctionCode", "Data", "Check")
+
     def __init__(self):
         self.NT = 0xFF
         self.Extended: bool = False
@@ -12,11 +16,17 @@ class M4Packet:
         self.Data = bytearray()
         self.Check = 0
 
+    # копирует данные пакета из приемного буфера; возвращает этот же пакет
+    def detach(self) -> 'M4Packet':
+        if isinstance(self.Data, memoryview):
+            self.Data = bytearray(self.Data)
+        return self
+
     def get_dump(self):
-        lb = [M4Protocol.FRAME_START, self.NT]
+        lb = [M4FrameBuilder.FRAME_START, self.NT]
 
         if self.Extended:
-            lb.append(M4Protocol.EXT_PROTO)
+            lb.append(M4FrameBuilder.EXT_PROTO)
             lb.append(self.ID)
             lb.append(self.Attributes)
             payloadLen = 1 + len(self.Data)
@@ -31,6 +41,6 @@ class M4Packet:
             lb.append(self.Check & 0xFF)
         else:
             lb.append(self.Check & 0xFF)
-            lb.append(M4Protocol.FRAME_END)
+            lb.append(M4FrameBuilder.FRAME_END)
 
         return bytes(lb)
@@ -1,5 +1,6 @@
+import os
 import time
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timedelta
 from enum import Enum, IntEnum
 from typing import List
 
@@ -20,15 +21,27 @@ from Logika.Meters.Types import TagKind, ImportantTag, ArchiveType
 from Logika.Meters.__4L.Logika4L import Logika4L, BinaryType
 from Logika.Meters.__4L.SPG741 import TSPG741
 from Logika.Meters.__4M.Logika4M import Logika4M, OperParamFlag
+from Logika.Protocols.M4.BaudRatePolicy import BaudRatePolicy
 from Logika.Protocols.M4.ErrorCode import ErrorCode
 from Logika.Protocols.M4.FlashArchive4L import AsyncFlashArchive4, Logika4LArchiveRequestState, SyncFlashArchive4, \
     Logika4LTVReadState
+from Logika.Protocols.M4.FlashPagePolicy import FlashPagePolicy
+from Logika.Protocols.M4.FlashPageStore import FlashPageStore
+from Logika.Protocols.M4.FlashReadPlanner import FlashReadPlanner
+from Logika.Protocols.M4.KeepaliveScheduler import KeepaliveScheduler
 from Logika.Protocols.M4.M4ArchiveId import M4ArchiveId
 from Logika.Protocols.M4.M4ArchiveRecord import M4ArchiveRecord
+from Logika.Protocols.M4.M4FrameBuilder import M4FrameBuilder
 from Logika.Protocols.M4.M4Opcode import M4Opcode
 from Logika.Protocols.M4.M4Packet import M4Packet
+from Logika.Protocols.M4.ReadPlan import ReadPlan
+from Logika.Protocols.M4.RequestSizer import RequestSizer, MeterSizing, SizeController
+from Logika.Protocols.M4.TagValueCache import TagValueCache
 from Logika.Protocols.M4.TagWriteData import TagWriteData
+from Logika.Protocols.M4.WakeStrategy import WakeStrategy, WakeMode
 from Logika.Protocols.Protocol import Protocol, ProtoEvent
+from Logika.Utils.Checksum import Crc16
+from Logika.Utils.PageBitmap import PageBitmap
 
 
 class MeterInstance:
@@ -37,25 +50,32 @@ class MeterInstance:
         self.eus = None
         self.proto = owner
         self.mtr = m
+        self.page_policy: FlashPagePolicy | None = None
         if isinstance(m, Logika4L):
             lastTotalAddr = max(
-                (t.address + (t.channelOffset or 0) + Logika4L.SizeOf(t.internalType) for t in m.tags.all if
+                (t.address + (t.channelOffset or 0) + Logika4L.size_of(t.internalType) for t in m.tags.all if
                  t.Kind == TagKind.TotalCtr), default=0)
             paramsFlashSize = lastTotalAddr + Logika4L.FLASH_PAGE_SIZE - 1  # запас для хвостов
             self.flash = bytearray(paramsFlashSize)
-            self.pageMap = [False] * (len(self.flash) // Logika4L.FLASH_PAGE_SIZE)
+            self.pageMap = PageBitmap(len(self.flash) // Logika4L.FLASH_PAGE_SIZE)
+            self.page_policy = FlashPagePolicy(len(self.pageMap))
+            self.page_policy.classify(m.tags.all, Logika4L.FLASH_PAGE_SIZE)
         self.vipTags = m.get_well_known_tags()
         self.nt = nt
+        self.tag_cache = TagValueCache()
+        self._model = None
+        self.page_store: FlashPageStore | None = None
+        self.page_store_ready = False
 
     @property
     def model(self):
-        if self.model is None:
+        if self._model is None:
             if ImportantTag.Model in self.vipTags:
                 self.proto.update_tags_impl(self.nt, self.vipTags[ImportantTag.Model], updTagsFlags.DontGetEUs)
-                self.model = str(self.vipTags[ImportantTag.Model][0].Value)
+                self._model = str(self.vipTags[ImportantTag.Model][0].Value)
             else:
-                self.model = ""
-        return self.model
+                self._model = ""
+        return self._model
 
     @property
     def rd(self):
@@ -91,7 +111,7 @@ class MeterInstance:
             if tTime is None or tDate is None:
                 return datetime.min
             dta = [DataTag(tDate, 0), DataTag(tTime, 0)]
-            self.proto.update_tags_impl(self.nt, dta, updTagsFlags.DontGetEUs)
+            self.proto.update_tags_impl(self.nt, dta, updTagsFlags.DontGetEUs, True)
             devTime = Logika4.combine_date_time(str(dta[0].Value), str(dta[1].Value))
             self.timeDiff = datetime.now() - devTime
         return datetime.now() - self.timeDiff
@@ -106,7 +126,7 @@ class MeterInstance:
 
     @model.setter
     def model(self, value):
-        self.model = value
+        self._model = value
 
 
 class M4_MeterChannel(Enum):
@@ -131,6 +151,8 @@ class Logika4MArchiveRequestState:
 
 class RecvFlags(IntEnum):
     DontThrowOnErrorReply = 0x01,
+    # таймаут не требует повторного рукопожатия: запрос повторяет вызывающий
+    CallerRetries = 0x02,
 
 
 class CompressionType(IntEnum):
@@ -143,10 +165,15 @@ class _busActivePtr:
             raise ValueError()
         self.meter = mtr
         self.nt = nt
-        self.tv = tv
+        self.tv = self.channel_no(tv)
         self.lastIOTime = None
         self.ioError = False
 
+    # номер канала (ТВ): M4_MeterChannel и int приводятся к int, чтобы выбранный канал сравнивался однозначно
+    @staticmethod
+    def channel_no(tv) -> int:
+        return tv.value if isinstance(tv, M4_MeterChannel) else int(tv)
+
     @property
     def tsFromLastIO(self) -> datetime | None:
         if self.lastIOTime is not None:
@@ -163,19 +190,22 @@ class M4Protocol(Protocol):
     MAX_TAGS_AT_ONCE = 24
     PARTITION_CURRENT = 0xFFFF
     ALT_SPEED_FALLBACK_TIME = 10000
-    WAKEUP_SEQUENCE: bytearray = bytearray(
-        [0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF,
-         0xFF,
-         0xFF])
-    WAKE_SESSION_DELAY: int = 100
+    WAKEUP_SEQUENCE: bytes = M4FrameBuilder.WAKEUP_SEQUENCE
+    WAKE_SESSION_DELAY: int = 100  # мс, наибольшее ожидание тишины в линии после пробуждения
+    WAKE_IDLE_TIME: float = 0.02
 
     MAX_PAGE_BLOCK = 8
+    FLASH_STORE_MAX_AGE = 7 * 24 * 3600.0  # с, наибольший возраст страницы постоянного кэша
+    PIPELINE_WINDOW = 1
+    PIPELINE_MAX_RETRIES = 2
 
     def __init__(self, targetBaudrate=BaudRate.Undefined):
         super().__init__()
         self.activeDev = None
-        self.initialBaudRate = None
+        self.initialBaudRate = BaudRate.Undefined
         self.suggestedBaudrate = targetBaudrate
+        # переход на повышенную скорость - только если она задана явно
+        self.baud_policy = BaudRatePolicy(targetBaudrate) if targetBaudrate != BaudRate.Undefined else None
         self.metadataCache = None
         self.CHANNEL_NBASE = 10000
         self.id_ctr: int = 0
@@ -183,6 +213,19 @@ class M4Protocol(Protocol):
         self.op_flags: List[bool] = []
         self.state = None
         self.progress = None
+        self.rx_hdr: bytearray = bytearray(8)
+        self.rx_check: bytearray = bytearray(2)
+        self.pipeline_windows: dict = {}
+        self.rx_fold: int = 1
+        self.rx_sum: int = 0
+        self.rx_calc_check: int = 0
+        self.frames = M4FrameBuilder()
+        self.read_plans: dict = {}
+        self.request_sizer = RequestSizer()
+        self.wake_strategy = WakeStrategy()
+        self.flash_store_dir: str | None = None  # каталог постоянного кэша страниц flash приборов 4L
+        self.keepalive: KeepaliveScheduler | None = None  # поддержание сеансов между опросами, см. keepalive_tick
+        self.pipeline_current: dict = {}
 
     def reset_internal_bus_state(self):
         self.activeDev = None
@@ -190,36 +233,39 @@ class M4Protocol(Protocol):
         self.log(LogLevel.Trace, "M4 bus state is reset")
 
     def send_attention(self, slow_wake: bool):
-        self.connection.PurgeComms(PurgeFlags.RX | PurgeFlags.TX)
+        self.connection.purge_comms(PurgeFlags.RX | PurgeFlags.TX)
         if slow_wake:
-            for byte in self.WAKEUP_SEQUENCE:
-                self.connection.write([byte])
+            for i in range(len(self.WAKEUP_SEQUENCE)):
+                self.connection.write(self.WAKEUP_SEQUENCE, i, 1)
                 time.sleep(0.02)
         else:
-            self.connection.write(self.WAKEUP_SEQUENCE)
+            self.connection.write(self.WAKEUP_SEQUENCE, 0, len(self.WAKEUP_SEQUENCE))
 
     def internal_close_comm_session(self, not_used: bytes, nt: bytes):
-        self.do_legacy_request(nt, M4Opcode.SessionClose, bytearray(4),0, RecvFlags.DontThrowOnErrorReply)
-        # в зависимости от ответа bsu поправить также и старый пролог
+        try:
+            self.do_legacy_request(nt, M4Opcode.SessionClose, bytearray(4),0, RecvFlags.DontThrowOnErrorReply)
+            # в зависимости от ответа bsu поправить также и старый пролог
+        finally:
+            # по закрытию сеанса прибор возвращается на начальную скорость
+            self.reset_internal_bus_state()
+            self.close_page_store(nt)
+            self.save_request_sizes()
+
+    def save_request_sizes(self):
+        try:
+            self.request_sizer.save()
+        except OSError as e:
+            self.log(LogLevel.Warn, f"размеры запросов не сохранены: {e}")
 
     @staticmethod
     def gen_raw_handshake(dest_nt: bytes):
-        hsArgs = [0, 0, 0, 0]
-        pBuf: bytearray = bytearray()
-        pBuf[0] = M4Protocol.FRAME_START
-        pBuf[1] = dest_nt if dest_nt else M4Protocol.BROADCAST
-        pBuf[2] = M4Opcode.Handshake.value
-
-        pBuf[3 + len(hsArgs)] = Logika4.checksum8(pBuf, 1, len(hsArgs) + 2)
-        pBuf[3 + len(hsArgs) + 1] = M4Protocol.FRAME_END
-
-        return pBuf
+        return M4FrameBuilder.handshake(dest_nt)
 
     def serial_conn_speed_fallback(self):
         sc = self.connection
         if isinstance(sc, SerialConnection) and self.initialBaudRate != BaudRate.Undefined:
-            if sc.BaudRate != self.initialBaudRate:
-                sc.BaudRate = self.initialBaudRate
+            if sc.baud_rate != self.initialBaudRate:
+                sc.baud_rate = self.initialBaudRate
                 self.log(LogLevel.Debug, f"восстановлена начальная скорость обмена {int(self.initialBaudRate)} bps")
 
     def select_device_and_channel(self, mtr: Logika4, z_nt: bytes, tv: int = M4_MeterChannel.SYS):
@@ -227,39 +273,103 @@ class M4Protocol(Protocol):
             raise ValueError()
 
         nt = z_nt if z_nt else self.BROADCAST
+        tv = _busActivePtr.channel_no(tv)
 
-        if self.activeDev and self.activeDev.tsFromLastIO > self.activeDev.get_meter.SessionTimeout:
+        if self.activeDev and self.activeDev.tsFromLastIO is not None and \
+                self.activeDev.tsFromLastIO > self.activeDev.meter.session_timeout:
             self.reset_internal_bus_state()
 
         if isinstance(self.connection, SerialConnection):
             if self.suggestedBaudrate != BaudRate.Undefined and self.initialBaudRate == BaudRate.Undefined:
-                self.initialBaudRate = BaudRate
+                self.initialBaudRate = self.connection.baud_rate
 
-            if self.activeDev and self.activeDev.tsFromLastIO.total_seconds() >= self.ALT_SPEED_FALLBACK_TIME:
+            if self.activeDev and self.activeDev.tsFromLastIO.total_seconds() * 1000 >= self.ALT_SPEED_FALLBACK_TIME:
+                upgraded = self.connection.baud_rate != self.initialBaudRate
                 self.serial_conn_speed_fallback()
+                # прибор сам вернулся на начальную скорость - нужны повторные рукопожатие и переход
+                if upgraded and self.baud_policy is not None:
+                    self.activeDev = None
+
+        if self.keepalive is not None:
+            self.keepalive.on_poll(nt)
 
         reselectRequired = (not self.activeDev or self.activeDev.nt != nt or self.activeDev.tv != tv or
                             self.activeDev.ioError)
 
         if reselectRequired:
+            ioError = self.activeDev is not None and self.activeDev.ioError
             if self.activeDev:
                 self.activeDev.ioError = False
 
-            alreadyAwake = self.activeDev and self.activeDev.nt == nt
-            slowFFs = not mtr.supports_fast_session_init and not alreadyAwake
-            hsPkt = self.handshake(nt, bytearray(tv), slowFFs)
+            # прибор в сеансе (устаревший activeDev сброшен выше) - пробуждение не требуется
+            alreadyAwake = self.activeDev is not None and self.activeDev.nt == nt and not ioError
+            hsPkt = self.establish_session(mtr, nt, tv, alreadyAwake)
 
-            detectedType = Logika4.MeterTypeFromResponse(hsPkt.Data[0], hsPkt.Data[1], hsPkt.Data[2])
+            detectedType = Logika4.meter_type_from_response(hsPkt.Data[0], hsPkt.Data[1], hsPkt.Data[2])
             if detectedType != mtr:
                 self.reset_internal_bus_state()
                 raise ECommException(ExcSeverity.Stop, CommError.Unspecified,
-                                     f"Несоответствие типа прибора. Ожидаемый тип прибора: {mtr.Caption}, фактический: {detectedType.Caption} (NT={nt})")
+                                     f"Несоответствие типа прибора. Ожидаемый тип прибора: {mtr.caption}, фактический: {detectedType.caption} (NT={nt})")
 
             self.activeDev = _busActivePtr(mtr, nt, tv)
             self.activeDev.lastIOTime = datetime.now()
 
+            if self.baud_policy is not None and isinstance(self.connection, SerialConnection) and \
+                    self.connection.can_change_baudrate and mtr.supports_baud_rate_change_requests:
+                self.upgrade_bus_speed(mtr, nt, tv)
+
+    # переход на наибольшую скорость обмена, поддерживаемую прибором и не выше suggestedBaudrate.
+    # при неудаче прибор и порт остаются (возвращаются) на начальной скорости
+    def upgrade_bus_speed(self, mtr: Logika4, nt: bytes, tv: int = M4_MeterChannel.SYS) -> bool:
+        sc = self.connection
+        key = (sc.address, nt, str(mtr))
+        for br in self.baud_policy.candidates(key, sc.baud_rate, mtr.max_baud_rate):
+            try:
+                ok = self.set_bus_speed(mtr, nt, br, tv)
+            except ECommException:
+                self.baud_policy.report(key, br, False)
+                self.serial_conn_speed_fallback()
+                raise
+            self.baud_policy.report(key, br, ok)
+            if ok:
+                return True
+            self.serial_conn_speed_fallback()
+        return False
+
+    # поддержание сеанса с активным прибором - вызывается периодически между опросами, из потока опроса.
+    # True - отправлен запрос поддержания
+    def keepalive_tick(self) -> bool:
+        ad = self.activeDev
+        if self.keepalive is None or ad is None or ad.ioError or ad.tsFromLastIO is None:
+            return False
+
+        idle = ad.tsFromLastIO.total_seconds()
+        baud_rate = BaudRate.b2400
+        if isinstance(self.connection, SerialConnection):
+            baud_rate = self.connection.baud_rate
+            # прибор уже вернулся на начальную скорость, сеанс будет открыт заново при следующем опросе
+            if self.initialBaudRate != BaudRate.Undefined and baud_rate != self.initialBaudRate and \
+                    idle * 1000 >= self.ALT_SPEED_FALLBACK_TIME:
+                return False
+
+        if not self.keepalive.due(ad.nt, ad.meter.session_timeout, idle, int(baud_rate),
+                                  not ad.meter.supports_fast_session_init):
+            return False
+
+        channel = ad.tv.value if isinstance(ad.tv, M4_MeterChannel) else ad.tv
+        try:
+            self.handshake(ad.nt, channel, False, WakeMode.Skip)
+        except ECommException as e:
+            self.keepalive.report(ad.nt, False)
+            ad.ioError = True
+            self.log(LogLevel.Debug, f"нет ответа на запрос поддержания сеанса (NT={ad.nt}): {e}")
+            return False
+
+        self.keepalive.report(ad.nt, True)
+        return True
+
     def get_meter_type(self, src_nt: bytes, dst_nt: bytes):
-        hsPkt = self.handshake(dst_nt, bytearray(0), False)
+        hsPkt = self.handshake(dst_nt, 0, False)
         self.extra_data = hsPkt.Data[2]
 
         return Logika4.meter_type_from_response(hsPkt.Data[0], hsPkt.Data[1], hsPkt.Data[2])
@@ -267,6 +377,8 @@ class M4Protocol(Protocol):
     def get_meter_instance(self, m, nt):
         _nt = nt if nt is not None else 0xFF
 
+        if self.metadataCache is None:
+            self.metadataCache = {}
         if _nt not in self.metadataCache:
             mi = MeterInstance(self, m, _nt)
             self.metadataCache[_nt] = mi
@@ -275,111 +387,388 @@ class M4Protocol(Protocol):
 
         return mi
 
-    def handshake(self, nt: bytes, channel: bytearray, bSlowFFs: bool):
+    # wake - способ пробуждения, None - по bSlowFFs
+    def handshake(self, nt: bytes, channel: int, bSlowFFs: bool, wake: WakeMode = None):
         if self.activeDev and nt != self.activeDev.nt:
             self.reset_internal_bus_state()
 
-        self.send_attention(bSlowFFs)
-        time.sleep(0.1)
+        if wake is None:
+            wake = WakeMode.Slow if bSlowFFs else WakeMode.Fast
+        if wake != WakeMode.Skip:
+            self.send_attention(wake == WakeMode.Slow)
+            self.wait_wake_idle(wake == WakeMode.Slow)
         self.connection.purge_comms(PurgeFlags.RX)
 
         req_data = bytearray([channel, 0, 0, 0])
         return self.do_legacy_request(nt, M4Opcode.Handshake, req_data, 3)
 
-    def do_legacy_request(self, nt: bytes, req_func: M4Opcode, data: bytearray, expected_data_len: int, flags: RecvFlags=0):
+    # вместо фиксированной паузы после пробуждения - до тишины в линии (эхо и ответы на FF отбрасываются).
+    # write() возвращает управление, пока быстрая серия FF еще передается: тишина и предельное время
+    # ожидания отсчитываются от конца передачи. медленные FF уже переданы - после каждого send_attention ждет
+    def wait_wake_idle(self, slow_wake: bool):
+        quiet = self.WAKE_IDLE_TIME
+        tx_end = None
+        if isinstance(self.connection, SerialConnection):
+            quiet = max(quiet, self.connection.frame_gap)
+            if not slow_wake:
+                tx_end = time.monotonic() + self.connection.tx_time(len(self.WAKEUP_SEQUENCE))
+        self.connection.wait_rx_idle(quiet, self.WAKE_SESSION_DELAY / 1000, tx_end)
+
+    # рукопожатие со способом пробуждения, выбранным по опыту предыдущих сеансов с этим прибором;
+    # при неудаче - повтор с более надежным способом
+    def establish_session(self, mtr: Logika4, nt: bytes, channel: int, already_awake: bool):
+        key = (self.connection.address if self.connection is not None else "", nt, str(mtr))
+        prefer_fast = mtr.supports_fast_session_init
+        wake = self.wake_strategy.choose(key, already_awake, prefer_fast)
+        while True:
+            try:
+                hsPkt = self.handshake(nt, channel, False, wake)
+            except ECommException as e:
+                self.wake_strategy.report(key, wake, False)
+                wake = self.wake_strategy.fallback(key, wake, prefer_fast)
+                if wake is None or e.Reason not in (CommError.Timeout, CommError.Checksum):
+                    raise
+                self.log(LogLevel.Debug, f"нет ответа на рукопожатие, повтор с пробуждением {wake.name}")
+                continue
+
+            self.wake_strategy.report(key, wake, True)
+            return hsPkt
+
+    # deadline - крайний срок (time.monotonic) на весь запрос, None - read_timeout с момента отправки
+    def do_legacy_request(self, nt: bytes, req_func: M4Opcode, data: bytearray, expected_data_len: int, flags: RecvFlags=0,
+                          deadline: float = None):
         self.send_legacy_packet(nt, req_func, data)
-        return self.recv_packet(nt, req_func, bytearray(), expected_data_len, flags)
+        return self.recv_packet(nt, req_func, None, expected_data_len, flags, deadline)
 
-    def do_m4_request(self, nt: bytes, req_func: M4Opcode, data: bytearray, pktId: bytes=None, flags: RecvFlags=0):
+    def do_m4_request(self, nt: bytes, req_func: M4Opcode, data: bytearray, pktId: int=None, flags: RecvFlags=0,
+                      deadline: float = None):
         if pktId is None:
-            pktId = self.id_ctr
-            self.id_ctr += 1
+            pktId = self.next_packet_id()
         self.send_extended_packet(nt, pktId, req_func, data)
-        p = self.recv_packet(nt, req_func, bytearray(pktId), 0, flags)
+        p = self.recv_packet(nt, req_func, pktId, 0, flags, deadline)
         return p
 
-    def recv_packet(self, expected_nt: bytes, expected_opcode: M4Opcode, expected_id: bytearray, expectedDataLength: int,
-                    flags: RecvFlags=0):
-        buf = bytearray(8)
-        check = bytearray(2)
-        p = M4Packet()
+    async def do_legacy_request_async(self, nt: bytes, req_func: M4Opcode, data: bytearray, expected_data_len: int,
+                                      flags: RecvFlags=0, deadline: float = None):
+        await self.send_legacy_packet_async(nt, req_func, data)
+        return await self.recv_packet_async(nt, req_func, None, expected_data_len, flags, deadline)
+
+    async def do_m4_request_async(self, nt: bytes, req_func: M4Opcode, data: bytearray, pktId: int=None,
+                                  flags: RecvFlags=0, deadline: float = None):
+        if pktId is None:
+            pktId = self.next_packet_id()
+        await self.send_extended_packet_async(nt, pktId, req_func, data)
+        return await self.recv_packet_async(nt, req_func, pktId, 0, flags, deadline)
+
+    # размеры запросов для текущего канала связи и типа прибора
+    def sizing(self, mtr: Logika4) -> MeterSizing:
+        # выученные размеры хранятся рядом с кэшем страниц flash
+        if self.flash_store_dir is not None and self.request_sizer.path is None:
+            self.request_sizer.load(os.path.join(self.flash_store_dir, RequestSizer.FILE_NAME))
+        link = self.connection.address if self.connection is not None else ""
+        return self.request_sizer.get(link, mtr)
+
+    # отказ, связанный с размером запроса: таймаут, ошибка CRC или отказ прибора принять запрос
+    @staticmethod
+    def size_failure(ctl: SizeController, e: ECommException):
+        if e.Reason in (CommError.Timeout, CommError.Checksum, CommError.ErrorReply):
+            ctl.on_failure()
+
+    def next_packet_id(self) -> int:
+        pktId = self.id_ctr & 0xFF
+        self.id_ctr += 1
+        return pktId
+
+    def set_pipeline_window(self, mtr: Logika4M, window: int):
+        self.pipeline_windows[mtr] = max(1, window)
+        self.pipeline_current[mtr] = max(1, window)
+
+    # текущее окно конвейера для типа прибора: после ошибок уменьшается вдвое,
+    # после серии без ошибок восстанавливается на единицу до настроенного значения
+    def pipeline_window(self, mtr: Logika4M) -> int:
+        return self.pipeline_current.get(mtr, self.pipeline_windows.get(mtr, self.PIPELINE_WINDOW))
+
+    def adjust_pipeline_window(self, mtr: Logika4M, had_errors: bool):
+        current = self.pipeline_window(mtr)
+        if had_errors:
+            self.pipeline_current[mtr] = max(1, current // 2)
+            if current > 1:
+                self.log(LogLevel.Debug, f"окно конвейера M4 уменьшено до {self.pipeline_current[mtr]}")
+        else:
+            self.pipeline_current[mtr] = min(current + 1, self.pipeline_windows.get(mtr, self.PIPELINE_WINDOW))
+
+    # конвейерное выполнение независимых запросов одного типа (ReadTags / ReadArchive): в обмене одновременно
+    # находится до pipeline_window(mtr) запросов, ответы сопоставляются по ID пакета.
+    # при таймауте повторно отправляются только запросы, ответ на которые не получен за read_timeout,
+    # при ошибке CRC - запрос с ID из заголовка испорченного кадра. сеанс сбрасывается (повторное рукопожатие),
+    # только когда исчерпаны повторы запроса или общий крайний срок
+    def do_m4_requests(self, mtr: Logika4M, nt: bytes, req_func: M4Opcode, requests: List[bytearray],
+                       flags: RecvFlags=0, deadline: float = None) -> List[M4Packet]:
+        window = self.pipeline_window(mtr)
+        results: List[M4Packet | None] = [None] * len(requests)
+        inflight: dict[int, list] = {}  # ID пакета -> [номер запроса, число повторов, крайний срок ответа]
+        nxt = 0
+        done = 0
+        had_errors = False
+
         try:
-            while True:
-                readStartTime = time.time()
-                while True:
-                    self.connection.read(buf, 0, 1)
-                    if buf[0] == M4Protocol.FRAME_START:
-                        break
-
-                    elapsed = time.time() - readStartTime
-                    if elapsed > self.connection.read_timeout:
-                        self.on_recoverable_error()
-                        raise ECommException(ExcSeverity.Error, CommError.Timeout)
+            while done < len(requests):
+                while nxt < len(requests) and len(inflight) < window:
+                    pktId = self.next_packet_id()
+                    self.send_extended_packet(nt, pktId, req_func, requests[nxt])
+                    inflight[pktId] = [nxt, 0, self.connection.deadline_after(self.connection.read_timeout)]
+                    nxt += 1
 
-                self.connection.read(buf, 1, 2)
-                p.NT = buf[1]
-                p.FunctionCode = M4Opcode(buf[2])
+                wait_until = min(v[2] for v in inflight.values())
+                if deadline is not None:
+                    wait_until = min(wait_until, deadline)
 
-                if expected_nt and p.NT != expected_nt:
-                    continue
+                try:
+                    p = self.recv_packet(nt, req_func, None, 0, flags | RecvFlags.CallerRetries, wait_until)
 
-                if (expected_opcode and
-                        p.FunctionCode != expected_opcode and
-                        p.FunctionCode != M4Opcode.Error and
-                        p.FunctionCode != M4Protocol.EXT_PROTO):
-                    if expected_opcode == M4Opcode.ReadFlash:
+                except ECommException as e:
+                    if e.Reason not in (CommError.Timeout, CommError.Checksum):
+                        raise
+                    if deadline is not None and time.monotonic() >= deadline:
                         self.on_recoverable_error()
-                        raise ECommException(ExcSeverity.Error, CommError.Unspecified,
-                                             "нарушение последовательности обмена")
+                        raise
+                    had_errors = True
+                    window = max(1, window // 2)
+                    if e.Reason == CommError.Checksum:
+                        # ID - из заголовка испорченного кадра; если испорчен и он - повторяется самый ранний запрос
+                        bad_id = self.rx_hdr[3]
+                        if bad_id not in inflight:
+                            bad_id = min(inflight, key=lambda k: inflight[k][0])
+                        retry = [bad_id]
+                    else:
+                        now = time.monotonic()
+                        retry = [pktId for pktId, v in inflight.items() if v[2] <= now]
+                    for pktId in retry:
+                        v = inflight[pktId]
+                        if v[1] >= self.PIPELINE_MAX_RETRIES:
+                            self.on_recoverable_error()
+                            raise
+                        v[1] += 1
+                        v[2] = self.connection.deadline_after(self.connection.read_timeout)
+                        self.log(LogLevel.Debug, f"повтор запроса M4 ID 0x{pktId:02X} ({e.Reason.value})")
+                        self.send_extended_packet(nt, pktId, req_func, requests[v[0]])
                     continue
 
-                if p.FunctionCode == M4Protocol.EXT_PROTO:
-                    p.Extended = True
-                    self.connection.read(buf, 3, 5)
-                    p.ID = buf[3]
-                    p.Attributes = buf[4]
-                    payload_len = buf[5] + (buf[6] << 8)
-                    p.Data = [0] * (payload_len - 1)
-                    p.FunctionCode = M4Opcode(buf[7])
-                    if expected_opcode and p.FunctionCode != expected_opcode and p.FunctionCode != M4Opcode.Error:
-                        continue
-
-                    if expected_id and p.ID != expected_id:
-                        self.log(LogLevel.Warn,
-                                 f"нарушение порядка обмена: ожидаемый ID пакета: 0x{expected_id:X2}, принятый: 0x{p.ID:X2}")
+                v = inflight.pop(p.ID, None)
+                if v is None:
+                    continue  # запоздавший ответ на уже повторенный и полученный запрос
+                results[v[0]] = p.detach()  # следующий прием перезапишет приемный буфер
+                done += 1
 
-                else:
-                    p.Extended = False
-                    if p.FunctionCode == M4Opcode.Error:
-                        p.Data = bytearray(1)
-                    else:
-                        p.Data = bytearray(expectedDataLength)
+        finally:
+            self.adjust_pipeline_window(mtr, had_errors)
 
-                self.connection.read(p.Data, 0, len(p.Data))
-                self.connection.read(check, 0, 2)
-                if p.Extended:
-                    p.Check = (check[0] << 8) | check[1]
-                else:
-                    p.Check = check[0] | (check[1] << 8)
+        return results
+
+    def recv_packet(self, expected_nt: bytes, expected_opcode: M4Opcode, expected_id: int | None, expectedDataLength: int,
+                    flags: RecvFlags=0, deadline: float = None):
+        if deadline is None:
+            deadline = self.connection.deadline_after(self.connection.read_timeout)
+        self.reset_rx_check()
+        try:
+            while True:
+                p = self.parse_buffered_packet(expected_nt, expected_opcode, expected_id, expectedDataLength)
+                if p is not None:
+                    break
 
-                if self.activeDev:
-                    self.activeDev.lastIOTime = datetime.now()
+                if time.monotonic() >= deadline:
+                    raise ECommException(ExcSeverity.Error, CommError.Timeout)
 
-                break
+                # начало кадра принято, но линия уже замолчала - продолжения не будет
+                if self.connection.rx_buffered > 0 and self.connection.rx_frame_ended():
+                    raise ECommException(ExcSeverity.Error, CommError.Timeout, "ответ прибора оборван")
+
+                self.connection.fill(deadline)
+
+        except Exception as e:
+            if not (flags & RecvFlags.CallerRetries and isinstance(e, ECommException) and e.Reason == CommError.Timeout):
+                self.on_recoverable_error()
+            self.connection.end_exchange(expected_opcode.name, 0, False)
+            raise
+
+        if self.activeDev:
+            self.activeDev.lastIOTime = datetime.now()
+
+        return self.complete_exchange(expected_opcode, p, flags)
+
+    async def recv_packet_async(self, expected_nt: bytes, expected_opcode: M4Opcode, expected_id: int | None,
+                                expectedDataLength: int, flags: RecvFlags=0, deadline: float = None):
+        if deadline is None:
+            deadline = self.connection.deadline_after(self.connection.read_timeout)
+        self.reset_rx_check()
+        try:
+            while True:
+                p = self.parse_buffered_packet(expected_nt, expected_opcode, expected_id, expectedDataLength)
+                if p is not None:
+                    break
+
+                if time.monotonic() >= deadline:
+                    raise ECommException(ExcSeverity.Error, CommError.Timeout)
+
+                # начало кадра принято, но линия уже замолчала - продолжения не будет
+                if self.connection.rx_buffered > 0 and self.connection.rx_frame_ended():
+                    raise ECommException(ExcSeverity.Error, CommError.Timeout, "ответ прибора оборван")
+
+                await self.connection.fill_async(deadline)
+
+        except Exception as e:
+            if not (flags & RecvFlags.CallerRetries and isinstance(e, ECommException) and e.Reason == CommError.Timeout):
+                self.on_recoverable_error()
+            self.connection.end_exchange(expected_opcode.name, 0, False)
+            raise
 
+        if self.activeDev:
+            self.activeDev.lastIOTime = datetime.now()
+
+        return self.complete_exchange(expected_opcode, p, flags)
+
+    def complete_exchange(self, expected_opcode: M4Opcode, p: M4Packet, flags: RecvFlags) -> M4Packet:
+        try:
+            p = self.check_received_packet(p, self.rx_calc_check, flags)
         except Exception:
-            self.on_recoverable_error()
+            self.connection.end_exchange(expected_opcode.name, 0, False)
             raise
 
-        calculatedCheck = 0
+        hdr_len = 8 if p.Extended else 3
+        self.connection.end_exchange(expected_opcode.name, hdr_len + len(p.Data) + 2)
+        return p
+
+    # разбор кадра из приемного буфера соединения; None - кадр еще не принят целиком
+    def parse_buffered_packet(self, expected_nt: bytes, expected_opcode: M4Opcode, expected_id: int | None,
+                              expectedDataLength: int) -> M4Packet | None:
+        rx = self.connection.rx_buf
+        hdr = self.rx_hdr
+        self.connection.rx_frame_len_known = False
+        while True:
+            i = rx.find(M4Protocol.FRAME_START)
+            if i < 0:
+                rx.clear()
+                self.reset_rx_check()
+                return None
+            if i > 0:
+                rx.clear(i)
+                self.reset_rx_check()
+
+            if rx.length < 3:
+                return None
+            rx.peek(hdr, 0, 3)
+
+            p = M4Packet()
+            if not self.accept_packet_header(p, hdr, expected_nt, expected_opcode):
+                rx.clear(1)
+                self.reset_rx_check()
+                continue
+
+            if p.Extended:
+                hdr_len = 8
+                if rx.length < hdr_len:
+                    return None
+                rx.peek(hdr, 0, hdr_len)
+                data_len = hdr[5] + (hdr[6] << 8) - 1
+                if data_len < 0 or not self.accept_extended_header(p, hdr, expected_opcode):
+                    rx.clear(1)
+                    self.reset_rx_check()
+                    continue
+                if expected_id is not None and p.ID != expected_id:
+                    # ответ на другой (более ранний) запрос - пропускаем кадр целиком
+                    if rx.length < hdr_len + data_len + 2:
+                        return None
+                    self.log(LogLevel.Warn,
+                             f"нарушение порядка обмена: ожидаемый ID пакета: 0x{expected_id:02X}, принятый: 0x{p.ID:02X}")
+                    rx.clear(hdr_len + data_len + 2)
+                    self.reset_rx_check()
+                    continue
+            else:
+                hdr_len = 3
+                data_len = 1 if p.FunctionCode == M4Opcode.Error else expectedDataLength
+
+            self.fold_rx_check(p.Extended, min(rx.length, hdr_len + data_len))
+            if rx.length < hdr_len + data_len + 2:
+                # длина кадра известна - пауза в линии не считается концом ответа
+                self.connection.rx_frame_len_known = True
+                return None
+
+            rx.clear(hdr_len)
+            p.Data = rx.dequeue_view(data_len)
+            rx.dequeue(self.rx_check, 0, 2)
+            self.set_packet_check(p, self.rx_check)
+            self.rx_calc_check = self.rx_sum if p.Extended else 0x1600 | ((0xFF - self.rx_sum) & 0xFF)
+            self.reset_rx_check()
+
+            return p
+
+    def reset_rx_check(self):
+        self.rx_fold = 1  # байт начала кадра в контрольную сумму не входит
+        self.rx_sum = 0
+
+    # контрольная сумма кадра в начале приемного буфера считается по мере поступления данных:
+    # при каждом разборе досчитываются только байты [rx_fold, end), принятые после предыдущего
+    def fold_rx_check(self, extended: bool, end: int):
+        if end <= self.rx_fold:
+            return
+        base = 0
+        for v in self.connection.rx_buf.readable_views():
+            lo = max(self.rx_fold, base)
+            hi = min(end, base + len(v))
+            if lo < hi:
+                if extended:
+                    self.rx_sum = Crc16.fold(self.rx_sum, v[lo - base:hi - base])
+                else:
+                    self.rx_sum += sum(v[lo - base:hi - base])
+            base += len(v)
+        self.rx_fold = end
+
+    def accept_packet_header(self, p: M4Packet, buf: bytearray, expected_nt: bytes, expected_opcode: M4Opcode) -> bool:
+        p.NT = buf[1]
+        if buf[2] == M4Protocol.EXT_PROTO:
+            p.Extended = True
+        else:
+            p.Extended = False
+            try:
+                p.FunctionCode = M4Opcode(buf[2])
+            except ValueError:  # не заголовок пакета - шум в линии
+                return False
+
+        if expected_nt and p.NT != expected_nt:
+            return False
+
+        if (expected_opcode and
+                not p.Extended and
+                p.FunctionCode != expected_opcode and
+                p.FunctionCode != M4Opcode.Error):
+            if expected_opcode == M4Opcode.ReadFlash:
+                self.on_recoverable_error()
+                raise ECommException(ExcSeverity.Error, CommError.Unspecified,
+                                     "нарушение последовательности обмена")
+            return False
+
+        return True
+
+    def accept_extended_header(self, p: M4Packet, buf: bytearray, expected_opcode: M4Opcode) -> bool:
+        p.ID = buf[3]
+        p.Attributes = buf[4]
+        try:
+            p.FunctionCode = M4Opcode(buf[7])
+        except ValueError:
+            return False
+        if expected_opcode and p.FunctionCode != expected_opcode and p.FunctionCode != M4Opcode.Error:
+            return False
+
+        return True
 
+    @staticmethod
+    def set_packet_check(p: M4Packet, check: bytearray):
         if p.Extended:
-            Protocol.crc16(calculatedCheck, buf, 1, 7)
-            Protocol.crc16(calculatedCheck, p.Data, 0, len(p.Data))
+            p.Check = (check[0] << 8) | check[1]
         else:
-            calculatedCheck = 0x1600
-            calculatedCheck |= (~Logika4.checksum8(buf, 1, 2) + ~Logika4.checksum8(p.Data, 0, len(p.Data)))
+            p.Check = check[0] | (check[1] << 8)
 
+    def check_received_packet(self, p: M4Packet, calculatedCheck: int, flags: RecvFlags):
         if p.Check != calculatedCheck:
             self.report_proto_event(ProtoEvent.rxCrcError)
             raise ECommException(ExcSeverity.Error, CommError.Checksum)
@@ -390,7 +779,7 @@ class M4Protocol(Protocol):
             ec = ErrorCode(p.Data[0])
             self.report_proto_event(ProtoEvent.genericError)
             if not flags & RecvFlags.DontThrowOnErrorReply:
-                raise ECommException(ExcSeverity.Error, CommError.Unspecified, f"прибор вернул код ошибки: {ec.value}")
+                raise ECommException(ExcSeverity.Error, CommError.ErrorReply, f"прибор вернул код ошибки: {ec.value}")
 
         return p
 
@@ -400,12 +789,12 @@ class M4Protocol(Protocol):
             raise Exception("смена скорости недопустима на соединениях отличных от 'Serial'")
 
         m4BaudRates = [2400, 4800, 9600, 19200, 38400, 57600, 115200]
-        nbr = m4BaudRates.index(int(baud_rate))
-        if nbr < 0:
+        if int(baud_rate) not in m4BaudRates:
             raise ECommException(ExcSeverity.Stop, CommError.Unspecified,
                                  "запрошенная скорость обмена не поддерживается")
+        nbr = m4BaudRates.index(int(baud_rate))
 
-        prevBaudRate = serialConn.BaudRate
+        prevBaudRate = serialConn.baud_rate
         changedOk = False
         devAcksNewBR = False
         self.log(LogLevel.Info, f"установка скорости обмена {int(baud_rate)} bps")
@@ -414,10 +803,10 @@ class M4Protocol(Protocol):
             if rsp.FunctionCode == M4Opcode.SetSpeed:
                 devAcksNewBR = True
                 time.sleep(0.25)
-                self.connection.PurgeComms(PurgeFlags.RX | PurgeFlags.TX)
+                self.connection.purge_comms(PurgeFlags.RX | PurgeFlags.TX)
 
-                serialConn.BaudRate = baud_rate
-                rsp = self.do_legacy_request(nt, M4Opcode.Handshake, bytearray([tv, 0, 0, 0]), 3, RecvFlags.DontThrowOnErrorReply)
+                serialConn.baud_rate = baud_rate
+                rsp = self.do_legacy_request(nt, M4Opcode.Handshake, bytearray([int(tv), 0, 0, 0]), 3, RecvFlags.DontThrowOnErrorReply)
                 changedOk = rsp.FunctionCode == M4Opcode.Handshake
 
         except ECommException as ece:
@@ -430,29 +819,27 @@ class M4Protocol(Protocol):
             if devAcksNewBR:
                 msg += ", восстанавливаем предыдущую скорость обмена..."
             self.log(LogLevel.Warn, msg)
-            serialConn.BaudRate = prevBaudRate
+            serialConn.baud_rate = prevBaudRate
             if devAcksNewBR:
-                time.sleep(int(self.ALT_SPEED_FALLBACK_TIME * 1.1))
+                time.sleep(self.ALT_SPEED_FALLBACK_TIME * 1.1 / 1000)
                 self.log(LogLevel.Info, f"восстановлена скорость обмена {int(prevBaudRate)} bps")
         return changedOk
 
     def send_legacy_packet(self, nt: bytes, func: M4Opcode, data: bytes):
-        pkt = M4Packet()
-        pBuf = bytearray(3 + len(data) + 2)
-
-        pBuf[0] = self.FRAME_START
-        pBuf[1] = nt if nt is not None else self.BROADCAST
-        pBuf[2] = func.value
+        frame = self.frames.legacy(nt, func, data)
+        self.connection.write(frame, 0, len(frame))
 
-        pBuf[3:3 + len(data)] = data
-        pBuf[3 + len(data)] = Logika4.Checksum8(pBuf, 1, len(data) + 2)
-        pBuf[3 + len(data) + 1] = self.FRAME_END
+        self.report_proto_event(ProtoEvent.packetTransmitted)
 
-        pktTotalLen = 3 + len(data) + 2
-        self.connection.write(pBuf, 0, pktTotalLen)
+    async def send_legacy_packet_async(self, nt: bytes, func: M4Opcode, data: bytes):
+        frame = self.frames.legacy(nt, func, data)
+        await self.connection.write_async(frame, 0, len(frame))
 
         self.report_proto_event(ProtoEvent.packetTransmitted)
 
+    def build_legacy_packet(self, nt: bytes, func: M4Opcode, data: bytes) -> bytearray:
+        return bytearray(self.frames.legacy(nt, func, data))
+
     def write_parameter_l4(self, mtr: Logika4L, nt: bytes, channel: bytes, nParam: int, value: str, oper_flag: bool):
         if isinstance(mtr, TSPG741) and 200 <= nParam < 300:
             td = Meter.SPG741.Tags.All.SingleOrDefault(lambda x: x.Ordinal == nParam)
@@ -467,6 +854,9 @@ class M4Protocol(Protocol):
         if channel == 1 or channel == 2:
             nParam -= 50
 
+        # параметр задан номером, а кэш 4L - адресами: сбрасывается целиком
+        self.get_meter_instance(mtr, nt).tag_cache.invalidate()
+
         reqData = bytearray([nParam & 0xFF, (nParam >> 8) & 0xFF, 0, 0])
         pkt = self.do_legacy_request(nt, M4Opcode.WriteParam, reqData, 0, RecvFlags.DontThrowOnErrorReply)
 
@@ -521,9 +911,11 @@ class M4Protocol(Protocol):
         reqData = bytearray([start_addr & 0xFF, (start_addr >> 8) & 0xFF, nBytes, 0])
         pkt = self.do_legacy_request(nt, M4Opcode.ReadRam, reqData, nBytes)
 
-        return pkt.Data
+        return pkt.detach().Data
 
-    def read_flash_pages(self, mtr: Logika4L, nt: bytes, start_page: int, page_count: int) -> bytearray:
+    # deadline - крайний срок на чтение всех страниц, None - read_timeout на каждый блок страниц
+    def read_flash_pages(self, mtr: Logika4L, nt: bytes, start_page: int, page_count: int,
+                         deadline: float = None) -> bytearray:
         if page_count <= 0:
             raise ValueError("ReadFlashPages: zero page count")
 
@@ -532,18 +924,30 @@ class M4Protocol(Protocol):
 
         retbuf: bytearray = bytearray(page_count * Logika4L.FLASH_PAGE_SIZE)
 
-        for p in range((page_count + self.MAX_PAGE_BLOCK - 1) // self.MAX_PAGE_BLOCK):
-            pages_to_req = page_count - p * self.MAX_PAGE_BLOCK
-            if pages_to_req > self.MAX_PAGE_BLOCK:
-                pages_to_req = self.MAX_PAGE_BLOCK
-            page_block_start = start_page + p * self.MAX_PAGE_BLOCK
+        ctl = self.sizing(mtr).pages
+        block = ctl.value
+        nBlocks = (page_count + block - 1) // block
+        if deadline is None:
+            deadline = self.connection.deadline_after(self.connection.read_timeout * nBlocks)
+
+        for p in range(nBlocks):
+            pages_to_req = page_count - p * block
+            if pages_to_req > block:
+                pages_to_req = block
+            page_block_start = start_page + p * block
 
             reqData = bytearray([page_block_start & 0xFF, (page_block_start >> 8) & 0xFF, pages_to_req, 0])
+            t0 = time.monotonic()
             self.send_legacy_packet(nt, M4Opcode.ReadFlash, reqData)
 
             for i in range(pages_to_req):
                 try:
-                    pkt = self.recv_packet(nt, M4Opcode.ReadFlash, bytearray(), Logika4L.FLASH_PAGE_SIZE)
+                    pkt = self.recv_packet(nt, M4Opcode.ReadFlash, None, Logika4L.FLASH_PAGE_SIZE, 0, deadline)
+                except ECommException as e:
+                    self.size_failure(ctl, e)
+                    if page_count > 1:
+                        self.on_recoverable_error()
+                    raise
                 except:
                     if page_count > 1:
                         self.on_recoverable_error()
@@ -553,58 +957,80 @@ class M4Protocol(Protocol):
                     raise ECommException(ExcSeverity.Error, CommError.Unspecified,
                                          f"принят некорректный пакет, код функции 0x{pkt.FunctionCode:X2}")
 
-                start_index: int = (p * self.MAX_PAGE_BLOCK + i) * Logika4L.FLASH_PAGE_SIZE
+                start_index: int = (p * block + i) * Logika4L.FLASH_PAGE_SIZE
                 end_index: int = start_index + Logika4L.FLASH_PAGE_SIZE
                 retbuf[start_index:end_index] = pkt.Data[0:Logika4L.FLASH_PAGE_SIZE]
 
+            ctl.on_success(pages_to_req * Logika4L.FLASH_PAGE_SIZE, time.monotonic() - t0)
+
         return retbuf
 
     def on_recoverable_error(self):
         if self.activeDev is not None:
             self.activeDev.ioError = True
 
-    def read_flash_bytes(self, mtr: Logika4L, nt: bytes, start_addr: int, length: int) -> bytearray:
+    def read_flash_bytes(self, mtr: Logika4L, nt: bytes, start_addr: int, length: int,
+                         deadline: float = None) -> bytearray:
         if length <= 0:
             raise ValueError("read length invalid")
 
         StartPage = start_addr // Logika4L.FLASH_PAGE_SIZE
         EndPage = (start_addr + length - 1) // Logika4L.FLASH_PAGE_SIZE
         PageCount = EndPage - StartPage + 1
-        mem = self.read_flash_pages(mtr, nt, StartPage, PageCount)
+        mem = self.read_flash_pages(mtr, nt, StartPage, PageCount, deadline)
         retbuf = bytearray(length)
         retbuf[:length] = mem[start_addr % Logika4L.FLASH_PAGE_SIZE:start_addr % Logika4L.FLASH_PAGE_SIZE + length]
 
         return retbuf
 
-    def send_extended_packet(self, nt: bytes, packet_id: bytes, opcode: M4Opcode, data: bytearray):
-        CRC_LEN = 2
-        HDR_LEN = 8
+    def send_extended_packet(self, nt: bytes, packet_id: int, opcode: M4Opcode, data: bytearray):
+        frame = self.frames.extended(nt, packet_id, opcode, data)
+        self.connection.write(frame, 0, len(frame))
+        self.report_proto_event(ProtoEvent.packetTransmitted)
 
-        buf = bytearray(HDR_LEN + len(data) + CRC_LEN)
+    async def send_extended_packet_async(self, nt: bytes, packet_id: int, opcode: M4Opcode, data: bytearray):
+        frame = self.frames.extended(nt, packet_id, opcode, data)
+        await self.connection.write_async(frame, 0, len(frame))
+        self.report_proto_event(ProtoEvent.packetTransmitted)
 
-        buf[0] = self.FRAME_START
-        buf[1] = nt if nt is not None else self.BROADCAST
-        buf[2] = 0x90
-        buf[3] = packet_id[0]
-        buf[4] = 0x00
+    def build_extended_packet(self, nt: bytes, packet_id: int, opcode: M4Opcode, data: bytearray) -> bytearray:
+        return bytearray(self.frames.extended(nt, packet_id, opcode, data))
 
-        payload_len = 1 + len(data)
-        buf[5] = payload_len & 0xFF
-        buf[6] = payload_len >> 8
+    def read_tags_m4(self, m: Logika4M, nt: bytes, channels: List[int], ordinals: List[int]):
+        self.select_device_and_channel(m, nt)
+        lb = self.build_tags_request(channels, ordinals)
 
-        buf[7] = opcode.value
-        buf[8:] = data
+        p = self.do_m4_request(nt, M4Opcode.ReadTags, lb)
+        lb.clear()
 
-        check = 0
-        Protocol.crc16(check, buf, 1, HDR_LEN - 1 + len(data))
-        buf[HDR_LEN + len(data)] = check >> 8
-        buf[HDR_LEN + len(data) + 1] = check & 0xFF
+        return self.parse_tags_reply(m, ordinals, p)
 
-        self.connection.write(buf, 0, len(buf))
-        self.report_proto_event(ProtoEvent.packetTransmitted)
+    # план чтения компилируется один раз для типа прибора и набора тэгов
+    def get_read_plan(self, m: Logika4M, tags: List[DataTag], max_tags: int = MAX_TAGS_AT_ONCE) -> ReadPlan:
+        key = (m, max_tags, ReadPlan.key(tags))
+        plan = self.read_plans.get(key)
+        if plan is None:
+            plan = ReadPlan.compile(tags, max_tags, self.CHANNEL_NBASE)
+            self.read_plans[key] = plan
+        return plan
 
-    def read_tags_m4(self, m: Logika4M, nt: bytes, channels: List[int], ordinals: List[int]):
+    # выполнение плана: готовые запросы отправляются конвейером (см. do_m4_requests),
+    # результат - ответы по блокам плана
+    def execute_read_plan(self, m: Logika4M, nt: bytes, plan: ReadPlan):
         self.select_device_and_channel(m, nt)
+
+        ctl = self.sizing(m).tags
+        t0 = time.monotonic()
+        try:
+            packets = self.do_m4_requests(m, nt, M4Opcode.ReadTags, plan.requests)
+        except ECommException as e:
+            self.size_failure(ctl, e)
+            raise
+        ctl.on_success(sum(len(p.Data) for p in packets), time.monotonic() - t0)
+
+        return [self.parse_tags_reply(m, ords, p) for ords, p in zip(plan.block_ordinals, packets)]
+
+    def build_tags_request(self, channels: List[int], ordinals: List[int]) -> bytearray:
         if channels is None or len(channels) == 0 or ordinals is None or len(ordinals) == 0 or len(channels) != len(
                 ordinals):
             raise ValueError("некорректные входные параметры функции readTagsM4")
@@ -614,10 +1040,9 @@ class M4Protocol(Protocol):
             ch = ordinals[i] // self.CHANNEL_NBASE if ordinals[i] >= self.CHANNEL_NBASE else channels[i]
             ordinal = ordinals[i] % self.CHANNEL_NBASE
             self.append_pnum(lb, ch, ordinal)
+        return lb
 
-        p = self.do_m4_request(nt, M4Opcode.ReadTags, lb)
-        lb.clear()
-
+    def parse_tags_reply(self, m: Logika4M, ordinals: List[int], p: M4Packet):
         oa = self.parse_m4_tags_packet(p)
 
         if m == Meter.SPG742 or m == Meter.SPT941_20:
@@ -625,7 +1050,7 @@ class M4Protocol(Protocol):
                 if ordinals[i] == 8256 and isinstance(oa[i], int):
                     oa[i] = int(str(oa[i])) & 0x00FFFFFF
 
-        return oa
+        return oa, self.op_flags
 
     def parse_m4_tags_packet(self, p: M4Packet) -> List[object]:
         if not p.Extended or p.FunctionCode != M4Opcode.ReadTags:
@@ -634,21 +1059,15 @@ class M4Protocol(Protocol):
         valuesList: List[object] = []
         opFlagsList: List[bool] = []
 
-        tp = 0
-        while tp < len(p.Data):
-            tag_len, o = Logika4M.parse_tag(p.Data, tp)
-
+        for o in Logika4M.parse_tags(p.Data):
             if isinstance(o, OperParamFlag):
                 opFlagsList[-1] = True if o == OperParamFlag.Yes else False
-                tp += tag_len
                 continue
 
             valuesList.append(o)
             opFlagsList.append(False)
 
-            tp += tag_len
-
-        self.op_flags.extend(opFlagsList)
+        self.op_flags = opFlagsList
 
         return valuesList
 
@@ -663,6 +1082,10 @@ class M4Protocol(Protocol):
 
     def write_params_m4(self, mtr: Logika4M, nt: bytes, wda: List[TagWriteData]):
         self.select_device_and_channel(mtr, nt)
+        cache = self.get_meter_instance(mtr, nt).tag_cache
+        for twd in wda:
+            ch = twd.channel if twd.ordinal < self.CHANNEL_NBASE else twd.ordinal // self.CHANNEL_NBASE
+            cache.invalidate((ch, twd.ordinal % self.CHANNEL_NBASE))
 
         lb = bytearray()
         for twd in wda:
@@ -735,7 +1158,7 @@ class M4Protocol(Protocol):
         if not use_year_and_month_only:
             lb.extend([dt.day, dt.hour, dt.minute, dt.second, dt.microsecond & 0xFF, dt.microsecond >> 8])
 
-    def read_archive_m4(self, mtr: Logika4M, nt: bytes, pktId: bytes, partition: int, channel: bytes, archiveKind: M4ArchiveId, from_dt: datetime, to_dt: datetime, numValues: int):
+    def read_archive_m4(self, mtr: Logika4M, nt: bytes, pktId: int | None, partition: int, channel: int, archiveKind: M4ArchiveId, from_dt: datetime, to_dt: datetime, numValues: int):
         self.select_device_and_channel(mtr, nt)
 
         from_dt = self.restrict_time(from_dt)
@@ -746,25 +1169,50 @@ class M4Protocol(Protocol):
             next_record = datetime.min
             return None, result, next_record
 
+        lb = self.build_archive_request(mtr, partition, channel, archiveKind, from_dt, to_dt, numValues)
+
+        p = self.do_m4_request(nt, M4Opcode.ReadArchive, lb, pktId)
+        lb.clear()
+
+        result, next_record = self.parse_archive_packet(p)
+        self.log(LogLevel.Trace, f"M4 ответ: {len(result)} записей, указатель:{next_record}")
+
+        return p.detach(), result, next_record
 
-        lb: bytearray = bytearray([0x04, 0x05, partition & 0xFF, partition >> 8, channel, archiveKind])
+    # чтение архива по нескольким каналам конвейером (см. do_m4_requests), запросы независимы друг от друга
+    def read_archive_channels_m4(self, mtr: Logika4M, nt: bytes, partition: int, channels: List[int], archiveKind: M4ArchiveId, from_dt: datetime, to_dt: datetime, numValues: int):
+        self.select_device_and_channel(mtr, nt)
+
+        from_dt = self.restrict_time(from_dt)
+        to_dt = self.restrict_time(to_dt)
+        if to_dt != datetime.min and from_dt > to_dt:
+            self.log(LogLevel.Warn, f"протокол M4 не поддерживает чтение в обратном порядке, запрос [{from_dt} .. {to_dt}]")
+            return [(None, [], datetime.min) for _ in channels]
+
+        reqs = [self.build_archive_request(mtr, partition, ch, archiveKind, from_dt, to_dt, numValues) for ch in channels]
+
+        replies = []
+        for p in self.do_m4_requests(mtr, nt, M4Opcode.ReadArchive, reqs):
+            result, next_record = self.parse_archive_packet(p)
+            self.log(LogLevel.Trace, f"M4 ответ: {len(result)} записей, указатель:{next_record}")
+            replies.append((p, result, next_record))
+
+        return replies
+
+    def build_archive_request(self, mtr: Logika4M, partition: int, channel: int, archiveKind: M4ArchiveId,
+                              from_dt: datetime, to_dt: datetime, numValues: int) -> bytearray:
+        lb: bytearray = bytearray([0x04, 0x05, partition & 0xFF, partition >> 8, channel])
         if mtr.SupportsFLZ:
-            compFlags_archId = archiveKind.value | CompressionType.FLZLimitedLength
-            lb.append(compFlags_archId)
+            lb.append(archiveKind.value | CompressionType.FLZLimitedLength)
+        else:
+            lb.append(archiveKind.value)
         if numValues > 0xFF:
             numValues = 0xFF
         lb.append(numValues)
         self.append_date_tag(lb, from_dt, False)
         if to_dt != datetime.min:
             self.append_date_tag(lb, to_dt, False)
-
-        p = self.do_m4_request(nt, M4Opcode.ReadArchive, lb, pktId)
-        lb.clear()
-
-        result, next_record = self.parse_archive_packet(p)
-        self.log(LogLevel.Trace, f"M4 ответ: {len(result)} записей, указатель:{next_record}")
-
-        return p, result, next_record
+        return lb
 
     @staticmethod
     def parse_archive_packet(p: M4Packet):
@@ -777,52 +1225,42 @@ class M4Protocol(Protocol):
         zLen, oFirstTag = Logika4M.parse_tag(p.Data, 0)
 
         if isinstance(oFirstTag, bytes):
-            tail_length = len(p.Data) - zLen
             decomp_records = FLZ.decompress(oFirstTag, 0, len(oFirstTag))
-            decomp_data = bytearray(len(decomp_records) + tail_length) + p.Data[zLen:]
+            decomp_data = bytearray(decomp_records) + p.Data[zLen:]
         else:
             decomp_data = p.Data
 
         tp = 0
-        sum_tp: int = 0
         while tp < len(decomp_data):
-            tp, oTime = Logika4M.parse_tag(decomp_data, tp)
-            sum_tp += tp
-
-            lenLen = Logika4M.get_tag_length(decomp_data, sum_tp + 1)
-            recLen = lenLen[1]
+            tag_len, oTime = Logika4M.parse_tag(decomp_data, tp)
+            tp += tag_len
 
+            lenLen, recLen = Logika4M.get_tag_length(decomp_data, tp + 1)
             if recLen == 0:
                 next_record = oTime
                 break
 
             r = M4ArchiveRecord()
-            r.interval_mark = datetime(oTime, tzinfo=timezone.utc)
-
-            if decomp_data[sum_tp] == 0x30:
-                sum_tp += 1 + lenLen[0]
-
-                st = sum_tp
+            r.interval_mark = oTime
 
-                lo = []
-                while sum_tp - st < recLen:
-                    tp, o = Logika4M.parse_tag(decomp_data, sum_tp)
-                    sum_tp += tp
-                    lo.append(o)
+            if decomp_data[tp] == 0x30:
+                tp += 1 + lenLen
+                lo = Logika4M.parse_tags(decomp_data, tp, tp + recLen)
+                tp += recLen
 
-                if isinstance(lo[0], str) and isinstance(lo[1], str) and len(lo[0]) == 8 and len(lo[1]) == 8:
-                    ta = lo[0].split('-') + lo[0].split(':')
+                if len(lo) >= 2 and isinstance(lo[0], str) and isinstance(lo[1], str) and len(lo[0]) == 8 and \
+                        len(lo[1]) == 8:
+                    ta = lo[0].split(':')
                     da = lo[1].split('-')
-                    r.dt = datetime(2000 + int(da[2]), int(da[1]), int(da[0]), int(ta[0]), int(ta[1]),
-                                    int(ta[2]), tzinfo=timezone.utc)
+                    r.dt = datetime(2000 + int(da[2]), int(da[1]), int(da[0]), int(ta[0]), int(ta[1]), int(ta[2]))
                     lo = lo[2:]
                 else:
                     r.dt = datetime.min
 
                 r.values = lo
             else:
-                tp, o = Logika4M.parse_tag(decomp_data, sum_tp)
-                sum_tp += tp
+                tag_len, o = Logika4M.parse_tag(decomp_data, tp)
+                tp += tag_len
                 r.dt = r.interval_mark
                 r.values = [o]
 
@@ -837,45 +1275,134 @@ class M4Protocol(Protocol):
         mtd = self.get_meter_instance(meter if isinstance(meter, Logika4) else None, dst)
         return mtd.current_device_time
 
-    def update_tags(self, src, dst, tags: List[DataTag]):
+    # force_refresh=True - значения читаются из прибора независимо от кэша значений тэгов
+    def update_tags(self, src, dst, tags: List[DataTag], force_refresh: bool = False):
         if len(tags) == 0:
             return
-        self.update_tags_impl(dst, tags, updTagsFlags.Zero)
+        self.update_tags_impl(dst, tags, updTagsFlags.Zero, force_refresh)
 
-    def update_tags_impl(self, nt: bytearray, tags: List[DataTag], flags: updTagsFlags):
-        meter_4 = tags[0].deffinition.Meter.__class__ = Logika4()
+    def update_tags_impl(self, nt: bytearray, tags: List[DataTag], flags: updTagsFlags, force_refresh: bool = False):
+        meter_4 = tags[0].deffinition.Meter
         mmd = self.get_meter_instance(meter_4, nt)
         m = tags[0].deffinition.Meter
 
+        # из прибора читаются только тэги без действующего значения в кэше
+        cache = mmd.tag_cache
+        keys = [self.tag_cache_key(mmd, t) for t in tags]
+        stale = [(t, k) for t, k in zip(tags, keys) if force_refresh or not cache.fill(k, t)]
+        if not stale:
+            return
+        stale_tags = [t for t, _ in stale]
+
         if isinstance(m, Logika4L):
-            self.update4L_tags_values(nt, tags, mmd, flags)
+            self.update4L_tags_values(nt, stale_tags, mmd, flags)
         elif isinstance(m, Logika4M):
-            self.update_tags4M(nt, tags, mmd, flags)
+            self.update_tags4M(nt, stale_tags, mmd, flags)
+
+        for t, k in stale:
+            cache.store(k, t)
+
+    def tag_cache_key(self, mi: MeterInstance, t: DataTag):
+        if isinstance(mi.mtr, Logika4L):
+            # адреса RAM и flash - разные адресные пространства
+            return "ram" if t.deffinition.inRAM else "flash", self.get4L_real_addr(mi, t)
+        ch = t.Ordinal // self.CHANNEL_NBASE if t.Ordinal >= self.CHANNEL_NBASE else t.Channel.No
+        return ch, t.Ordinal % self.CHANNEL_NBASE
+
+    # отчет о попаданиях в кэш значений тэгов прибора
+    def tag_cache_report(self, nt: bytes) -> dict:
+        mi = self.metadataCache.get(nt if nt is not None else 0xFF) if self.metadataCache else None
+        return mi.tag_cache.report() if mi is not None else {}
 
     def get_flash_pages_to_cache(self, mtr, nt, startPageNo, count, mi):
         if count <= 0 or startPageNo < 0:
             raise ValueError()
-        st = -1
-        ct = 0
-        for i in range(count):
-            p = startPageNo + i
-            r = False
-            if not mi.pageMap[p]:
-                if st < 0:
-                    st = p
-                    ct = 1
-                else:
-                    ct += 1
-
-            if i == count - 1 and ct > 0:
-                r = True
+        if self.flash_store_dir is not None and not mi.page_store_ready:
+            self.open_page_store(mtr, nt, mi)
+
+        for st, ct in list(mi.pageMap.missing_runs(startPageNo, count)):
+            self.load_flash_pages(mtr, nt, st, ct, mi)
+
+    def load_flash_pages(self, mtr, nt, st, ct, mi):
+        self.log(LogLevel.Trace, f"req pages {st}..{st + ct - 1}")
+        pg = self.read_flash_pages(mtr, nt, st, ct)
+        mi.flash[st * Logika4L.FLASH_PAGE_SIZE: (st + ct) * Logika4L.FLASH_PAGE_SIZE] = pg
+        mi.pageMap.set_range(st, ct)
+        if mi.page_policy is not None:
+            mi.page_policy.on_loaded(st, ct)
+        if mi.page_store is not None:
+            mi.page_store.store_pages(st, pg)
+        return pg
+
+    # постоянный кэш страниц flash: страницы с идентификатором прибора читаются из прибора, их содержимое
+    # определяет файл кэша (тип прибора + ИД) и его действительность (CRC этих страниц записывается
+    # в params_csum). остальные страницы, не старше FLASH_STORE_MAX_AGE, берутся из файла
+    def open_page_store(self, mtr, nt, mi: MeterInstance):
+        mi.page_store_ready = True
+        ident = self.ident4L_location(mi)
+        if ident is None:
+            return
 
-            if r:
-                print("req pages {0}..{1}".format(st, st + ct - 1))
-                pg = self.read_flash_pages(mtr, nt, st, ct)
-                mi.flash[st * Logika4L.FLASH_PAGE_SIZE: (st + ct) * Logika4L.FLASH_PAGE_SIZE] = pg
-                for f in range(ct):
-                    mi.pageMap[st + f] = True
+        addr, size = ident
+        PS = Logika4L.FLASH_PAGE_SIZE
+        stp = addr // PS
+        pg, csum = self.read4L_params_csum(mtr, nt, mi)
+
+        path = os.path.join(self.flash_store_dir, FlashPageStore.file_name(mtr, bytes(mi.flash[addr:addr + size])))
+        store = FlashPageStore(path, len(mi.pageMap), PS)
+        store.params_csum = csum
+        store.store_pages(stp, pg)
+
+        restored = 0
+        now = time.time()
+        for p in range(len(mi.pageMap)):
+            if not mi.pageMap[p] and store.valid(p, self.FLASH_STORE_MAX_AGE):
+                mi.flash[p * PS:(p + 1) * PS] = store.page(p)
+                mi.pageMap[p] = True
+                if mi.page_policy is not None:
+                    mi.page_policy.on_loaded(p, 1, now - store.page_time(p))
+                restored += 1
+        self.log(LogLevel.Debug, f"кэш страниц flash {path}: восстановлено страниц: {restored}")
+        mi.page_store = store
+
+    # файл постоянного кэша сбрасывается на диск и закрывается вместе с сеансом;
+    # при следующем чтении flash открывается заново (с проверкой контрольной суммы параметров)
+    def close_page_store(self, nt: bytes):
+        mi = self.metadataCache.get(nt if nt is not None else 0xFF) if self.metadataCache else None
+        if mi is not None and mi.page_store is not None:
+            mi.page_store.close()
+            mi.page_store = None
+            mi.page_store_ready = False
+
+    # адрес и размер тэга ИД во flash, None - у прибора нет тэга ИД
+    def ident4L_location(self, mi: MeterInstance):
+        ident_tags = mi.vipTags.get(ImportantTag.Ident)
+        if not ident_tags:
+            return None
+        t = ident_tags[0]
+        return self.get4L_real_addr(mi, t), Logika4L.size_of(t.deffinition.internalType)
+
+    # контрольная сумма параметров прибора 4L: у этих приборов нет КСБД, вместо нее - CRC страниц с тэгом ИД,
+    # прочитанных из прибора заново. возвращает прочитанные страницы и сумму
+    def read4L_params_csum(self, mtr, nt, mi: MeterInstance):
+        addr, size = self.ident4L_location(mi)
+        PS = Logika4L.FLASH_PAGE_SIZE
+        stp = addr // PS
+        ct = (addr + size - 1) // PS - stp + 1
+        pg = self.load_flash_pages(mtr, nt, stp, ct, mi)
+        csum = Crc16.compute(0, pg, 0, len(pg))
+
+        policy = mi.page_policy
+        if policy is not None and policy.update_params_csum(csum):
+            self.log(LogLevel.Info, "изменилась контрольная сумма параметров прибора, страницы параметров сброшены")
+            policy.invalidate_params(mi.pageMap)
+            mi.pageMap.set_range(stp, ct)
+            policy.on_loaded(stp, ct)
+            mi.tag_cache.invalidate()
+            if mi.page_store is not None:
+                mi.page_store.params_csum = csum
+                mi.page_store.store_pages(stp, pg)
+        return pg, csum
 
     def get4L_real_addr(self, mi: MeterInstance, t: DataTag):
         deffinition = t.deffinition
@@ -884,8 +1411,44 @@ class M4Protocol(Protocol):
         else:
             return deffinition.address + (deffinition.channelOffset if t.Channel.No == 2 else 0)
 
+    def flash_read_planner(self, mtr: Logika4L) -> FlashReadPlanner:
+        baud_rate = BaudRate.b2400
+        if isinstance(self.connection, SerialConnection) and self.connection.baud_rate != BaudRate.Undefined:
+            baud_rate = self.connection.baud_rate
+        rtt = None
+        stats = self.connection.stats if self.connection is not None else None
+        if stats is not None:
+            es = stats.exchanges.get(M4Opcode.ReadFlash.name)
+            if es is not None and es.ttfb.count > 0:
+                rtt = es.ttfb.sum / es.ttfb.count  # средняя задержка до первого байта ответа
+        return FlashReadPlanner(int(baud_rate), rtt, self.sizing(mtr).pages.value)
+
+    # чтение страниц flash, нужных всем тэгам набора, минимальным числом запросов (см. FlashReadPlanner)
+    def prefetch4L_flash_pages(self, mtr: Logika4L, nt: bytes, tags: List[DataTag], mi: MeterInstance):
+        if self.flash_store_dir is not None and not mi.page_store_ready:
+            self.open_page_store(mtr, nt, mi)
+
+        PS = Logika4L.FLASH_PAGE_SIZE
+        pages = set()
+        for t in tags:
+            def_ = t.deffinition
+            if not def_.inRAM:
+                pages.update(FlashReadPlanner.pages_of(self.get4L_real_addr(mi, t),
+                                                       Logika4L.size_of(def_.internalType), PS))
+
+        # устаревшие страницы снимаются с карты и читаются вместе с недостающими
+        policy = mi.page_policy
+        if policy is not None:
+            if policy.has_params(pages) and policy.params_check_due() and self.ident4L_location(mi) is not None:
+                self.read4L_params_csum(mtr, nt, mi)
+            policy.expire(pages, mi.pageMap)
+
+        for st, ct in self.flash_read_planner(mtr).plan(pages, mi.pageMap):
+            self.load_flash_pages(mtr, nt, st, ct, mi)
+
     def update4L_tags_values(self, nt: bytes, tags: List[DataTag], mi: MeterInstance, flags: updTagsFlags):
         mtr = tags[0].deffinition.Meter if isinstance(tags[0].deffinition.Meter, Logika4L) else None
+        self.prefetch4L_flash_pages(mtr, nt, tags, mi)
         for i in range(len(tags)):
             t = tags[i]
             def_ = t.deffinition if isinstance(t.deffinition, TagDef4L) else None
@@ -894,22 +1457,25 @@ class M4Protocol(Protocol):
             addr = self.get4L_real_addr(mi, t)
 
             stp = addr // Logika4L.FLASH_PAGE_SIZE
+            size = Logika4L.size_of(def_.internalType)
 
             if def_.inRAM:  # RAM vars
-                rbuf = self.read_ram(mtr, nt, addr, Logika4L.SizeOf(def_.internalType))
-                t.Value = Logika4L.GetValue(def_.internalType, rbuf, 0)
+                rbuf = self.read_ram(mtr, nt, addr, size)
+                t.Value = Logika4L.get_value(def_.internalType, rbuf, 0, False)
             else:  # flash (or flash + ram) vars
-                pfCnt = stp % 2 if stp < len(mi.pageMap) - 1 else 0
-                self.get_flash_pages_to_cache(mtr, nt, stp, 1 + pfCnt, mi)
-                t.Value, t.Oper = Logika4L.GetValue(def_.internalType, mi.flash, addr)
+                # страницы уже прочитаны prefetch4L_flash_pages, запрос - только если их успели сбросить
+                enp = (addr + size - 1) // Logika4L.FLASH_PAGE_SIZE
+                self.get_flash_pages_to_cache(mtr, nt, stp, enp - stp + 1, mi)
+                t.Value = Logika4L.get_value(def_.internalType, mi.flash, addr, False)
+                t.Oper = Logika4L.get_oper_flag(def_.internalType, mi.flash, addr)
 
                 if def_.addonAddress is not None:  # тотальные счетчики из двух частей
                     raddr = def_.addonAddress + (def_.addonChannelOffset if t.Channel.No == 2 else 0)
-                    rbuf = self.read_ram(mtr, nt, raddr, Logika4L.SizeOf(Logika4L.BinaryType.r32))
-                    ramFloatAddon = Logika4L.GetMFloat(rbuf)
+                    rbuf = self.read_ram(mtr, nt, raddr, Logika4L.size_of(BinaryType.r32))
+                    ramFloatAddon = Logika4L.get_m_float(rbuf, 0)
                     t.Value += ramFloatAddon
 
-            if updTagsFlags.DontGetEUs not in flags:
+            if flags != updTagsFlags.DontGetEUs:
                 t.EU = Logika4.get_eu(mi.eu_dict, def_.Units)
 
             t.TimeStamp = datetime.now()
@@ -932,38 +1498,31 @@ class M4Protocol(Protocol):
 
             addr = self.get4L_real_addr(mmd, t)
             stp = addr // Logika4L.FLASH_PAGE_SIZE
-            enp = (addr + Logika4L.SizeOf(def_.internalType) - 1) // Logika4L.FLASH_PAGE_SIZE
+            enp = (addr + Logika4L.size_of(def_.internalType) - 1) // Logika4L.FLASH_PAGE_SIZE
 
             for p in range(stp, enp + 1):
                 mmd.pageMap[p] = False
+                if mmd.page_store is not None:
+                    mmd.page_store.invalidate(p)
+            mmd.tag_cache.invalidate(self.tag_cache_key(mmd, t))
 
     def update_tags4M(self, nt: bytes, tags: List[DataTag], mi: MeterInstance, flags: updTagsFlags):
         mtr = tags[0].deffinition.Meter if isinstance(tags[0].deffinition.Meter, Logika4M) else None
 
-        chs = []
-        ords = []
-        blkSt = 0
-
-        for t in tags:
-            td = t.deffinition if isinstance(t.deffinition, TagDef4M) else None
-            chs.append(t.Channel.No)
-            ords.append(t.Ordinal)
-
-            if len(ords) == self.MAX_TAGS_AT_ONCE or t == tags[-1]:
-                va, opFlags = self.read_tags_m4(mtr, nt, chs, ords)
-                for z in range(len(ords)):
-                    vt = tags[blkSt + z]
-                    vt.Value = va[z]
-                    if vt.Value is None:
-                        vt.ErrorDesc = Logika4M.ND_STR
-                    if updTagsFlags.DontGetEUs not in flags:
-                        vt.EU = Logika4.get_eu(mi.eu_dict, td.Units)
-                    vt.Oper = opFlags[z]
-                    vt.TimeStamp = datetime.now()
-
-                blkSt += len(ords)
-                chs.clear()
-                ords.clear()
+        plan = self.get_read_plan(mtr, tags, self.sizing(mtr).tags.value)
+        replies = self.execute_read_plan(mtr, nt, plan)
+
+        now = datetime.now()
+        for vt, (blk, slot) in zip(tags, plan.tag_slots):
+            va, opFlags = replies[blk]
+            td = vt.deffinition if isinstance(vt.deffinition, TagDef4M) else None
+            vt.Value = va[slot]
+            if vt.Value is None:
+                vt.ErrorDesc = Logika4M.ND_STR
+            if flags != updTagsFlags.DontGetEUs:
+                vt.EU = Logika4.get_eu(mi.eu_dict, td.Units)
+            vt.Oper = opFlags[slot]
+            vt.TimeStamp = now
 
     def read_interval_archive_def(self, m: Meter, src_nt: bytes, dst_nt: bytes, ar_type: ArchiveType):
         mtr4 = m if isinstance(m, Logika4) else None
@@ -1130,13 +1689,13 @@ class M4Protocol(Protocol):
 
         record_getter = None
         if arType == ArchiveType.ErrorsLog:
-            record_getter = lambda _ar, b, o: Logika4L.GetValue(Logika4L.BinaryType.NSrecord, b, o)
+            record_getter = lambda _ar, b, o: Logika4L.get_value(BinaryType.NSrecord, b, o, False)
         elif arType == ArchiveType.ParamsLog:
-            record_getter = lambda _ar, b, o: Logika4L.GetValue(Logika4L.BinaryType.IZMrecord, b, o)
+            record_getter = lambda _ar, b, o: Logika4L.get_value(BinaryType.IZMrecord, b, o, False)
 
         for i in range(ard.ChannelDef.Count):
             tvsa[i] = Logika4LTVReadState()
-            tvsa[i].fArchive = AsyncFlashArchive4(mi, ard as ArchiveDef4L, ard.ChannelDef.Start + i, record_getter)
+            tvsa[i].fArchive = AsyncFlashArchive4(mi, ard, ard.ChannelDef.Start + i, record_getter)
             tvsa[i].headersRead = False
             tvsa[i].idx = -1
 
@@ -1181,7 +1740,15 @@ class M4Protocol(Protocol):
 
         t_start = rs.t_ptr if rs.t_ptr != datetime.min else start
 
-        packet, result, next_ptr = self.read_archive_m4(m, nt, bytes(0), self.PARTITION_CURRENT, rs.current_channel, archive_code, t_start, end, 64)
+        ctl = self.sizing(m).records
+        t0 = time.monotonic()
+        try:
+            packet, result, next_ptr = self.read_archive_m4(m, nt, None, self.PARTITION_CURRENT, rs.current_channel, archive_code, t_start, end, ctl.value)
+        except ECommException as e:
+            self.size_failure(ctl, e)
+            raise
+        if packet is not None:
+            ctl.on_success(len(packet.Data), time.monotonic() - t0)
 
         for r in result:
             self.fix_intv_timestamp(r, ar.ArchiveType, mtd)
@@ -1262,8 +1829,16 @@ class M4Protocol(Protocol):
         t_start = t_ptr if t_ptr != datetime.min else start
         tmp_list = []
 
-        for ch in range(ch_start, ch_end + 1):
-            packet, result, next_ptr = self.read_archive_m4(m4m, nt, bytes(0), self.PARTITION_CURRENT, bytes(ch), archive_code, t_start, end, 64)
+        channels = list(range(ch_start, ch_end + 1))
+        ctl = self.sizing(m4m).records
+        t0 = time.monotonic()
+        try:
+            replies = self.read_archive_channels_m4(m4m, nt, self.PARTITION_CURRENT, channels, archive_code, t_start, end, ctl.value)
+        except ECommException as e:
+            self.size_failure(ctl, e)
+            raise
+        ctl.on_success(sum(len(p.Data) for p, _, _ in replies if p is not None), time.monotonic() - t0)
+        for ch, (packet, result, next_ptr) in zip(channels, replies):
             for r in result:
                 evt = self.archive_rec_to_service_rec(m4m, ar.ArchiveType, ch, r)
                 tmp_list.append(evt)
@@ -0,0 +1,69 @@
+from typing import List, Tuple
+
+from Logika.Meters.DataTag import DataTag
+from Logika.Meters.Types import TagKind
+
+
+# план чтения набора тэгов приборов 4M: компилируется один раз для списка тэгов и далее используется при каждом
+# опросе. повторяющиеся (канал, номер) читаются один раз, запросы разбиты на блоки по ожидаемому размеру ответа,
+# для каждого тэга запомнено место его значения в ответах (блок, позиция)
+class ReadPlan:
+    REPLY_BUDGET = 0xF0  # ожидаемый размер данных ответа на один запрос
+
+    def __init__(self):
+        self.requests: List[bytes] = []
+        self.block_ordinals: List[List[int]] = []
+        self.tag_slots: List[Tuple[int, int]] = []
+
+    @staticmethod
+    def key(tags: List[DataTag]) -> tuple:
+        return tuple((t.Channel.No, t.Ordinal) for t in tags)
+
+    # оценка размера тэга в ответе: строки длиннее числовых значений, к параметрам добавляется признак
+    # оперативности (45 01 xx)
+    @staticmethod
+    def estimate_reply_size(t: DataTag) -> int:
+        td = t.deffinition
+        size = 34 if "String" in getattr(td.ElementType, "__name__", str(td.ElementType)) else 6
+        if td.Kind == TagKind.Parameter:
+            size += 3
+        return size
+
+    @staticmethod
+    def compile(tags: List[DataTag], max_tags: int, channel_nbase: int) -> 'ReadPlan':
+        plan = ReadPlan()
+        slots: dict[Tuple[int, int], Tuple[int, int]] = {}
+        req = bytearray()
+        ords: List[int] = []
+        reply_size = 0
+
+        for t in tags:
+            ch = t.Ordinal // channel_nbase if t.Ordinal >= channel_nbase else t.Channel.No
+            ordinal = t.Ordinal % channel_nbase
+            slot = slots.get((ch, ordinal))
+            if slot is None:
+                size = ReadPlan.estimate_reply_size(t)
+                if ords and (len(ords) == max_tags or reply_size + size > ReadPlan.REPLY_BUDGET):
+                    plan.requests.append(bytes(req))
+                    plan.block_ordinals.append(ords)
+                    req = bytearray()
+                    ords = []
+                    reply_size = 0
+
+                slot = (len(plan.requests), len(ords))
+                slots[(ch, ordinal)] = slot
+                req += bytes((0x4A, 0x03, ch, ordinal & 0xFF, (ordinal >> 8) & 0xFF))
+                ords.append(ordinal)
+                reply_size += size
+
+            plan.tag_slots.append(slot)
+
+        if ords:
+            plan.requests.append(bytes(req))
+            plan.block_ordinals.append(ords)
+
+        return plan
+
+    @property
+    def request_count(self) -> int:
+        return len(self.requests)
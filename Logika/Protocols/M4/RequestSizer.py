@@ -0,0 +1,180 @@
+import json
+import os
+import threading
+
+
+# регулятор размера запроса по образцу управления перегрузкой TCP. начальный размер считается проверенным;
+# до проверенного размера рост удвоением, дальше - пробами: после PROBE_AFTER успешных запросов подряд размер
+# увеличивается на шаг, и проба, прошедшая успешно, становится новым проверенным размером.
+# отказ пробы (таймаут, ошибка CRC или код ошибки от прибора) возвращает к проверенному размеру и закрывает
+# рост выше него (порог); отказ на проверенном размере уменьшает его вдвое.
+# рост также прекращается, если скорость обмена (байт/с) на новом размере оказалась заметно ниже прежней
+class SizeController:
+    RATE_SMOOTHING = 0.25
+    RATE_DROP = 0.9  # рост считается невыгодным при падении скорости более чем на 10%
+    PROBE_AFTER = 4  # успешных запросов подряд перед пробой большего размера
+
+    def __init__(self, value: int, min_value: int, max_value: int):
+        self.min_value = min_value
+        self.max_value = max_value
+        self.value = min(max(value, min_value), max_value)
+        self.proven = self.value  # наибольший размер, прошедший без ошибок
+        self.threshold = max_value  # выше порога размер не растет
+        self.rate = 0.0  # сглаженная скорость на текущем размере
+        self.prev_rate = 0.0  # скорость на предыдущем размере
+        self.samples = 0  # замеров на текущем размере
+        self.streak = 0  # успешных запросов подряд на текущем размере
+        self.successes = 0
+        self.failures = 0
+
+    @property
+    def probing(self) -> bool:
+        return self.value > self.proven
+
+    def on_success(self, n_bytes: int, elapsed: float):
+        self.successes += 1
+        self.streak += 1
+        self.proven = max(self.proven, self.value)
+        if elapsed > 0:
+            r = n_bytes / elapsed
+            self.rate = r if self.samples == 0 else self.rate + (r - self.rate) * self.RATE_SMOOTHING
+            self.samples += 1
+
+        if self.samples >= 2 and self.prev_rate > 0 and self.rate < self.prev_rate * self.RATE_DROP and \
+                self.value > self.min_value:
+            # больший размер не дал выигрыша - возврат и фиксация порога
+            self.threshold = self.value - 1
+            self.set_value(self.value - 1)
+            return
+
+        limit = min(self.proven, self.threshold)
+        if self.value < limit:
+            self.set_value(min(self.value * 2, limit))
+        elif self.value < self.threshold and self.streak >= self.PROBE_AFTER:
+            self.set_value(min(self.value + max(1, self.value // 8), self.threshold))
+
+    def on_failure(self):
+        self.failures += 1
+        if self.probing:
+            # пробный размер не принят - выше проверенного не растем
+            self.threshold = self.value - 1
+            value = self.proven
+        else:
+            value = max(self.min_value, self.value // 2)
+            self.proven = value
+        self.prev_rate = 0.0
+        self.rate = 0.0
+        self.samples = 0
+        self.streak = 0
+        self.value = value
+
+    def set_value(self, value: int):
+        value = min(max(value, self.min_value), self.max_value)
+        if value != self.value:
+            self.prev_rate = self.rate
+            self.rate = 0.0
+            self.samples = 0
+            self.streak = 0
+            self.value = value
+
+    def to_dict(self) -> dict:
+        return {"value": self.value, "proven": self.proven, "threshold": self.threshold, "rate": round(self.rate, 1),
+                "successes": self.successes, "failures": self.failures}
+
+    # сохраненная рабочая точка: непроверенная проба не восстанавливается
+    def load(self, d: dict):
+        clamp = lambda v: min(max(int(v), self.min_value), self.max_value)
+        self.proven = clamp(d.get("proven", d.get("value", self.proven)))
+        self.threshold = max(clamp(d.get("threshold", self.threshold)), self.proven)
+        self.value = min(clamp(d.get("value", self.value)), self.proven)
+
+
+class MeterSizing:
+    # (начальное значение, минимум, максимум)
+    LIMITS = {
+        "tags": (24, 1, 48),  # тэгов в запросе ReadTags
+        "pages": (8, 1, 16),  # страниц flash в запросе ReadFlash
+        "records": (64, 8, 255),  # записей в запросе ReadArchive
+    }
+
+    def __init__(self):
+        self.tags = SizeController(*self.LIMITS["tags"])
+        self.pages = SizeController(*self.LIMITS["pages"])
+        self.records = SizeController(*self.LIMITS["records"])
+
+    def items(self):
+        return (("tags", self.tags), ("pages", self.pages), ("records", self.records))
+
+
+# размеры запросов для каждой пары (канал связи, тип прибора); выученные значения сохраняются в JSON-файл
+class RequestSizer:
+    FILE_NAME = "request_sizes.json"
+
+    def __init__(self, path: str = None):
+        self.path = None
+        self.m_lock = threading.Lock()
+        self.sizings: dict[str, MeterSizing] = {}
+        self.saved: dict = {}
+        if path is not None:
+            self.load(path)
+
+    # чтение сохраненных размеров; файл задает и место последующих save()
+    def load(self, path: str):
+        self.path = path
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            saved = {}
+        with self.m_lock:
+            self.saved = saved if isinstance(saved, dict) else {}
+            for key, ms in self.sizings.items():
+                for name, ctl in ms.items():
+                    if name in self.saved.get(key, {}):
+                        ctl.load(self.saved[key][name])
+
+    @staticmethod
+    def key(link: str, mtr) -> str:
+        return f"{link}|{mtr}"
+
+    def get(self, link: str, mtr) -> MeterSizing:
+        key = self.key(link, mtr)
+        ms = self.sizings.get(key)
+        if ms is None:
+            with self.m_lock:
+                ms = self.sizings.get(key)
+                if ms is None:
+                    ms = MeterSizing()
+                    for name, ctl in ms.items():
+                        if name in self.saved.get(key, {}):
+                            ctl.load(self.saved[key][name])
+                    self.sizings[key] = ms
+        return ms
+
+    def snapshot(self) -> dict:
+        with self.m_lock:
+            items = list(self.sizings.items())
+        d = dict(self.saved)
+        for key, ms in items:
+            d[key] = {name: ctl.to_dict() for name, ctl in ms.items()}
+        return d
+
+    def save(self, path: str = None):
+        path = path or self.path
+        if path is None:
+            return
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=1)
+        os.replace(tmp, path)
+
+    # выбранные рабочие точки: канал | прибор, размер запроса, порог и скорость по каждому виду запроса
+    def report(self) -> str:
+        lines = []
+        for key, knobs in sorted(self.snapshot().items()):
+            lines.append(key)
+            for name, d in knobs.items():
+                lines.append(f"  {name:<8} {d['value']:>4} (проверен {d.get('proven', d['value'])}, "
+                             f"порог {d['threshold']}), {d['rate']:.0f} байт/с, "
+                             f"успешно {d['successes']}, ошибок {d['failures']}")
+        return "\n".join(lines)
@@ -0,0 +1,79 @@
+import time
+from typing import Callable, Hashable
+
+from Logika.Meters.DataTag import DataTag
+from Logika.Meters.Types import TagKind
+
+
+class TagCacheEntry:
+    __slots__ = ("value", "oper", "eu", "error_desc", "timestamp", "expires")
+
+    def __init__(self, t: DataTag, expires: float):
+        self.value = t.Value
+        self.oper = getattr(t, "Oper", None)
+        self.eu = getattr(t, "EU", None)
+        self.error_desc = getattr(t, "ErrorDesc", None)
+        self.timestamp = getattr(t, "TimeStamp", None)
+        self.expires = expires
+
+
+# кэш значений тэгов прибора. ключ - (канал, номер) для 4M или ("ram"/"flash", адрес) для 4L.
+# время жизни значения берется из UpdateRate описания тэга (секунды), при UpdateRate = 0 - по виду тэга:
+# настроечные параметры и информационные тэги живут долго, текущие значения и тотальные счетчики - коротко
+class TagValueCache:
+    KIND_TTL = {
+        TagKind.Parameter: 3600.0,
+        TagKind.Info: 3600.0,
+        TagKind.Realtime: 1.0,
+        TagKind.TotalCtr: 5.0,
+    }
+    DEFAULT_TTL = 1.0
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.entries: dict[Hashable, TagCacheEntry] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def ttl(self, t: DataTag) -> float:
+        td = t.deffinition
+        if td.UpdateRate:
+            return float(td.UpdateRate)
+        return self.KIND_TTL.get(td.Kind, self.DEFAULT_TTL)
+
+    # копирует в тэг действующее значение из кэша; False - значения нет или оно устарело
+    def fill(self, key: Hashable, t: DataTag) -> bool:
+        e = self.entries.get(key)
+        if e is None or e.expires <= self.clock():
+            self.misses += 1
+            return False
+
+        t.Value = e.value
+        t.Oper = e.oper
+        t.EU = e.eu
+        t.ErrorDesc = e.error_desc
+        t.TimeStamp = e.timestamp
+        self.hits += 1
+        return True
+
+    def store(self, key: Hashable, t: DataTag):
+        self.entries[key] = TagCacheEntry(t, self.clock() + self.ttl(t))
+
+    def invalidate(self, key: Hashable = None):
+        if key is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(key, None)
+
+    def report(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total > 0 else 0.0,
+            "entries": len(self.entries),
+        }
+
+    def reset_statistics(self):
+        self.hits = 0
+        self.misses = 0
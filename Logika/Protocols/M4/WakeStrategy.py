@@ -0,0 +1,51 @@
+import time
+from enum import Enum
+from typing import Callable, Hashable
+
+
+class WakeMode(Enum):
+    Skip = 0  # прибор еще не вышел из сеанса - пробуждение не нужно
+    Fast = 1  # FF одной пачкой
+    Slow = 2  # FF по одному байту с паузами
+
+
+# выбор способа пробуждения прибора перед рукопожатием. для каждого прибора запоминается, срабатывает ли
+# быстрое пробуждение; после неудачи прибор будится медленно, повторная проверка быстрого способа -
+# не раньше чем через RELEARN_INTERVAL секунд
+class WakeStrategy:
+    RELEARN_INTERVAL = 3600.0
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.fast_ok: dict[Hashable, bool] = {}
+        self.learned_at: dict[Hashable, float] = {}
+        self.counts: dict[WakeMode, list[int]] = {m: [0, 0] for m in WakeMode}  # [успешно, неудачно]
+
+    # prefer_fast - способ для прибора, о котором еще ничего не известно (по описанию типа прибора)
+    def choose(self, key: Hashable, already_awake: bool, prefer_fast: bool = True) -> WakeMode:
+        if already_awake:
+            return WakeMode.Skip
+
+        ok = self.fast_ok.get(key)
+        if ok is None:
+            return WakeMode.Fast if prefer_fast else WakeMode.Slow
+        if ok:
+            return WakeMode.Fast
+        return WakeMode.Fast if self.clock() - self.learned_at[key] >= self.RELEARN_INTERVAL else WakeMode.Slow
+
+    def report(self, key: Hashable, mode: WakeMode, ok: bool):
+        self.counts[mode][0 if ok else 1] += 1
+        if mode == WakeMode.Fast:
+            self.fast_ok[key] = ok
+            self.learned_at[key] = self.clock()
+
+    # способ пробуждения для повтора после неудачного рукопожатия; None - повторять нечем
+    def fallback(self, key: Hashable, mode: WakeMode, prefer_fast: bool = True) -> WakeMode | None:
+        if mode == WakeMode.Skip:
+            return self.choose(key, False, prefer_fast)
+        if mode == WakeMode.Fast:
+            return WakeMode.Slow
+        return None
+
+    def report_text(self) -> str:
+        return ", ".join(f"{m.name}: {c[0]}/{c[0] + c[1]}" for m, c in self.counts.items())
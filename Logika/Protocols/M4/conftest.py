@@ -0,0 +1,177 @@
+import struct
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from Logika.Connections.OfflineConnection import OfflineConnection
+from Logika.ECommException import ECommException, ExcSeverity, CommError
+from Logika.Meters.Channel import ChannelDef
+from Logika.Meters.DataTag import DataTag
+from Logika.Meters.StandardVars import StdVar
+from Logika.Meters.TagDef import TagDef4L
+from Logika.Meters.Types import TagKind
+from Logika.Meters.__4L.SPT941 import TSPT941
+from Logika.Protocols.M4.M4FrameBuilder import M4FrameBuilder
+from Logika.Protocols.M4.M4Opcode import M4Opcode
+from Logika.Protocols.M4.M4Protocol import M4Protocol, _busActivePtr
+
+
+# прибор 4L с тэгами, заданными в тесте (описания тэгов приборов из базы здесь не загружаются)
+class Meter4L(TSPT941):
+    def __init__(self):
+        super().__init__()
+        self.common = ChannelDef(self, "ОБЩ", 0, 1, "общие")
+        self.tag_defs = []
+        self.well_known = {}
+
+    @property
+    def tags(self):
+        return SimpleNamespace(all=self.tag_defs)
+
+    def get_well_known_tags(self):
+        return self.well_known
+
+    def add_tag(self, name, bin_type, addr, kind=TagKind.Parameter, in_ram=False, update_rate=0, addon=None):
+        td = TagDef4L(self.common, name, StdVar.unknown, kind, False, update_rate, len(self.tag_defs), name, float,
+                      "", "", "", "", "", bin_type, in_ram, addr, 0, addon, 0 if addon is not None else None)
+        self.tag_defs.append(td)
+        return DataTag(td, 0)
+
+
+# число в формате microchip float (см. Logika4L.get_m_float)
+def m_float(v: float) -> bytes:
+    i = struct.unpack('<I', struct.pack('<f', v))[0]
+    i = ((i >> 23) & 0xFF) << 24 | (i >> 31) << 23 | (i & 0x007FFFFF)
+    return i.to_bytes(4, 'little')
+
+
+# линия с одним прибором 4L: отвечает на запросы M4 содержимым образов flash и RAM.
+# requests - принятые запросы (код функции, первые байты данных); на чтение больше max_pages страниц
+# прибор отвечает кодом ошибки
+class Meter4LLink(OfflineConnection):
+    def __init__(self, flash: bytes, ram: bytes = b""):
+        super().__init__(None)
+        self.read_timeout = 200
+        self.flash = bytearray(flash)
+        self.ram = bytearray(ram)
+        self.frames = M4FrameBuilder()
+        self.tx = bytearray()
+        self.out = bytearray()
+        self.requests = []
+        self.max_pages = None
+
+    def flash_reads(self):
+        return [(a[0] | a[1] << 8, a[2]) for op, a in self.requests if op == M4Opcode.ReadFlash]
+
+    def internal_write(self, buf, start: int, n_bytes: int):
+        self.tx += bytes(buf[start:start + n_bytes])
+        while True:
+            i = self.tx.find(M4FrameBuilder.FRAME_START)
+            if i < 0:
+                self.tx.clear()
+                return
+            del self.tx[:i]
+            if len(self.tx) < 9:
+                return
+            nt, op, args = self.tx[1], M4Opcode(self.tx[2]), bytes(self.tx[3:7])
+            del self.tx[:9]
+            self.requests.append((op, args))
+            self.reply(nt, op, args)
+
+    def reply(self, nt: int, op: M4Opcode, args: bytes):
+        PS = 0x40
+        if op == M4Opcode.ReadFlash:
+            start = args[0] | args[1] << 8
+            if self.max_pages is not None and args[2] > self.max_pages:
+                self.out += self.frames.legacy(nt, M4Opcode.Error, bytes([0]))
+                return
+            for p in range(start, start + args[2]):
+                self.out += self.frames.legacy(nt, op, self.flash[p * PS:(p + 1) * PS])
+        elif op == M4Opcode.ReadRam:
+            addr = args[0] | args[1] << 8
+            self.out += self.frames.legacy(nt, op, self.ram[addr:addr + args[2]])
+        elif op == M4Opcode.Handshake:
+            self.out += self.frames.legacy(nt, op, bytes([0x54, 0x29, 0x00]))
+        elif op == M4Opcode.SessionClose:
+            self.out += self.frames.legacy(nt, op, b"")
+
+    def internal_read(self, buf, start: int, max_length: int) -> int:
+        if not self.out:
+            raise ECommException(ExcSeverity.Error, CommError.Timeout)
+        n = min(max_length, len(self.out))
+        buf[start:start + n] = self.out[:n]
+        del self.out[:n]
+        return n
+
+
+# линия с прибором 4M: на расширенный запрос отвечает кадром с тем же ID и данными 0x00 + данные запроса.
+# faults[данные запроса] - неисправности на последовательные передачи запроса: "drop" - ответа нет,
+# "corrupt" - в ответе испорчена контрольная сумма, "ok" - ответ без ошибок
+class Meter4MLink(OfflineConnection):
+    def __init__(self):
+        super().__init__(None)
+        self.read_timeout = 50
+        self.frames = M4FrameBuilder()
+        self.tx = bytearray()
+        self.out = bytearray()
+        self.sent_ids = []
+        self.faults: dict[bytes, list] = {}
+
+    def internal_write(self, buf, start: int, n_bytes: int):
+        self.tx += bytes(buf[start:start + n_bytes])
+        while len(self.tx) >= 8:
+            n = 8 + (self.tx[5] | self.tx[6] << 8) - 1 + 2
+            if len(self.tx) < n:
+                return
+            nt, pkt_id, op, data = self.tx[1], self.tx[3], M4Opcode(self.tx[7]), bytes(self.tx[8:n - 2])
+            del self.tx[:n]
+            self.sent_ids.append(pkt_id)
+            faults = self.faults.get(data)
+            fault = faults.pop(0) if faults else "ok"
+            if fault == "drop":
+                continue
+            frame = bytearray(self.frames.extended(nt, pkt_id, op, b"\x00" + data))
+            if fault == "corrupt":
+                frame[-1] ^= 0xFF
+            self.out += frame
+
+    def internal_read(self, buf, start: int, max_length: int) -> int:
+        if not self.out:
+            raise ECommException(ExcSeverity.Error, CommError.Timeout)
+        n = min(max_length, len(self.out))
+        buf[start:start + n] = self.out[:n]
+        del self.out[:n]
+        return n
+
+
+@pytest.fixture
+def meter4l():
+    return Meter4L()
+
+
+# протокол на линии с прибором meter4l (NT 1) в открытом сеансе: make(flash, ram) -> M4Protocol
+@pytest.fixture
+def proto4l(meter4l):
+    def make(flash: bytes, ram: bytes = b"") -> M4Protocol:
+        link = Meter4LLink(flash, ram)
+        link.open()
+        proto = M4Protocol()
+        proto.connection = link
+        proto.activeDev = _busActivePtr(meter4l, 1, 0)
+        proto.activeDev.lastIOTime = datetime.now()
+        return proto
+
+    return make
+
+
+# протокол на линии Meter4MLink в открытом сеансе с прибором NT 1
+@pytest.fixture
+def proto4m():
+    link = Meter4MLink()
+    link.open()
+    proto = M4Protocol()
+    proto.connection = link
+    proto.activeDev = _busActivePtr("4M", 1, 0)
+    proto.activeDev.lastIOTime = datetime.now()
+    return proto
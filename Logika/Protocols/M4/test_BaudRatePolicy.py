@@ -0,0 +1,41 @@
+from Logika.Connections.SerialConnection import BaudRate
+from Logika.Protocols.M4.BaudRatePolicy import BaudRatePolicy
+
+
+class Clock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+def test_candidates_limited_by_target_meter_and_attempts():
+    p = BaudRatePolicy(BaudRate.b57600, Clock())
+    assert p.candidates("m", BaudRate.b2400, 115200) == [BaudRate.b57600, BaudRate.b38400]
+    assert p.candidates("m", BaudRate.b2400, 19200) == [BaudRate.b19200, BaudRate.b9600]
+    assert p.candidates("m", BaudRate.b57600, 115200) == []
+
+
+def test_failed_rate_skipped_until_retry_interval():
+    clock = Clock()
+    p = BaudRatePolicy(BaudRate.b57600, clock)
+    p.report("m", BaudRate.b57600, False)
+    assert p.candidates("m", BaudRate.b2400, 115200) == [BaudRate.b38400, BaudRate.b19200]
+    assert p.candidates("other", BaudRate.b2400, 115200)[0] == BaudRate.b57600
+
+    p.report("m", BaudRate.b38400, True)
+    assert p.good["m"] == BaudRate.b38400
+    assert p.report_text() == "m: 38400 bps, неудачно: 57600"
+
+    clock.t = BaudRatePolicy.RETRY_INTERVAL
+    assert p.candidates("m", BaudRate.b2400, 115200)[0] == BaudRate.b57600
+
+
+def test_failure_forgets_good_rate():
+    p = BaudRatePolicy(BaudRate.b19200, Clock())
+    p.report("m", BaudRate.b19200, True)
+    p.report("m", BaudRate.b19200, False)
+    assert "m" not in p.good
+    p.report("m", BaudRate.b19200, True)
+    assert p.failed["m"] == {}
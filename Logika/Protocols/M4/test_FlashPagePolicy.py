@@ -0,0 +1,69 @@
+from Logika.Meters.Types import BinaryType, TagKind
+from Logika.Protocols.M4.FlashPagePolicy import FlashPagePolicy, PageClass
+from Logika.Protocols.M4.conftest import m_float
+from Logika.Utils.PageBitmap import PageBitmap
+
+PS = 0x40
+
+
+def test_classify_marks_pages_with_totals(meter4l):
+    meter4l.add_tag("P", BinaryType.r32, 0x10, TagKind.Parameter)
+    meter4l.add_tag("V", BinaryType.i32r32, 0x7C, TagKind.TotalCtr)  # страницы 1 и 2
+    policy = FlashPagePolicy(4)
+    policy.classify(meter4l.tag_defs, PS)
+    assert list(policy.classes) == [PageClass.Params, PageClass.Totals, PageClass.Totals, PageClass.Params]
+
+
+def test_expire_by_page_class():
+    now = [0.0]
+    policy = FlashPagePolicy(2, clock=lambda: now[0])
+    policy.classes[1] = PageClass.Totals
+    page_map = PageBitmap(2)
+    page_map.set_range(0, 2)
+    policy.on_loaded(0, 2)
+
+    now[0] = FlashPagePolicy.TOTALS_TTL - 1
+    assert policy.expire(range(2), page_map) == 0
+    now[0] = FlashPagePolicy.TOTALS_TTL
+    assert policy.expire(range(2), page_map) == 1
+    assert page_map[0] and not page_map[1]
+
+
+def test_params_csum_change_invalidates_params_pages():
+    policy = FlashPagePolicy(3)
+    policy.classes[2] = PageClass.Totals
+    page_map = PageBitmap(3)
+    page_map.set_range(0, 3)
+    assert not policy.update_params_csum(0x1111)
+    assert policy.update_params_csum(0x2222)
+    policy.invalidate_params(page_map)
+    assert [page_map[p] for p in range(3)] == [False, False, True]
+
+
+def test_expired_totals_page_is_refetched(meter4l, proto4l):
+    flash = bytearray(0x100)
+    flash[0x10:0x14] = m_float(1.0)
+    flash[0x80:0x84] = m_float(10.0)
+    param = meter4l.add_tag("P", BinaryType.r32, 0x10, TagKind.Parameter)
+    total = meter4l.add_tag("V", BinaryType.r32, 0x80, TagKind.TotalCtr)
+    proto = proto4l(flash)
+    mi = proto.get_meter_instance(meter4l, 1)
+    now = [0.0]
+    mi.page_policy.clock = lambda: now[0]
+
+    proto.update_tags(None, 1, [param, total])
+    link = proto.connection
+    link.flash[0x10:0x14] = m_float(2.0)
+    link.flash[0x80:0x84] = m_float(11.0)
+    reads = len(link.flash_reads())
+
+    now[0] = FlashPagePolicy.TOTALS_TTL / 2
+    proto.update_tags(None, 1, [param, total], force_refresh=True)
+    assert (param.Value, total.Value) == (1.0, 10.0)
+    assert len(link.flash_reads()) == reads
+
+    # устарела только страница тотальных счетчиков
+    now[0] = FlashPagePolicy.TOTALS_TTL
+    proto.update_tags(None, 1, [param, total], force_refresh=True)
+    assert (param.Value, total.Value) == (1.0, 11.0)
+    assert link.flash_reads()[reads:] == [(2, 1)]
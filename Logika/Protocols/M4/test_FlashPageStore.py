@@ -0,0 +1,72 @@
+import os
+
+from Logika.Meters.Types import BinaryType, TagKind, ImportantTag
+from Logika.Protocols.M4.FlashPageStore import FlashPageStore
+from Logika.Protocols.M4.conftest import m_float
+
+PS = 0x40
+
+
+def test_pages_survive_reopen(tmp_path):
+    path = str(tmp_path / "store.l4flash")
+    store = FlashPageStore(path, 8, PS)
+    store.params_csum = 0x1234
+    store.store_pages(2, bytes(range(PS)) * 2, fetched_at=1000.0)
+    store.close()
+
+    store = FlashPageStore(path, 8, PS)
+    assert store.params_csum == 0x1234
+    assert store.page(2) == bytes(range(PS))
+    assert store.page(3) == bytes(range(PS))
+    assert store.page_time(3) == 1000.0
+    assert store.page_time(4) == 0.0
+    store.close()
+
+
+def test_params_csum_change_invalidates_pages(tmp_path):
+    store = FlashPageStore(str(tmp_path / "store.l4flash"), 4, PS)
+    store.params_csum = 1
+    store.store_pages(0, bytes(PS))
+    assert store.valid(0, 60)
+    store.params_csum = 2
+    assert not store.valid(0, 60)
+    store.close()
+
+
+def test_layout_change_resets_store(tmp_path):
+    path = str(tmp_path / "store.l4flash")
+    store = FlashPageStore(path, 4, PS)
+    store.store_pages(0, bytes(PS))
+    store.close()
+
+    store = FlashPageStore(path, 6, PS)
+    assert not store.valid(0, 60)
+    store.close()
+
+
+def test_warm_restart_reads_only_ident_pages(meter4l, proto4l, tmp_path):
+    flash = bytearray(0x200)
+    flash[0x10:0x14] = (0x00123456).to_bytes(4, 'little')
+    flash[0x100:0x104] = m_float(42.0)
+    ident = meter4l.add_tag("ИД", BinaryType.u24, 0x10, TagKind.Info)
+    param = meter4l.add_tag("P", BinaryType.r32, 0x100, TagKind.Parameter)
+    meter4l.add_tag("V", BinaryType.r32, 0x1C0, TagKind.TotalCtr)
+    meter4l.well_known = {ImportantTag.Ident: [ident]}
+
+    proto = proto4l(flash)
+    proto.flash_store_dir = str(tmp_path)
+    proto.update_tags(None, 1, [param])
+    assert param.Value == 42.0
+    proto.internal_close_comm_session(None, 1)
+    mi = proto.get_meter_instance(meter4l, 1)
+    assert mi.page_store is None and not mi.page_store_ready
+    assert len([f for f in os.listdir(tmp_path) if f.endswith(".l4flash")]) == 1
+
+    # новый экземпляр протокола (перезапуск): страница параметра берется из файла, из прибора - только страница ИД
+    proto = proto4l(flash)
+    proto.flash_store_dir = str(tmp_path)
+    param.Value = None
+    proto.update_tags(None, 1, [param])
+    assert param.Value == 42.0
+    assert {st for st, _ in proto.connection.flash_reads()} == {0}
+    proto.internal_close_comm_session(None, 1)
@@ -0,0 +1,35 @@
+import pytest
+
+from Logika.Protocols.M4.FlashReadPlanner import FlashReadPlanner
+
+
+def test_pages_of():
+    assert FlashReadPlanner.pages_of(0x3E, 4, 0x40) == range(0, 2)
+    assert FlashReadPlanner.pages_of(0x40, 4, 0x40) == range(1, 2)
+
+
+def test_skips_cached_pages_and_merges_contiguous():
+    page_map = [False] * 32
+    page_map[3] = True
+    planner = FlashReadPlanner(2400)
+    assert planner.plan([5, 1, 2, 3, 4, 2], page_map) == [(1, 2), (4, 2)]
+
+
+def test_gap_bridged_only_when_cheaper_than_request():
+    page_map = [False] * 32
+    pages = [0, 2, 10]
+    # на 2400 страница дороже запроса - промежутки не читаются
+    assert FlashReadPlanner(2400).plan(pages, page_map) == [(0, 1), (2, 1), (10, 1)]
+
+    fast = FlashReadPlanner(115200)
+    assert fast.page_cost < fast.request_cost
+    assert fast.plan(pages, page_map) == [(0, 3), (10, 1)]
+    assert FlashReadPlanner(115200, max_block=16).plan(pages, page_map) == [(0, 11)]
+
+    ranges = fast.plan(pages, page_map)
+    assert fast.cost(ranges) == pytest.approx(2 * fast.request_cost + 4 * fast.page_cost)
+    assert fast.cost(ranges) < fast.cost([(p, 1) for p in pages])
+
+
+def test_blocks_limited_by_max_block():
+    assert FlashReadPlanner(2400, max_block=4).plan(range(10), [False] * 10) == [(0, 4), (4, 4), (8, 2)]
@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+from Logika.Protocols.M4.KeepaliveScheduler import KeepaliveScheduler
+
+
+class Clock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+def scheduler(interval: float):
+    ks = KeepaliveScheduler(Clock())
+    ks.expect_poll(1, interval)
+    return ks
+
+
+def test_due_only_in_margin_window_before_timeout():
+    ks = scheduler(30)
+    assert not ks.due(1, 10, 7.9, 9600, True)
+    assert ks.due(1, 10, 8.5, 9600, True)
+    assert not ks.due(1, 10, 10, 9600, True)  # сеанс уже закрыт прибором
+    assert ks.due(1, timedelta(seconds=10), 8.5, 9600, True)
+    assert not ks.due(1, float("inf"), 8.5, 9600, True)
+
+
+def test_due_needs_expected_poll_beyond_timeout():
+    assert not KeepaliveScheduler(Clock()).due(1, 10, 8.5, 9600, True)
+    assert not scheduler(1).due(1, 10, 8.5, 9600, True)  # опрос раньше, чем истечет сеанс
+
+
+def test_due_compares_ping_and_wake_cost():
+    # до опроса 4 запроса поддержания: дешевле медленного пробуждения, но дороже быстрого
+    ks = scheduler(30)
+    assert ks.pings_needed(30 + 8.5, 10) == 4
+    assert 4 * ks.ping_cost(9600) < ks.wake_cost(9600, True)
+    assert 4 * ks.ping_cost(9600) > ks.wake_cost(9600, False)
+    assert ks.due(1, 10, 8.5, 9600, True)
+    assert not ks.due(1, 10, 8.5, 9600, False)
+
+
+def test_poll_shifts_schedule_and_report():
+    ks = scheduler(30)
+    ks.clock.t = 30
+    ks.on_poll(1)
+    assert ks.entries[1].next_poll == 60
+    assert ks.next_check_in(1, 10, 3) == 8 - 3
+    assert ks.next_check_in(2, 10, 3) is None
+
+    ks.report(1, True)
+    ks.report(1, False)
+    assert ks.report_text() == "NT 1: запросов 2, неудачно 1"
+    ks.forget(1)
+    assert not ks.due(1, 10, 8.5, 9600, True)
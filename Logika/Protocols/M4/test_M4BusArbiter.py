@@ -0,0 +1,90 @@
+import threading
+
+import pytest
+
+from Logika.Connections.OfflineConnection import OfflineConnection
+from Logika.ECommException import ECommException, CommError
+from Logika.Protocols.M4.M4BusArbiter import M4BusArbiter
+from Logika.Protocols.M4.M4Protocol import M4Protocol
+
+
+# протокол без обмена: выбор прибора и канала только запоминается
+class SelectOnlyProtocol(M4Protocol):
+    def __init__(self):
+        super().__init__()
+        self.selected = []
+
+    def select_device_and_channel(self, mtr, nt, tv=0):
+        self.selected.append((nt, tv))
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def arbiter():
+    conn = OfflineConnection(None)
+    conn.open()
+    arb = M4BusArbiter(conn, SelectOnlyProtocol(), max_batch=2, clock=Clock())
+    yield arb
+    arb.close()
+
+
+# задания ставятся в очередь, пока первое задание держит шину; возвращает порядок выполнения
+def run_queued(arb: M4BusArbiter, jobs):
+    gate = threading.Event()
+    done = []
+    first = arb.submit("gate", "4M", 9, 0, lambda p: gate.wait(5))
+    futures = [arb.submit(caller, "4M", nt, 0, lambda p, tag=tag: done.append(tag), timeout)
+               for caller, nt, tag, timeout in jobs]
+    gate.set()
+    first.result(5)
+    for f in futures:
+        f.exception(5)
+    return done, futures
+
+
+def test_same_target_jobs_batched_up_to_max_batch(arbiter):
+    done, _ = run_queued(arbiter, [("A", 1, "a1", None), ("A", 2, "a2", None),
+                                   ("B", 1, "b1", None), ("B", 1, "b2", None), ("B", 1, "b3", None)])
+    # порядок заданий клиента сохраняется, между клиентами - очередь по кругу;
+    # к прибору NT 1 подряд не больше max_batch заданий, пока ждет другой прибор
+    assert done == ["a1", "b1", "a2", "b2", "b3"]
+    assert arbiter.proto.selected == [(9, 0), (1, 0), (1, 0), (2, 0), (1, 0), (1, 0)]
+
+
+def test_urgent_job_runs_first(arbiter):
+    done, _ = run_queued(arbiter, [("A", 1, "a1", None), ("A", 1, "a2", None),
+                                   ("B", 2, "urgent", arbiter.urgency / 2)])
+    assert done[0] == "urgent"
+
+
+def test_job_expired_in_queue_fails_with_timeout(arbiter):
+    gate = threading.Event()
+    first = arbiter.submit("gate", "4M", 9, 0, lambda p: gate.wait(5))
+    late = arbiter.submit("A", "4M", 1, 0, lambda p: "ran", timeout=10)
+    arbiter.clock.now += 10
+    gate.set()
+    first.result(5)
+    with pytest.raises(ECommException) as e:
+        late.result(5)
+    assert e.value.Reason == CommError.Timeout
+
+
+def test_close_fails_queued_jobs():
+    conn = OfflineConnection(None)
+    conn.open()
+    arb = M4BusArbiter(conn, SelectOnlyProtocol())
+    gate = threading.Event()
+    arb.submit("gate", "4M", 9, 0, lambda p: gate.wait(5))
+    queued = arb.submit("A", "4M", 1, 0, lambda p: "ran")
+    threading.Timer(0.05, gate.set).start()
+    arb.close()
+    with pytest.raises(ECommException) as e:
+        queued.result(5)
+    assert e.value.Reason == CommError.NotConnected
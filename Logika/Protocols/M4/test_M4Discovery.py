@@ -0,0 +1,83 @@
+import json
+
+from Logika.Protocols.M4.M4Discovery import M4Discovery
+from Logika.Protocols.M4.M4Opcode import M4Opcode
+from Logika.Protocols.M4.M4Protocol import M4Protocol
+from Logika.Protocols.M4.conftest import Meter4LLink
+
+SPT941 = bytes((0x54, 0x29, 0x00))
+
+
+# шина с приборами present: на рукопожатие отвечают только приборы с совпадающим NT;
+# corrupt - испортить контрольные суммы ответов на групповые рукопожатия
+class BusLink(Meter4LLink):
+    def __init__(self, present):
+        super().__init__(b"")
+        self.address = "bus"
+        self.present = present
+        self.corrupt = False
+
+    def probed(self):
+        return [nt for nt, op in self.handshakes]
+
+    def internal_write(self, buf, start: int, n_bytes: int):
+        self.handshakes = getattr(self, "handshakes", [])
+        super().internal_write(buf, start, n_bytes)
+
+    def reply(self, nt: int, op: M4Opcode, args: bytes):
+        if op != M4Opcode.Handshake:
+            return
+        self.handshakes.append((nt, op))
+        if nt in self.present:
+            frame = bytearray(self.frames.legacy(nt, op, self.present[nt]))
+            if self.corrupt:
+                frame[-2] ^= 0xFF
+            self.out += frame
+
+
+def discovery(link, path, **kw):
+    link.open()
+    proto = M4Protocol()
+    proto.connection = link
+    return M4Discovery(proto, str(path), probe_timeout=50, read_model=False, **kw)
+
+
+def test_scan_finds_meters_and_persists(tmp_path):
+    path = tmp_path / "bus.json"
+    link = BusLink({3: SPT941, 7: SPT941})
+    res = discovery(link, path).scan(range(10))
+
+    assert [(nt, model) for nt, _, model in res] == [(3, ""), (7, "")]
+    assert link.probed() == list(range(10))
+    st = json.loads(path.read_text(encoding="utf-8"))["bus"]
+    assert st["probed"] == list(range(10))
+    assert st["found"]["3"] == {"ident": SPT941.hex(), "model": None}
+
+
+def test_interrupted_scan_resumes(tmp_path):
+    path = tmp_path / "bus.json"
+    link = BusLink({1: SPT941, 9: SPT941})
+    res = discovery(link, path).scan(range(12), max_silent_run=3)
+    assert [r[0] for r in res] == [1]
+    assert link.probed() == [0, 1, 2, 3, 4]
+
+    link = BusLink({1: SPT941, 9: SPT941})
+    res = discovery(link, path).scan(range(12))
+    assert [r[0] for r in res] == [1, 9]
+    assert link.probed() == list(range(5, 12))
+
+    d = discovery(BusLink({}), path)
+    d.forget()
+    assert d.endpoint_state() == {"probed": [], "found": {}}
+
+
+def test_interleaved_probe_falls_back_on_corruption(tmp_path):
+    link = BusLink({2: SPT941, 5: SPT941})
+    d = discovery(link, tmp_path / "bus.json", interleave=4)
+    assert d.probe([0, 1, 2, 3]) == {2: SPT941}
+
+    link.corrupt = True
+    link.handshakes.clear()
+    assert d.probe([4, 5, 6, 7]) == {}
+    assert d.interleave == 1
+    assert link.probed()[:4] == [4, 5, 6, 7] and link.probed()[4:] == [4, 5, 6, 7]
@@ -0,0 +1,40 @@
+from Logika.Protocols.M4.M4FrameBuilder import M4FrameBuilder
+from Logika.Protocols.M4.M4Opcode import M4Opcode
+from Logika.Utils.test_Checksum import crc16_bitwise
+
+
+def test_legacy_frame_layout():
+    frame = bytes(M4FrameBuilder().legacy(3, M4Opcode.ReadFlash, b"\x10\x00\x02\x00"))
+    body = bytes((3, M4Opcode.ReadFlash.value)) + b"\x10\x00\x02\x00"
+    assert frame == b"\x10" + body + bytes(((0xFF - sum(body)) & 0xFF, 0x16))
+    assert frame[1] == 3
+
+    assert bytes(M4FrameBuilder().legacy(None, M4Opcode.Handshake, b""))[1] == M4FrameBuilder.BROADCAST
+
+
+def test_extended_frame_layout():
+    data = bytes(i & 0xFF for i in range(300))
+    frame = bytes(M4FrameBuilder(16).extended(1, 0x1AB, M4Opcode.ReadTags, data))
+    hdr = bytes((1, 0x90, 0xAB, 0x00)) + (len(data) + 1).to_bytes(2, 'little') + bytes((M4Opcode.ReadTags.value,))
+    crc = crc16_bitwise(0, hdr + data)
+    assert frame == b"\x10" + hdr + data + crc.to_bytes(2, 'big')
+
+
+def test_buffer_reused_and_grown_without_invalidating_views():
+    fb = M4FrameBuilder(16)
+    buf = fb.buf
+    first = fb.legacy(1, M4Opcode.ReadRam, b"\x01\x02\x03\x04")
+    saved = bytes(first)
+    fb.legacy(2, M4Opcode.ReadRam, b"\x05\x06\x07\x08")
+    assert fb.buf is buf  # кадр в пределах емкости - без выделения памяти
+
+    big = fb.extended(1, 1, M4Opcode.ReadTags, bytes(100))
+    assert fb.buf is not buf and len(big) == 8 + 100 + 2
+    assert bytes(first)[1] == 2 and saved[1] == 1  # прежнее представление - на старый буфер
+
+
+def test_handshake_frames_cached():
+    a = M4FrameBuilder.handshake(5)
+    assert a is M4FrameBuilder.handshake(5)
+    assert a == bytes(M4FrameBuilder().legacy(5, M4Opcode.Handshake, bytes(4)))
+    assert M4FrameBuilder.handshake(0)[1] == M4FrameBuilder.BROADCAST
@@ -0,0 +1,100 @@
+import pytest
+
+from Logika.Connections.OfflineConnection import OfflineConnection
+from Logika.ECommException import ECommException, CommError
+from Logika.Protocols.M4.M4FrameBuilder import M4FrameBuilder
+from Logika.Protocols.M4.M4Opcode import M4Opcode
+from Logika.Protocols.M4.M4Protocol import M4Protocol
+
+
+# линия, отдающая ответ порциями; None между порциями - пауза в линии дольше межкадрового интервала
+class ChunkedLink(OfflineConnection):
+    def __init__(self, chunks):
+        super().__init__(None)
+        self.read_timeout = 200
+        self.chunks = list(chunks)
+        self.gap = False
+
+    def internal_read(self, buf, start: int, max_length: int) -> int:
+        chunk = self.chunks.pop(0) if self.chunks else None
+        self.gap = chunk is None
+        if chunk is None:
+            return 0
+        buf[start:start + len(chunk)] = chunk
+        return len(chunk)
+
+    # пауза считается концом ответа, только пока длина кадра неизвестна
+    def rx_frame_ended(self) -> bool:
+        return self.gap and not self.rx_frame_len_known
+
+
+def recv(chunks):
+    link = ChunkedLink(chunks)
+    link.open()
+    proto = M4Protocol()
+    proto.connection = link
+    return proto.recv_packet(1, M4Opcode.ReadTags, None, 0)
+
+
+def reply() -> bytes:
+    return bytes(M4FrameBuilder().extended(1, 7, M4Opcode.ReadTags, bytes(range(40))))
+
+
+def test_pause_inside_frame_of_known_length_is_not_its_end():
+    frame = reply()
+    p = recv([frame[:20], None, None, frame[20:]])
+    assert p.ID == 7 and bytes(p.Data) == bytes(range(40))
+
+
+def test_pause_before_header_is_complete_ends_the_reply():
+    frame = reply()
+    with pytest.raises(ECommException) as e:
+        recv([frame[:5], None, frame[5:]])
+    assert e.value.Reason == CommError.Timeout
+
+
+def legacy_reply(nt: int, data: bytes) -> bytes:
+    return bytes(M4FrameBuilder().legacy(nt, M4Opcode.ReadRam, data))
+
+
+def recv_legacy(chunks, nt=1, n=4):
+    link = ChunkedLink(chunks)
+    link.open()
+    proto = M4Protocol()
+    proto.connection = link
+    return proto.recv_packet(nt, M4Opcode.ReadRam, None, n)
+
+
+def test_noise_and_false_frame_starts_are_skipped():
+    frame = legacy_reply(1, b"\x01\x02\x03\x04")
+    # FF эха пробуждения, байт 0x10 без заголовка и кадр чужого прибора перед ответом
+    noise = b"\xFF\xFF\x10\x55" + legacy_reply(2, b"\x09\x09\x09\x09")
+    p = recv_legacy([noise + frame[:4], frame[4:]])
+    assert p.NT == 1 and bytes(p.Data) == b"\x01\x02\x03\x04"
+
+
+def test_frame_split_into_single_bytes():
+    frame = legacy_reply(1, b"\x01\x02\x03\x04")
+    p = recv_legacy([frame[i:i + 1] for i in range(len(frame))])
+    assert bytes(p.Data) == b"\x01\x02\x03\x04"
+
+
+def test_reply_to_other_id_is_skipped_whole():
+    builder = M4FrameBuilder()
+    early = bytes(builder.extended(1, 6, M4Opcode.ReadTags, b"\x10\x10\x10"))
+    wanted = bytes(builder.extended(1, 7, M4Opcode.ReadTags, b"\x01"))
+    link = ChunkedLink([early + wanted])
+    link.open()
+    proto = M4Protocol()
+    proto.connection = link
+    p = proto.recv_packet(1, M4Opcode.ReadTags, 7, 0)
+    assert p.ID == 7 and bytes(p.Data) == b"\x01"
+    assert link.rx_buffered == 0
+
+
+def test_corrupted_frame_raises_checksum_error():
+    frame = bytearray(legacy_reply(1, b"\x01\x02\x03\x04"))
+    frame[4] ^= 0x01
+    with pytest.raises(ECommException) as e:
+        recv_legacy([bytes(frame)])
+    assert e.value.Reason == CommError.Checksum
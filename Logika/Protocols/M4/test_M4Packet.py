@@ -0,0 +1,33 @@
+import pytest
+
+from Logika.Protocols.M4.M4FrameBuilder import M4FrameBuilder
+from Logika.Protocols.M4.M4Opcode import M4Opcode
+from Logika.Protocols.M4.M4Packet import M4Packet
+
+
+def test_data_is_view_into_receive_buffer_until_detached(proto4m):
+    p1 = proto4m.do_m4_request(1, M4Opcode.ReadTags, bytearray(b"AAAA"))
+    assert isinstance(p1.Data, memoryview)
+    assert p1.Data.obj is proto4m.connection.rx_buf.fInternalBuffer
+    view = p1.Data
+    assert p1.detach() is p1
+    assert isinstance(p1.Data, bytearray)
+
+    proto4m.do_m4_request(1, M4Opcode.ReadTags, bytearray(b"BBBB"))
+    assert bytes(view) == b"\x00BBBB"  # следующий прием перезаписал приемный буфер
+    assert p1.Data == b"\x00AAAA"
+
+
+def test_get_dump_reproduces_frame(proto4m):
+    p = proto4m.do_m4_request(1, M4Opcode.ReadTags, bytearray(b"\x4A\x03\x00\x01\x00"))
+    assert p.get_dump() == bytes(M4FrameBuilder().extended(1, p.ID, M4Opcode.ReadTags, b"\x00\x4A\x03\x00\x01\x00"))
+
+    legacy = M4Packet()
+    legacy.NT, legacy.FunctionCode, legacy.Data = 1, M4Opcode.ReadRam, bytearray(b"\x01\x02")
+    legacy.Check = 0xFF - (1 + M4Opcode.ReadRam.value + 3) & 0xFF
+    assert legacy.get_dump() == bytes(M4FrameBuilder().legacy(1, M4Opcode.ReadRam, b"\x01\x02"))
+
+
+def test_slots():
+    with pytest.raises(AttributeError):
+        M4Packet().Extra = 1
@@ -0,0 +1,50 @@
+import pytest
+
+from Logika.ECommException import ECommException, CommError
+from Logika.Protocols.M4.M4Opcode import M4Opcode
+
+MTR = "4M"
+
+
+def requests(n: int):
+    return [bytearray([i]) for i in range(n)]
+
+
+def replies(packets):
+    return [bytes(p.Data) for p in packets]
+
+
+@pytest.mark.parametrize("window", [1, 4])
+def test_replies_matched_by_id(proto4m, window):
+    proto4m.set_pipeline_window(MTR, window)
+    packets = proto4m.do_m4_requests(MTR, 1, M4Opcode.ReadTags, requests(6))
+    assert replies(packets) == [bytes([0, i]) for i in range(6)]
+    assert len(proto4m.connection.sent_ids) == 6
+
+
+@pytest.mark.parametrize("fault", ["drop", "corrupt"])
+@pytest.mark.parametrize("window", [1, 4])
+def test_lost_reply_resends_only_that_id(proto4m, window, fault):
+    proto4m.set_pipeline_window(MTR, window)
+    link = proto4m.connection
+    link.faults[bytes([2])] = [fault]
+
+    packets = proto4m.do_m4_requests(MTR, 1, M4Opcode.ReadTags, requests(5))
+
+    assert replies(packets) == [bytes([0, i]) for i in range(5)]
+    ids = link.sent_ids
+    assert len(ids) == 6
+    assert ids.count(ids[2]) == 2 and len(set(ids)) == 5
+    assert not proto4m.activeDev.ioError
+
+
+def test_bus_reset_only_after_retries_run_out(proto4m):
+    link = proto4m.connection
+    link.faults[bytes([1])] = ["drop"] * (proto4m.PIPELINE_MAX_RETRIES + 1)
+
+    with pytest.raises(ECommException) as e:
+        proto4m.do_m4_requests(MTR, 1, M4Opcode.ReadTags, requests(3))
+
+    assert e.value.Reason == CommError.Timeout
+    assert link.sent_ids.count(link.sent_ids[1]) == proto4m.PIPELINE_MAX_RETRIES + 1
+    assert proto4m.activeDev.ioError
@@ -0,0 +1,59 @@
+from Logika.Meters.Types import BinaryType, TagKind
+from Logika.Protocols.M4.M4Protocol import updTagsFlags
+from Logika.Protocols.M4.conftest import m_float
+
+FLASH_SIZE = 0x400
+
+
+def flash_image():
+    flash = bytearray(b"\xFF" * FLASH_SIZE)
+    flash[0x3E:0x42] = m_float(20.5)  # на границе страниц 0 и 1
+    flash[0x100:0x108] = (1000).to_bytes(4, 'little', signed=True) + m_float(0.25)
+    flash[0x200:0x210] = b"\x01\x00\x00\x00" + b"12.5\x00\x00\x00\x00" + bytes(4)
+    flash[0x3C0:0x3C4] = m_float(3.0)
+    return flash
+
+
+def test_update4L_tags_values_reads_flash_image(meter4l, proto4l):
+    ram = bytearray(0x40)
+    ram[0x10:0x13] = bytes((12, 30, 45))
+    ram[0x20:0x24] = m_float(0.5)
+
+    t_flash = meter4l.add_tag("t", BinaryType.r32, 0x3E, TagKind.Realtime)
+    v_total = meter4l.add_tag("V", BinaryType.i32r32, 0x100, TagKind.TotalCtr)
+    p_db = meter4l.add_tag("P", BinaryType.dbentry, 0x200)
+    t_ram = meter4l.add_tag("time", BinaryType.time, 0x10, TagKind.Realtime, in_ram=True)
+    w_addon = meter4l.add_tag("W", BinaryType.r32, 0x3C0, TagKind.TotalCtr, addon=0x20)
+    tags = [t_flash, v_total, p_db, t_ram, w_addon]
+
+    proto = proto4l(flash_image(), ram)
+    mi = proto.get_meter_instance(meter4l, 1)
+    proto.update4L_tags_values(1, tags, mi, updTagsFlags.DontGetEUs)
+
+    assert t_flash.Value == 20.5
+    assert v_total.Value == 1000.25
+    assert p_db.Value == "12.5"
+    assert p_db.Oper is True
+    assert t_flash.Oper is False
+    assert t_ram.Value == "12:30:45"
+    assert w_addon.Value == 3.5
+
+    # страницы всех тэгов прочитаны запросами планировщика, без повторов
+    pages = [p for st, ct in proto.connection.flash_reads() for p in range(st, st + ct)]
+    assert len(pages) == len(set(pages))
+    assert {0, 1, 4, 8, 15} <= set(pages)
+
+
+def test_update4L_tags_values_uses_cached_pages(meter4l, proto4l):
+    tag = meter4l.add_tag("t", BinaryType.r32, 0x3E, TagKind.Realtime)
+    meter4l.add_tag("W", BinaryType.r32, 0x3C0, TagKind.TotalCtr)
+    proto = proto4l(flash_image())
+    mi = proto.get_meter_instance(meter4l, 1)
+
+    proto.update4L_tags_values(1, [tag], mi, updTagsFlags.DontGetEUs)
+    n = len(proto.connection.requests)
+    proto.update4L_tags_values(1, [tag], mi, updTagsFlags.DontGetEUs)
+
+    assert tag.Value == 20.5
+    assert len(proto.connection.requests) == n
+
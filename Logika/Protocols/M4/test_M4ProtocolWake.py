@@ -0,0 +1,72 @@
+import time
+
+from Logika.Connections.SerialConnection import SerialConnection, BaudRate
+from Logika.Protocols.M4.M4Protocol import M4Protocol
+
+
+# последовательный порт без данных на приеме: write() возвращает управление сразу, как у драйвера с буфером
+class QuietSerialLink(SerialConnection):
+    def __init__(self, baud: BaudRate):
+        super().__init__(200, "test")
+        self.baud = baud
+
+    @property
+    def baud_rate(self):
+        return self.baud
+
+    def set_stop_bits(self, stop_bits):
+        pass
+
+    def set_params(self, baud_rate, data_bits, stop_bits, parity):
+        self.baud = baud_rate
+
+    def dispose(self, disposing: bool):
+        pass
+
+    def internal_open(self, connect_details: str):
+        pass
+
+    def internal_close(self):
+        pass
+
+    def internal_read(self, buf, start: int, max_length: int) -> int:
+        return 0
+
+    def internal_write(self, buf, start: int, n_bytes: int):
+        pass
+
+    def on_set_read_timeout(self, new_timeout: int):
+        pass
+
+    def internal_purge_comms(self, what):
+        pass
+
+    def is_conflicting_with(self, target):
+        return False
+
+
+def make_proto(baud: BaudRate) -> M4Protocol:
+    link = QuietSerialLink(baud)
+    link.open()
+    proto = M4Protocol()
+    proto.connection = link
+    return proto
+
+
+def test_fast_wake_waits_for_ff_transmission():
+    proto = make_proto(BaudRate.b2400)
+    link = proto.connection
+    tx = link.tx_time(len(proto.WAKEUP_SEQUENCE))
+    assert abs(tx - 16 * 11 / 2400) < 1e-9
+
+    t0 = time.monotonic()
+    proto.send_attention(False)
+    proto.wait_wake_idle(False)
+    assert time.monotonic() - t0 >= tx + link.frame_gap
+
+
+def test_slow_wake_does_not_add_transmit_time():
+    proto = make_proto(BaudRate.b2400)
+    t0 = time.monotonic()
+    proto.wait_wake_idle(True)
+    assert time.monotonic() - t0 < proto.connection.tx_time(len(proto.WAKEUP_SEQUENCE))
@@ -0,0 +1,51 @@
+from types import SimpleNamespace
+
+from Logika.Meters.Types import TagKind
+from Logika.Protocols.M4.M4Protocol import M4Protocol
+from Logika.Protocols.M4.ReadPlan import ReadPlan
+
+NBASE = 10000
+
+
+def tag(ch: int, ordinal: int, kind=TagKind.Realtime, element_type="Single"):
+    return SimpleNamespace(Channel=SimpleNamespace(No=ch), Ordinal=ordinal,
+                           deffinition=SimpleNamespace(ElementType=element_type, Kind=kind))
+
+
+def test_compile_matches_build_tags_request():
+    tags = [tag(0, 3), tag(1, 0x104), tag(0, 2 * NBASE + 7)]
+    plan = ReadPlan.compile(tags, 10, NBASE)
+
+    ref = M4Protocol().build_tags_request([t.Channel.No for t in tags], [t.Ordinal for t in tags])
+    assert plan.requests == [bytes(ref)]
+    assert plan.block_ordinals == [[3, 0x104, 7]]
+    assert plan.tag_slots == [(0, 0), (0, 1), (0, 2)]
+
+
+def test_duplicates_read_once():
+    tags = [tag(1, 5), tag(2, 5), tag(1, 5)]
+    plan = ReadPlan.compile(tags, 10, NBASE)
+    assert plan.block_ordinals == [[5, 5]]
+    assert plan.tag_slots == [(0, 0), (0, 1), (0, 0)]
+
+
+def test_split_by_tag_count_and_reply_budget():
+    plan = ReadPlan.compile([tag(0, i) for i in range(7)], 3, NBASE)
+    assert plan.request_count == 3
+    assert [len(o) for o in plan.block_ordinals] == [3, 3, 1]
+    assert plan.tag_slots[3] == (1, 0) and plan.tag_slots[6] == (2, 0)
+
+    # строковые параметры: 34 + 3 байта на тэг, в REPLY_BUDGET (240) помещается 6
+    plan = ReadPlan.compile([tag(0, i, TagKind.Parameter, "String") for i in range(8)], 100, NBASE)
+    assert [len(o) for o in plan.block_ordinals] == [6, 2]
+    assert all(len(r) == 5 * len(o) for r, o in zip(plan.requests, plan.block_ordinals))
+
+
+def test_get_read_plan_cached_per_meter_limit_and_tags():
+    proto = M4Protocol()
+    tags = [tag(0, 1), tag(0, 2)]
+    plan = proto.get_read_plan("m", tags, 10)
+    assert proto.get_read_plan("m", [tag(0, 1), tag(0, 2)], 10) is plan
+    assert proto.get_read_plan("m", tags, 1) is not plan
+    assert proto.get_read_plan("m2", tags, 10) is not plan
+    assert proto.get_read_plan("m", tags[::-1], 10) is not plan
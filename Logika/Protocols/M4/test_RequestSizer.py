@@ -0,0 +1,89 @@
+import pytest
+
+from Logika.ECommException import ECommException, CommError
+from Logika.Protocols.M4.RequestSizer import SizeController, RequestSizer
+
+
+def succeed(ctl: SizeController, n: int):
+    for _ in range(n):
+        ctl.on_success(0, 0)
+
+
+def test_no_growth_past_proven_size_without_probe():
+    ctl = SizeController(8, 1, 16)
+    succeed(ctl, SizeController.PROBE_AFTER - 1)
+    assert ctl.value == 8
+    succeed(ctl, 1)
+    assert ctl.value == 9 and ctl.probing
+
+
+def test_failed_probe_returns_to_proven_and_caps_growth():
+    ctl = SizeController(8, 1, 16)
+    succeed(ctl, SizeController.PROBE_AFTER)
+    ctl.on_failure()
+    assert (ctl.value, ctl.proven, ctl.threshold) == (8, 8, 8)
+    succeed(ctl, 3 * SizeController.PROBE_AFTER)
+    assert ctl.value == 8
+
+
+def test_failure_at_proven_size_halves_then_doubles_back_to_it():
+    ctl = SizeController(24, 1, 48)
+    succeed(ctl, SizeController.PROBE_AFTER)
+    succeed(ctl, 1)
+    assert ctl.proven == 27
+    ctl.on_failure()
+    assert (ctl.value, ctl.proven) == (13, 13)
+    succeed(ctl, SizeController.PROBE_AFTER)
+    assert ctl.value == 14
+
+
+def test_save_and_load_keep_proven_size_not_probe(tmp_path):
+    path = str(tmp_path / RequestSizer.FILE_NAME)
+    sizer = RequestSizer(path)
+    ctl = sizer.get("COM1", "СПТ941").pages
+    succeed(ctl, SizeController.PROBE_AFTER)
+    assert ctl.value == 9 and ctl.proven == 8
+    sizer.save()
+
+    restored = RequestSizer(path).get("COM1", "СПТ941").pages
+    assert (restored.value, restored.proven) == (8, 8)
+
+
+def test_broken_file_is_ignored(tmp_path):
+    path = tmp_path / RequestSizer.FILE_NAME
+    path.write_text("{", encoding="utf-8")
+    assert RequestSizer(str(path)).get("COM1", "СПТ941").pages.value == 8
+
+
+def test_error_reply_is_a_size_failure(meter4l, proto4l):
+    proto = proto4l(bytes(0x40 * 32))
+    proto.connection.max_pages = 9
+    ctl = proto.sizing(meter4l).pages
+    ctl.RATE_DROP = 0.0  # размер здесь определяют только отказы, а не замеры скорости
+
+    for _ in range(SizeController.PROBE_AFTER):
+        proto.read_flash_pages(meter4l, 1, 0, 8)
+    assert ctl.value == 9
+    for _ in range(SizeController.PROBE_AFTER):
+        proto.read_flash_pages(meter4l, 1, 0, 9)
+    assert ctl.value == 10
+
+    with pytest.raises(ECommException) as e:
+        proto.read_flash_pages(meter4l, 1, 0, 10)
+    assert e.value.Reason == CommError.ErrorReply
+    assert (ctl.value, ctl.threshold) == (9, 9)
+
+
+def test_sizes_persist_in_flash_store_dir(meter4l, proto4l, tmp_path):
+    proto = proto4l(bytes(0x40 * 16))
+    proto.flash_store_dir = str(tmp_path)
+    ctl = proto.sizing(meter4l).pages
+    ctl.RATE_DROP = 0.0
+    for _ in range(SizeController.PROBE_AFTER + 1):
+        proto.read_flash_pages(meter4l, 1, 0, 9)
+    assert ctl.proven == 9
+    proto.internal_close_comm_session(None, 1)
+
+    again = proto4l(bytes(0x40 * 16))
+    again.flash_store_dir = str(tmp_path)
+    assert again.sizing(meter4l).pages.proven == 9
@@ -0,0 +1,74 @@
+from Logika.Meters.Types import BinaryType, TagKind
+from Logika.Protocols.M4.TagValueCache import TagValueCache
+from Logika.Protocols.M4.conftest import m_float
+
+
+def ram_reads(proto):
+    return sum(1 for op, _ in proto.connection.requests if op.name == "ReadRam")
+
+
+def test_value_is_served_from_cache_within_ttl(meter4l, proto4l):
+    ram = bytearray(0x40)
+    ram[0x10:0x14] = m_float(1.5)
+    tag = meter4l.add_tag("G", BinaryType.r32, 0x10, TagKind.Realtime, in_ram=True, update_rate=2)
+    meter4l.add_tag("V", BinaryType.r32, 0x80, TagKind.TotalCtr)
+    proto = proto4l(bytes(0x100), ram)
+    now = [100.0]
+    proto.get_meter_instance(meter4l, 1).tag_cache = TagValueCache(clock=lambda: now[0])
+
+    proto.update_tags(None, 1, [tag])
+    assert tag.Value == 1.5 and ram_reads(proto) == 1
+
+    proto.connection.ram[0x10:0x14] = m_float(2.5)
+    now[0] += 1.9
+    tag.Value = None
+    proto.update_tags(None, 1, [tag])
+    assert tag.Value == 1.5 and ram_reads(proto) == 1
+
+    now[0] += 0.2
+    proto.update_tags(None, 1, [tag])
+    assert tag.Value == 2.5 and ram_reads(proto) == 2
+    assert proto.tag_cache_report(1)["hits"] == 1
+    assert proto.tag_cache_report(1)["misses"] == 2
+
+
+def test_force_refresh_bypasses_cache(meter4l, proto4l):
+    tag = meter4l.add_tag("G", BinaryType.r32, 0x10, TagKind.Parameter, in_ram=True)
+    meter4l.add_tag("V", BinaryType.r32, 0x80, TagKind.TotalCtr)
+    proto = proto4l(bytes(0x100), bytes(0x40))
+
+    proto.update_tags(None, 1, [tag])
+    proto.update_tags(None, 1, [tag], force_refresh=True)
+    assert ram_reads(proto) == 2
+
+
+def test_ttl_by_kind_when_update_rate_is_zero(meter4l):
+    cache = TagValueCache()
+    param = meter4l.add_tag("P", BinaryType.r32, 0, TagKind.Parameter)
+    total = meter4l.add_tag("V", BinaryType.r32, 0, TagKind.TotalCtr)
+    assert cache.ttl(param) == TagValueCache.KIND_TTL[TagKind.Parameter]
+    assert cache.ttl(total) == TagValueCache.KIND_TTL[TagKind.TotalCtr]
+
+
+def test_invalidate_flash_cache4L_evicts_cached_tag(meter4l, proto4l):
+    flash = bytearray(0x100)
+    flash[0x3E:0x42] = m_float(7.0)
+    tag = meter4l.add_tag("P", BinaryType.r32, 0x3E, TagKind.Parameter)
+    meter4l.add_tag("V", BinaryType.r32, 0xC0, TagKind.TotalCtr)
+    proto = proto4l(flash)
+    mi = proto.get_meter_instance(meter4l, 1)
+
+    proto.update_tags(None, 1, [tag])
+    assert tag.Value == 7.0
+    assert mi.tag_cache.fill(proto.tag_cache_key(mi, tag), tag)
+    assert mi.pageMap[0] and mi.pageMap[1]
+
+    proto.connection.flash[0x3E:0x42] = m_float(8.0)
+    proto.invalidate_flash_cache4L(1, [tag])
+    assert not mi.tag_cache.fill(proto.tag_cache_key(mi, tag), tag)
+    assert not mi.pageMap[0] and not mi.pageMap[1]
+
+    reads = len(proto.connection.flash_reads())
+    proto.update_tags(None, 1, [tag])
+    assert tag.Value == 8.0
+    assert len(proto.connection.flash_reads()) > reads
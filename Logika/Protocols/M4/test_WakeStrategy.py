@@ -0,0 +1,40 @@
+from Logika.Protocols.M4.WakeStrategy import WakeStrategy, WakeMode
+
+
+class Clock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+def test_learns_fast_wake_per_meter():
+    clock = Clock()
+    ws = WakeStrategy(clock)
+    assert ws.choose(1, True) == WakeMode.Skip
+    assert ws.choose(1, False) == WakeMode.Fast
+    assert ws.choose(1, False, prefer_fast=False) == WakeMode.Slow
+
+    ws.report(1, WakeMode.Fast, False)
+    assert ws.choose(1, False) == WakeMode.Slow
+    assert ws.choose(2, False) == WakeMode.Fast
+
+    # медленное пробуждение не меняет выученного, быстрое пробуется снова через RELEARN_INTERVAL
+    ws.report(1, WakeMode.Slow, True)
+    clock.t = WakeStrategy.RELEARN_INTERVAL - 1
+    assert ws.choose(1, False) == WakeMode.Slow
+    clock.t = WakeStrategy.RELEARN_INTERVAL
+    assert ws.choose(1, False) == WakeMode.Fast
+
+    ws.report(1, WakeMode.Fast, True)
+    assert ws.choose(1, False) == WakeMode.Fast
+    assert ws.report_text() == "Skip: 0/0, Fast: 1/2, Slow: 1/1"
+
+
+def test_fallback_chain():
+    ws = WakeStrategy(Clock())
+    assert ws.fallback(1, WakeMode.Skip) == WakeMode.Fast
+    assert ws.fallback(1, WakeMode.Skip, prefer_fast=False) == WakeMode.Slow
+    assert ws.fallback(1, WakeMode.Fast) == WakeMode.Slow
+    assert ws.fallback(1, WakeMode.Slow) is None
@@ -16,8 +16,7 @@ from Logika.Meters.Types import BusProtocolType, ArchiveType
 from Logika.Meters.__4L.Logika4L import Logika4L
 from Logika.Protocols.M4.ErrorCode import ErrorCode
 from Logika.Protocols.M4.M4Opcode import M4Opcode
-from Logika.Protocols.M4.M4Protocol import M4Protocol
-from Logika.Protocols.SPBus.SPBusProtocol import SPBusProtocol
+from Logika.Utils.Checksum import Crc16
 
 
 class ProtoEvent(Enum):
@@ -84,10 +83,10 @@ class Protocol(ABC):
 
     @connection.setter
     def connection(self, value):
+        if self.cn is not None:
+            self.cn.on_bus_state_reset.remove_handler(self.reset_internal_bus_state)
         if value is not None:
-            value.busTrackerResetEvent += self.reset_internal_bus_state
-        elif self.cn is not None:
-            self.cn.busTrackerResetEvent -= self.reset_internal_bus_state
+            value.on_bus_state_reset.add_handler(self.reset_internal_bus_state)
         self.cn = value
 
     def log(self, level, msg, exc=None):
@@ -155,7 +154,7 @@ class Protocol(ABC):
         # return SPBusProtocol.MeterTypeFromResponse(p099, model)
         pass
 
-    def detect_m4(self, bus: M4Protocol):
+    def detect_m4(self, bus: 'M4Protocol'):
         model = ""
         reply = bus.handshake(bytes([0xFF]), bytearray([0]), False)
         dump = reply.getDump()
@@ -170,6 +169,9 @@ class Protocol(ABC):
 
     def autodetect_spt_stable(self, conn: Connection, fixedBaudRate: BaudRate, tryM4: bool, trySPBus: bool,
                               tryMEK: bool):
+        # M4Protocol и SPBusProtocol - наследники Protocol, импорт при вызове
+        from Logika.Protocols.M4.M4Protocol import M4Protocol
+        from Logika.Protocols.SPBus.SPBusProtocol import SPBusProtocol
         m = None
         model = ""
         bus4 = M4Protocol()
@@ -228,6 +230,9 @@ class Protocol(ABC):
 
     @staticmethod
     def detect_response(c: Connection):
+        # M4Protocol и SPBusProtocol - наследники Protocol, импорт при вызове
+        from Logika.Protocols.M4.M4Protocol import M4Protocol
+        from Logika.Protocols.SPBus.SPBusProtocol import SPBusProtocol
         rxDetected = False
         dump = None
         model = None
@@ -263,8 +268,7 @@ class Protocol(ABC):
                         if iETX < 0 or (iETX > 0 and p < iETX + 4):
                             break
 
-                    crc = 0
-                    Protocol.crc16(crc, buf, 2, iETX + 2)
+                    crc = Protocol.crc16(0, buf, 2, iETX + 2)
 
                     if crc != 0:
                         raise ECommException(ExcSeverity.Error, CommError.Checksum)
@@ -281,7 +285,7 @@ class Protocol(ABC):
                 elif buf[2] == M4Opcode.Handshake:
                     c.read(buf, 6, 2)
                     cs = buf[6]
-                    calculatedCheck = ~Logika4.Checksum8(buf, 1, 5) & 0xFF
+                    calculatedCheck = ~Logika4.checksum8(buf, 1, 5) & 0xFF
 
                     if cs != calculatedCheck:
                         raise ECommException(ExcSeverity.Error, CommError.Checksum)
@@ -311,6 +315,9 @@ class Protocol(ABC):
     @staticmethod
     def autodetect_spt(conn: Connection, fixedBaudRate: BaudRate, waitTimeout: int, tryM4: bool, trySPBus: bool,
                        tryMEK: bool, srcAddr: bytearray, dstAddr: bytearray):
+        # M4Protocol и SPBusProtocol - наследники Protocol, импорт при вызове
+        from Logika.Protocols.M4.M4Protocol import M4Protocol
+        from Logika.Protocols.SPBus.SPBusProtocol import SPBusProtocol
         m = None
         model = ""
 
@@ -408,14 +415,4 @@ class Protocol(ABC):
 
     @staticmethod
     def crc16(crc, buf: bytearray, offset: int, length: int):
-        while length > 0:
-            crc ^= (buf[offset] << 8) & 0xFFFF
-            for j in range(8):
-                if (crc & 0x8000) != 0:
-                    crc = ((crc << 1) ^ 0x1021) & 0xFFFF
-                else:
-                    crc = (crc << 1) & 0xFFFF
-            offset += 1
-            length -= 1
-
-        return crc
+        return Crc16.compute(crc, buf, offset, length)
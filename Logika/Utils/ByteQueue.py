@@ -1,15 +1,31 @@
+from typing import Callable
+
+
 class ByteQueue:
+    # ниже порога данные копируются срезом и принимаются через recv, а не memoryview / recv_into в кольцо.
+    # кадры M4 (69 Б - 1 КБ) всегда ниже порога: прием кадра - одна копия, без копирования отдается только
+    # содержимое принятого кадра (dequeue_view). замер bench.py frame_copy, мкс на кадр:
+    #   enqueue/dequeue  срез 1.3 / 1.4 / 1.6 / 1.8 / 2.1, memoryview 1.7 / 1.8 / 1.9 / 2.2 / 2.4  (69 Б, 300 Б, 1/4/8 КБ)
+    #   прием            recv 3.6 / 3.8 / 4.2 / 4.8 / 5.4, recv_into  4.0 / 4.2 / 4.3 / 4.9 / 5.3
+    # recv_into догоняет recv между 4 и 8 КБ - отсюда порог
+    SMALL_COPY = 0x1000
+
     def __init__(self, initial_size: int):
         self.fHead = 0
         self.fTail = 0
         self.fSize = 0
         self.fSizeUntilCut = initial_size
         self.fInternalBuffer = bytearray(initial_size)
+        self.fView = memoryview(self.fInternalBuffer)
 
     @property
     def length(self) -> int:
         return self.fSize
 
+    @property
+    def capacity(self) -> int:
+        return len(self.fInternalBuffer)
+
     def clear(self, size: int = None):
         if size is None:
             self.fHead = 0
@@ -17,85 +33,215 @@ class ByteQueue:
             self.fSize = 0
             self.fSizeUntilCut = len(self.fInternalBuffer)
         else:
-            if size > self.fSize:
-                size = self.fSize
+            self.consume(size)
 
-            if size == 0:
-                return
+    def consume(self, size: int):
+        if size > self.fSize:
+            size = self.fSize
 
-            self.fHead = (self.fHead + size) % len(self.fInternalBuffer)
-            self.fSize -= size
+        if size == 0:
+            return
+
+        self.fHead = (self.fHead + size) % len(self.fInternalBuffer)
+        self.fSize -= size
 
-            if self.fSize == 0:
-                self.fHead = 0
-                self.fTail = 0
+        if self.fSize == 0:
+            self.fHead = 0
+            self.fTail = 0
 
-            self.fSizeUntilCut = len(self.fInternalBuffer) - self.fHead
+        self.fSizeUntilCut = len(self.fInternalBuffer) - self.fHead
 
     def set_capacity(self, capacity: int):
         newBuffer = bytearray(capacity)
 
         if self.fSize > 0:
-            if self.fHead < self.fTail:
-                newBuffer[:self.fSize] = self.fInternalBuffer[self.fHead:self.fHead + self.fSize]
-            else:
-                rightLength = len(self.fInternalBuffer) - self.fHead
-                newBuffer[:rightLength] = self.fInternalBuffer[self.fHead:self.fHead + rightLength]
-                newBuffer[rightLength:rightLength + self.fTail] = self.fInternalBuffer[:self.fTail]
+            rightLength = min(self.fSize, len(self.fInternalBuffer) - self.fHead)
+            newBuffer[:rightLength] = self.fView[self.fHead:self.fHead + rightLength]
+            if rightLength < self.fSize:
+                newBuffer[rightLength:self.fSize] = self.fView[:self.fSize - rightLength]
 
         self.fHead = 0
-        self.fTail = self.fSize
+        self.fTail = self.fSize % capacity if capacity > 0 else 0
         self.fInternalBuffer = newBuffer
+        self.fView = memoryview(newBuffer)
+        self.fSizeUntilCut = capacity
+
+    def grow(self, required: int):
+        capacity = max(len(self.fInternalBuffer), 0x40)
+        while capacity < required:
+            capacity <<= 1
+        self.set_capacity(capacity)
 
     def enqueue(self, buffer: bytes, offset: int, size: int):
         if size == 0:
             return
 
         if (self.fSize + size) > len(self.fInternalBuffer):
-            self.set_capacity((self.fSize + size + 2047) & ~2047)
-
-        if self.fHead < self.fTail:
-            rightLength = len(self.fInternalBuffer) - self.fTail
+            self.grow(self.fSize + size)
+
+        buf = self.fInternalBuffer
+        bufLength = len(buf)
+        # целый буфер передается как есть; короткий кусок дешевле скопировать срезом, длинный - через memoryview
+        if offset == 0 and size == len(buffer):
+            src = buffer
+        elif size < self.SMALL_COPY:
+            src = buffer[offset:offset + size]
+        else:
+            src = memoryview(buffer)[offset:offset + size]
+        tail = self.fTail
+        rightLength = bufLength - tail
 
-            if rightLength >= size:
-                self.fInternalBuffer[self.fTail:self.fTail + size] = buffer[offset:offset + size]
-            else:
-                self.fInternalBuffer[self.fTail:self.fTail + rightLength] = buffer[offset:offset + rightLength]
-                self.fInternalBuffer[:size - rightLength] = buffer[offset + rightLength:offset + size]
+        if rightLength >= size:
+            buf[tail:tail + size] = src
         else:
-            self.fInternalBuffer[self.fTail:self.fTail + size] = buffer[offset:offset + size]
+            if size >= self.SMALL_COPY:
+                src = memoryview(src)
+            buf[tail:] = src[:rightLength]
+            buf[:size - rightLength] = src[rightLength:]
 
-        self.fTail = (self.fTail + size) % len(self.fInternalBuffer)
+        tail += size
+        self.fTail = tail if tail < bufLength else tail - bufLength
         self.fSize += size
-        self.fSizeUntilCut = len(self.fInternalBuffer) - self.fHead
+        self.fSizeUntilCut = bufLength - self.fHead
 
-    def dequeue(self, buffer: bytes, offset: int, size: int):
+    def dequeue(self, buffer: bytearray, offset: int, size: int) -> int:
         if size > self.fSize:
             size = self.fSize
 
         if size == 0:
             return 0
 
-        if self.fHead < self.fTail:
-            buffer[offset:offset + size] = self.fInternalBuffer[self.fHead:self.fHead + size]
+        head = self.fHead
+        bufLength = len(self.fInternalBuffer)
+        rightLength = bufLength - head
+        # короткие куски дешевле скопировать обычным срезом, чем создавать memoryview
+        src = self.fInternalBuffer if size < self.SMALL_COPY else self.fView
+        if rightLength >= size:
+            buffer[offset:offset + size] = src[head:head + size]
+        else:
+            buffer[offset:offset + rightLength] = src[head:]
+            buffer[offset + rightLength:offset + size] = src[:size - rightLength]
+
+        left = self.fSize - size
+        self.fSize = left
+        if left == 0:
+            self.fHead = 0
+            self.fTail = 0
+            self.fSizeUntilCut = bufLength
         else:
-            rightLength = len(self.fInternalBuffer) - self.fHead
+            head += size
+            if head >= bufLength:
+                head -= bufLength
+            self.fHead = head
+            self.fSizeUntilCut = bufLength - head
+        return size
 
-            if rightLength >= size:
-                buffer[offset:offset + size] = self.fInternalBuffer[self.fHead:self.fHead + size]
-            else:
-                buffer[offset:offset + rightLength] = self.fInternalBuffer[self.fHead:self.fHead + rightLength]
-                buffer[offset + rightLength:offset + size] = self.fInternalBuffer[:size - rightLength]
+    # size байт с головы очереди без копирования, если они не пересекают точку разреза кольца (иначе - копия).
+    # представление действительно до следующей записи в очередь
+    def dequeue_view(self, size: int) -> memoryview:
+        if size > self.fSize:
+            size = self.fSize
 
-        self.fHead = (self.fHead + size) % len(self.fInternalBuffer)
-        self.fSize -= size
+        head = self.fHead
+        if len(self.fInternalBuffer) - head >= size:
+            view = self.fView[head:head + size]
+            self.consume(size)
+            return view
+
+        buf = bytearray(size)
+        self.dequeue(buf, 0, size)
+        return memoryview(buf)
+
+    def peek(self, buffer: bytearray, offset: int, size: int) -> int:
+        if size > self.fSize:
+            size = self.fSize
 
+        head = self.fHead
+        rightLength = len(self.fInternalBuffer) - head
+        if rightLength >= size:
+            buffer[offset:offset + size] = self.fView[head:head + size]
+        else:
+            buffer[offset:offset + rightLength] = self.fView[head:]
+            buffer[offset + rightLength:offset + size] = self.fView[:size - rightLength]
+
+        return size
+
+    # непрерывная свободная область после хвоста очереди - для записи без промежуточного копирования
+    # (socket.recv_into и т.п.), после записи длина фиксируется вызовом commit()
+    def writable_view(self, min_size: int = 1) -> memoryview:
+        bufLength = len(self.fInternalBuffer)
         if self.fSize == 0:
             self.fHead = 0
             self.fTail = 0
+            self.fSizeUntilCut = bufLength
+        else:
+            # свободно до конца буфера или до головы; у полного буфера хвост совпадает с головой
+            tail = self.fTail
+            end = bufLength if tail >= self.fHead and self.fSize < bufLength else self.fHead
+            if end - tail >= min_size:
+                return self.fView[tail:end]
+
+        if self.contiguous_free() < min_size:
+            self.grow(self.fSize + min_size)
+            if self.contiguous_free() < min_size:
+                self.set_capacity(len(self.fInternalBuffer) * 2)
+
+        end = len(self.fInternalBuffer) if self.fTail >= self.fHead else self.fHead
+        return self.fView[self.fTail:end]
+
+    def contiguous_free(self) -> int:
+        if self.fSize == len(self.fInternalBuffer):
+            return 0
+        if self.fTail >= self.fHead:
+            return len(self.fInternalBuffer) - self.fTail
+        return self.fHead - self.fTail
 
-        self.fSizeUntilCut = len(self.fInternalBuffer) - self.fHead
-        return size
+    def commit(self, size: int):
+        if size <= 0:
+            return
+
+        bufLength = len(self.fInternalBuffer)
+        tail = self.fTail + size
+        self.fTail = tail if tail < bufLength else tail - bufLength
+        self.fSize += size
+        self.fSizeUntilCut = bufLength - self.fHead
+
+    # recv - необязательное чтение в новый буфер (socket.recv): короткий кусок дешевле принять им
+    # и скопировать срезом, чем готовить представление свободной области кольца
+    def readinto(self, reader: Callable[[memoryview], int], size: int,
+                 recv: Callable[[int], bytes] = None) -> int:
+        if recv is not None and size < self.SMALL_COPY:
+            chunk = recv(size)
+            self.enqueue(chunk, 0, len(chunk))
+            return len(chunk)
+
+        view = self.writable_view(size)
+        n = reader(view[:size] if len(view) > size else view)
+        self.commit(n)
+        return n
+
+    # непрерывная область с головы очереди (до точки разреза кольца), без копирования
+    def readable_view(self) -> memoryview:
+        rightLength = min(self.fSize, len(self.fInternalBuffer) - self.fHead)
+        return self.fView[self.fHead:self.fHead + rightLength]
+
+    def readable_views(self) -> tuple[memoryview, memoryview]:
+        rightLength = min(self.fSize, len(self.fInternalBuffer) - self.fHead)
+        return self.fView[self.fHead:self.fHead + rightLength], self.fView[:self.fSize - rightLength]
+
+    def find(self, value: int, start: int = 0) -> int:
+        if start >= self.fSize:
+            return -1
+
+        rightLength = min(self.fSize, len(self.fInternalBuffer) - self.fHead)
+        if start < rightLength:
+            i = self.fInternalBuffer.find(value, self.fHead + start, self.fHead + rightLength)
+            if i >= 0:
+                return i - self.fHead
+            start = rightLength
+
+        i = self.fInternalBuffer.find(value, start - rightLength, self.fSize - rightLength)
+        return i + rightLength if i >= 0 else -1
 
     def peek_one(self, index: int):
         return self.fInternalBuffer[index - self.fSizeUntilCut] if index >= self.fSizeUntilCut else \
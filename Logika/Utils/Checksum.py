@@ -0,0 +1,66 @@
+import binascii
+
+
+def _crc16_table(poly: int) -> tuple:
+    table = []
+    for b in range(256):
+        crc = b << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ poly) & 0xFFFF if crc & 0x8000 else (crc << 1) & 0xFFFF
+        table.append(crc)
+    return tuple(table)
+
+
+CRC16_TABLE = _crc16_table(0x1021)
+
+
+def _fold_table(crc: int, data) -> int:
+    table = CRC16_TABLE
+    for b in memoryview(data).cast('B'):
+        crc = ((crc << 8) & 0xFF00) ^ table[(crc >> 8) ^ b]
+    return crc
+
+
+def _fold_hqx(crc: int, data) -> int:
+    return binascii.crc_hqx(data, crc)
+
+
+# CRC16-CCITT (полином 0x1021, без отражения, начальное значение задается вызывающим) - контрольная сумма
+# расширенных пакетов M4 и пакетов СПСеть
+class Crc16:
+    fold_table = staticmethod(_fold_table)
+    fold_hqx = staticmethod(_fold_hqx)
+    # основная реализация выбирается при загрузке модуля: binascii.crc_hqx считает тот же CRC на C,
+    # табличный вариант остается на случай расхождения
+    fold = fold_hqx if _fold_hqx(0x1D0F, b"\x10\x90\x01\x00\x03\x00\x01\xFF\x00") == \
+        _fold_table(0x1D0F, b"\x10\x90\x01\x00\x03\x00\x01\xFF\x00") else fold_table
+
+    def __init__(self, crc: int = 0):
+        self.value = crc
+
+    def update(self, data) -> 'Crc16':
+        self.value = Crc16.fold(self.value, data)
+        return self
+
+    @staticmethod
+    def compute(crc: int, buf, offset: int, length: int) -> int:
+        return Crc16.fold(crc, memoryview(buf)[offset:offset + length])
+
+
+# байтовая контрольная сумма пакетов M4 старого формата: 0xFF минус сумма байт (по модулю 256)
+class Checksum8:
+    def __init__(self):
+        self.sum = 0
+
+    def update(self, data) -> 'Checksum8':
+        self.sum += sum(memoryview(data).cast('B'))
+        return self
+
+    @property
+    def value(self) -> int:
+        return (0xFF - self.sum) & 0xFF
+
+    @staticmethod
+    def compute(buf, start: int, length: int) -> int:
+        # sum() по memoryview выполняется без создания промежуточных объектов на каждый байт
+        return (0xFF - sum(memoryview(buf)[start:start + length])) & 0xFF
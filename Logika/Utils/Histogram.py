@@ -0,0 +1,58 @@
+from bisect import bisect_left
+from typing import Sequence
+
+
+class Histogram:
+    # границы по умолчанию: задержки обмена в секундах и размеры пакетов в байтах
+    LATENCY_BOUNDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+    SIZE_BOUNDS = (8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 65536)
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        # последняя корзина - значения больше всех границ (+Inf)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def reset(self):
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+        self.sum = 0.0
+        self.count = 0
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        acc = 0
+        for i, n in enumerate(self.counts):
+            acc += n
+            if acc >= rank:
+                return self.bounds[i] if i < len(self.bounds) else float('inf')
+        return float('inf')
+
+    def snapshot(self) -> dict:
+        return {
+            "bounds": list(self.bounds),
+            "counts": list(self.counts),
+            "sum": self.sum,
+            "count": self.count,
+        }
+
+    # строки гистограммы в текстовом формате Prometheus (накопительные корзины)
+    def prometheus_lines(self, name: str, labels: str) -> list[str]:
+        sep = "," if labels else ""
+        lines = []
+        acc = 0
+        for bound, n in zip(self.bounds, self.counts):
+            acc += n
+            lines.append(f'{name}_bucket{{{labels}{sep}le="{bound:g}"}} {acc}')
+        lines.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.count}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum:.6f}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
@@ -0,0 +1,97 @@
+from typing import Iterator, Tuple
+
+SHORT_SPAN = 16
+# маски коротких диапазонов: SPAN_MASKS[номер первого бита в байте][число страниц]
+SPAN_MASKS = [[((1 << n) - 1) << sh for n in range(SHORT_SPAN + 1)] for sh in range(8)]
+
+
+# битовая карта наличия страниц: один бит на страницу в bytearray.
+# проверки диапазонов выполняются над срезом карты как над одним целым (по словам, а не по страницам)
+class PageBitmap:
+    def __init__(self, count: int):
+        self.count = count
+        self.bits = bytearray((count + 7) // 8)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, page: int) -> bool:
+        if not 0 <= page < self.count:
+            raise IndexError(page)
+        return bool(self.bits[page >> 3] & (1 << (page & 7)))
+
+    def __setitem__(self, page: int, value: bool):
+        if not 0 <= page < self.count:
+            raise IndexError(page)
+        if value:
+            self.bits[page >> 3] |= 1 << (page & 7)
+        else:
+            self.bits[page >> 3] &= ~(1 << (page & 7)) & 0xFF
+
+    # биты страниц start..start+count-1 как целое, младший бит - страница start
+    def _window(self, start: int, count: int) -> int:
+        if count <= 0:
+            return 0
+        if start < 0 or start + count > self.count:
+            raise IndexError(start if start < 0 else start + count - 1)
+        sb = start >> 3
+        eb = (start + count + 7) >> 3
+        w = self.bits[sb] if eb - sb == 1 else int.from_bytes(self.bits[sb:eb], "little")
+        return (w >> (start & 7)) & ((1 << count) - 1)
+
+    def set_range(self, start: int, count: int, value: bool = True):
+        if count <= 0:
+            return
+        if start < 0 or start + count > self.count:
+            raise IndexError(start if start < 0 else start + count - 1)
+        sb = start >> 3
+        eb = (start + count + 7) >> 3
+        mask = ((1 << count) - 1) << (start & 7)
+        w = int.from_bytes(self.bits[sb:eb], "little")
+        w = w | mask if value else w & ~mask
+        self.bits[sb:eb] = w.to_bytes(eb - sb, "little")
+
+    def all_set(self, start: int, count: int) -> bool:
+        # короткий диапазон (элемент архива - 1..2 страницы) занимает не больше трех байт карты:
+        # байты собираются без среза и int.from_bytes, маска берется из таблицы
+        if 0 < count <= SHORT_SPAN and start >= 0 and start + count <= self.count:
+            m = SPAN_MASKS[start & 7][count]
+            i = start >> 3
+            if m < 0x100:
+                return self.bits[i] & m == m
+            bits = self.bits
+            w = bits[i] | bits[i + 1] << 8 | (bits[i + 2] << 16 if m >= 0x10000 else 0)
+            return w & m == m
+
+        if count <= 0:
+            return True
+        if start < 0 or start + count > self.count:
+            raise IndexError(start if start < 0 else start + count - 1)
+        sb = start >> 3
+        eb = (start + count + 7) >> 3
+        mask = ((1 << count) - 1) << (start & 7)
+        w = self.bits[sb] if eb - sb == 1 else int.from_bytes(self.bits[sb:eb], "little")
+        return w & mask == mask
+
+    # первая отсутствующая страница диапазона, -1 - все на месте
+    def first_missing(self, start: int, count: int) -> int:
+        missing = ~self._window(start, count) & ((1 << max(count, 0)) - 1)
+        if missing == 0:
+            return -1
+        return start + (missing & -missing).bit_length() - 1
+
+    # непрерывные участки отсутствующих страниц диапазона: (первая страница, число страниц)
+    def missing_runs(self, start: int, count: int) -> Iterator[Tuple[int, int]]:
+        end = start + count
+        p = self.first_missing(start, count)
+        while p >= 0:
+            w = self._window(p, end - p)
+            run = (w & -w).bit_length() - 1 if w else end - p
+            yield p, run
+            p = self.first_missing(p + run, end - p - run)
+
+    def set_count(self) -> int:
+        return sum(bin(b).count("1") for b in self.bits)
+
+    def clear(self):
+        self.bits[:] = bytes(len(self.bits))
@@ -0,0 +1,74 @@
+import socket
+
+import pytest
+
+from Logika.Utils.ByteQueue import ByteQueue
+
+
+# очередь, в которой голова стоит на offset: следующая запись пересекает точку разреза кольца
+def wrapped_queue(capacity: int, offset: int) -> ByteQueue:
+    q = ByteQueue(capacity)
+    q.enqueue(bytes(offset), 0, offset)
+    q.dequeue(bytearray(offset), 0, offset)
+    return q
+
+
+@pytest.mark.parametrize("size", [69, ByteQueue.SMALL_COPY + 69])
+def test_roundtrip_across_ring_cut(size):
+    data = bytes(i & 0xFF for i in range(size + 3))
+    q = wrapped_queue(size + 16, 12)
+    q.enqueue(data, 3, size)
+    assert q.length == size and q.capacity == size + 16
+
+    out = bytearray(size + 2)
+    assert q.dequeue(out, 1, size + 10) == size
+    assert out[1:size + 1] == data[3:]
+    assert q.length == 0
+
+
+def test_grow_keeps_order():
+    q = wrapped_queue(8, 6)
+    q.enqueue(b"abcd", 0, 4)
+    q.enqueue(b"efghijkl", 0, 8)
+    out = bytearray(12)
+    q.peek(out, 0, 12)
+    assert out == b"abcdefghijkl" and q.length == 12
+
+
+def test_find_and_peek_one_across_cut():
+    q = wrapped_queue(8, 5)
+    q.enqueue(b"\x00\x00\x00\x10\x00", 0, 5)
+    assert q.find(0x10) == 3
+    assert q.find(0x10, 4) == -1
+    assert q.peek_one(3) == 0x10
+
+
+def test_dequeue_view_copies_only_wrapped_frames():
+    q = ByteQueue(16)
+    q.enqueue(b"0123456789", 0, 10)
+    v = q.dequeue_view(4)
+    assert v.obj is q.fInternalBuffer and bytes(v) == b"0123"
+
+    q.enqueue(b"abcdefghij", 0, 10)  # хвост переходит через точку разреза
+    q.clear(6)
+    v = q.dequeue_view(8)
+    assert v.obj is not q.fInternalBuffer and bytes(v) == b"abcdefgh"
+
+
+@pytest.mark.parametrize("size", [69, ByteQueue.SMALL_COPY * 2])
+@pytest.mark.parametrize("use_recv", [True, False])
+def test_readinto_from_socket(size, use_recv):
+    a, b = socket.socketpair()
+    try:
+        data = bytes(i & 0xFF for i in range(size))
+        a.sendall(data)
+        q = wrapped_queue(size, size // 2)
+        n = 0
+        while n < size:
+            n += q.readinto(b.recv_into, size - n, b.recv if use_recv else None)
+        out = bytearray(size)
+        q.dequeue(out, 0, size)
+        assert out == data
+    finally:
+        a.close()
+        b.close()
@@ -0,0 +1,48 @@
+import random
+
+import pytest
+
+from Logika.Utils.Checksum import Crc16, Checksum8
+
+FRAME = b"\x10\x90\x01\x00\x03\x00\x01\xFF\x00"
+
+
+# побитовый расчет CRC16-CCITT, как в исходной реализации Protocol.crc16
+def crc16_bitwise(crc: int, data: bytes) -> int:
+    for b in data:
+        crc ^= b << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) & 0xFFFF if crc & 0x8000 else (crc << 1) & 0xFFFF
+    return crc
+
+
+def payloads():
+    rnd = random.Random(4)
+    return [b"", b"\x00", FRAME, bytes(range(256)), bytes(rnd.randrange(256) for _ in range(1000))]
+
+
+@pytest.mark.parametrize("fold", [Crc16.fold_table, Crc16.fold_hqx, Crc16.fold])
+@pytest.mark.parametrize("crc", [0, 0x1D0F, 0xFFFF])
+def test_crc16_matches_bitwise_reference(fold, crc):
+    for data in payloads():
+        assert fold(crc, data) == crc16_bitwise(crc, data)
+
+
+def test_crc16_incremental_and_offset():
+    data = payloads()[-1]
+    c = Crc16(0)
+    for i in range(0, len(data), 37):
+        c.update(memoryview(data)[i:i + 37])
+    assert c.value == crc16_bitwise(0, data)
+
+    buf = bytearray(b"\xAA\xAA" + FRAME + b"\x55")
+    assert Crc16.compute(0, buf, 2, len(FRAME)) == crc16_bitwise(0, FRAME)
+
+
+def test_checksum8():
+    data = payloads()[-1]
+    expected = (0xFF - sum(data)) & 0xFF
+    assert Checksum8.compute(data, 0, len(data)) == expected
+    assert Checksum8().update(data[:300]).update(data[300:]).value == expected
+    assert Checksum8.compute(b"\x00\x01\x02\x03", 1, 2) == 0xFF - 3
+    assert Checksum8().value == 0xFF
@@ -0,0 +1,30 @@
+import math
+
+from Logika.Utils.Histogram import Histogram
+
+
+def test_buckets_and_quantiles():
+    h = Histogram((1, 2, 5))
+    for v in (0.5, 1, 1.5, 2, 3, 7, 9):
+        h.observe(v)
+    assert h.counts == [2, 2, 1, 2]
+    assert h.count == 7 and math.isclose(h.sum, 24)
+    assert h.quantile(0.5) == 2
+    assert h.quantile(0.25) == 1
+    assert h.quantile(0.99) == float("inf")
+
+    h.reset()
+    assert h.counts == [0] * 4 and h.quantile(0.5) == 0.0
+
+
+def test_prometheus_lines_are_cumulative():
+    h = Histogram((0.1, 1))
+    for v in (0.05, 0.5, 0.7, 3):
+        h.observe(v)
+    assert h.prometheus_lines("lat", 'c="x"') == [
+        'lat_bucket{c="x",le="0.1"} 1',
+        'lat_bucket{c="x",le="1"} 3',
+        'lat_bucket{c="x",le="+Inf"} 4',
+        'lat_sum{c="x"} 4.250000',
+        'lat_count{c="x"} 4',
+    ]
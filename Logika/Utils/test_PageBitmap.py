@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from Logika.Utils.PageBitmap import PageBitmap
+
+
+def random_map(count: int, seed: int):
+    rnd = random.Random(seed)
+    flags = [rnd.random() < 0.8 for _ in range(count)]
+    bm = PageBitmap(count)
+    for p, f in enumerate(flags):
+        bm[p] = f
+    return flags, bm
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_ranges_match_page_list(seed):
+    flags, bm = random_map(45, seed)
+    for start in range(45):
+        for count in range(0, 45 - start + 1):
+            expected = all(flags[start:start + count])
+            assert bm.all_set(start, count) == expected, (start, count)
+            missing = [p for p in range(start, start + count) if not flags[p]]
+            assert bm.first_missing(start, count) == (missing[0] if missing else -1)
+
+
+def test_short_span_across_byte_boundaries():
+    bm = PageBitmap(24)
+    bm.set_range(6, 12)
+    assert bm.all_set(6, 12)  # три байта карты
+    assert bm.all_set(7, 2)
+    assert not bm.all_set(5, 2)
+    assert not bm.all_set(17, 2)
+    bm[15] = False
+    assert not bm.all_set(6, 12)
+    assert bm.all_set(16, 2)
+
+
+def test_missing_runs_and_set_range():
+    bm = PageBitmap(20)
+    bm.set_range(0, 20)
+    bm.set_range(3, 4, False)
+    bm[10] = False
+    bm.set_range(17, 3, False)
+    assert list(bm.missing_runs(0, 20)) == [(3, 4), (10, 1), (17, 3)]
+    assert list(bm.missing_runs(5, 8)) == [(5, 2), (10, 1)]
+    assert bm.set_count() == 12
+
+
+@pytest.mark.parametrize("start, count", [(-1, 2), (19, 2), (0, 21), (10, 20)])
+def test_out_of_range_raises(start, count):
+    bm = PageBitmap(20)
+    with pytest.raises(IndexError):
+        bm.all_set(start, count)
@@ -0,0 +1,669 @@
+import array
+import cProfile
+import pstats
+import socket
+import struct
+import sys
+import time
+import timeit
+from datetime import datetime
+
+from Logika.Connections.Connection import PurgeFlags
+from Logika.Connections.OfflineConnection import OfflineConnection
+from Logika.ECommException import ECommException, ExcSeverity, CommError
+from Logika.Protocols.M4.M4FrameBuilder import M4FrameBuilder
+from Logika.Protocols.M4.M4Opcode import M4Opcode
+from Logika.Utils.ByteQueue import ByteQueue
+from Logika.Utils.Checksum import Crc16, Checksum8
+
+SIZES = (64, 1024, 65536)
+
+
+# реализация очереди до перехода на memoryview - для сравнения
+class LegacyByteQueue:
+    def __init__(self, initial_size: int):
+        self.fHead = 0
+        self.fTail = 0
+        self.fSize = 0
+        self.fSizeUntilCut = initial_size
+        self.fInternalBuffer = bytearray(initial_size)
+
+    @property
+    def length(self) -> int:
+        return self.fSize
+
+    def set_capacity(self, capacity: int):
+        newBuffer = bytearray(capacity)
+
+        if self.fSize > 0:
+            if self.fHead < self.fTail:
+                newBuffer[:self.fSize] = self.fInternalBuffer[self.fHead:self.fHead + self.fSize]
+            else:
+                rightLength = len(self.fInternalBuffer) - self.fHead
+                newBuffer[:rightLength] = self.fInternalBuffer[self.fHead:self.fHead + rightLength]
+                newBuffer[rightLength:rightLength + self.fTail] = self.fInternalBuffer[:self.fTail]
+
+        self.fHead = 0
+        self.fTail = self.fSize
+        self.fInternalBuffer = newBuffer
+
+    def enqueue(self, buffer: bytes, offset: int, size: int):
+        if size == 0:
+            return
+
+        if (self.fSize + size) > len(self.fInternalBuffer):
+            self.set_capacity((self.fSize + size + 2047) & ~2047)
+
+        if self.fHead < self.fTail:
+            rightLength = len(self.fInternalBuffer) - self.fTail
+
+            if rightLength >= size:
+                self.fInternalBuffer[self.fTail:self.fTail + size] = buffer[offset:offset + size]
+            else:
+                self.fInternalBuffer[self.fTail:self.fTail + rightLength] = buffer[offset:offset + rightLength]
+                self.fInternalBuffer[:size - rightLength] = buffer[offset + rightLength:offset + size]
+        else:
+            self.fInternalBuffer[self.fTail:self.fTail + size] = buffer[offset:offset + size]
+
+        self.fTail = (self.fTail + size) % len(self.fInternalBuffer)
+        self.fSize += size
+        self.fSizeUntilCut = len(self.fInternalBuffer) - self.fHead
+
+    def dequeue(self, buffer: bytes, offset: int, size: int):
+        if size > self.fSize:
+            size = self.fSize
+
+        if size == 0:
+            return 0
+
+        if self.fHead < self.fTail:
+            buffer[offset:offset + size] = self.fInternalBuffer[self.fHead:self.fHead + size]
+        else:
+            rightLength = len(self.fInternalBuffer) - self.fHead
+
+            if rightLength >= size:
+                buffer[offset:offset + size] = self.fInternalBuffer[self.fHead:self.fHead + size]
+            else:
+                buffer[offset:offset + rightLength] = self.fInternalBuffer[self.fHead:self.fHead + rightLength]
+                buffer[offset + rightLength:offset + size] = self.fInternalBuffer[:size - rightLength]
+
+        self.fHead = (self.fHead + size) % len(self.fInternalBuffer)
+        self.fSize -= size
+
+        if self.fSize == 0:
+            self.fHead = 0
+            self.fTail = 0
+
+        self.fSizeUntilCut = len(self.fInternalBuffer) - self.fHead
+        return size
+
+    def peek_one(self, index: int):
+        return self.fInternalBuffer[index - self.fSizeUntilCut] if index >= self.fSizeUntilCut else \
+            self.fInternalBuffer[self.fHead + index]
+
+    def find(self, value: int, start: int = 0) -> int:
+        for i in range(start, self.fSize):
+            if self.peek_one(i) == value:
+                return i
+        return -1
+
+
+def report(name: str, size: int, legacy: float, current: float):
+    print(f"{name:<24}{size:>8} B  legacy {legacy * 1e6:10.2f} us  current {current * 1e6:10.2f} us"
+          f"  x{legacy / current:6.2f}")
+
+
+def best(stmt, number: int) -> float:
+    return min(timeit.repeat(stmt, number=number, repeat=5)) / number
+
+
+def bench_roundtrip(size: int):
+    data = bytes(range(256)) * (size // 256 + 1)
+    data = data[:size]
+    out = bytearray(size)
+    number = max(10, 200000 // size)
+
+    def run(q):
+        # половина чанка остается в очереди, чтобы кольцо переходило через точку разреза
+        def step():
+            q.enqueue(data, 0, size)
+            q.dequeue(out, 0, size)
+        q.enqueue(data, 0, size // 2)
+        return best(step, number)
+
+    report("enqueue/dequeue", size, run(LegacyByteQueue(size * 2)), run(ByteQueue(size * 2)))
+
+
+def bench_socket_read(size: int):
+    a, b = socket.socketpair()
+    a.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, max(size * 4, 0x10000))
+    b.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, max(size * 4, 0x10000))
+    data = bytes(size)
+    out = bytearray(size)
+    number = max(10, 100000 // size)
+
+    def legacy_step(q=LegacyByteQueue(size * 2)):
+        a.sendall(data)
+        n = 0
+        while n < size:
+            chunk = b.recv(size - n)
+            q.enqueue(chunk, 0, len(chunk))
+            n += len(chunk)
+        q.dequeue(out, 0, size)
+
+    def current_step(q=ByteQueue(size * 2)):
+        a.sendall(data)
+        n = 0
+        while n < size:
+            n += q.readinto(b.recv_into, size - n, b.recv)
+        q.dequeue(out, 0, size)
+
+    report("recv -> queue", size, best(legacy_step, number), best(current_step, number))
+    a.close()
+    b.close()
+
+
+def bench_find(size: int):
+    data = bytearray(size)
+    data[-1] = 0x10
+    number = max(5, 20000 // size)
+
+    def run(q):
+        q.enqueue(data, 0, size // 2)
+        q.dequeue(bytearray(size), 0, size // 2)
+        q.enqueue(data, 0, size)
+        return best(lambda: q.find(0x10), number)
+
+    report("find", size, run(LegacyByteQueue(size + size // 2)), run(ByteQueue(size + size // 2)))
+
+
+def bench_byte_queue():
+    for size in SIZES:
+        bench_roundtrip(size)
+    for size in SIZES:
+        bench_socket_read(size)
+    for size in SIZES:
+        bench_find(size)
+
+
+# порог ByteQueue.SMALL_COPY на размерах кадров M4: 69 Б - ответ с одной страницей flash, 140..1024 Б - ответы
+# ReadTags / ReadArchive. сравниваются копирование срезом (ниже порога) и memoryview / recv_into (выше порога)
+FRAME_SIZES = (69, 140, 300, 1024, 4096, 8192)
+
+
+def bench_frame_copy():
+    def queue(small_copy: int, size: int) -> ByteQueue:
+        q = ByteQueue(size * 4)
+        q.SMALL_COPY = small_copy
+        return q
+
+    for size in FRAME_SIZES:
+        src = bytes(size * 2)
+        out = bytearray(size)
+        number = max(200, 200000 // size)
+
+        def roundtrip(q):
+            def step():
+                q.enqueue(src, 1, size)
+                q.dequeue(out, 0, size)
+            return best(step, number)
+
+        a, b = socket.socketpair()
+
+        def recv(q, use_recv: bool):
+            def step():
+                a.sendall(src[:size])
+                n = 0
+                while n < size:
+                    n += q.readinto(b.recv_into, size - n, b.recv if use_recv else None)
+                q.dequeue(out, 0, size)
+            return best(step, number)
+
+        print(f"{size:>6} B  enqueue/dequeue: срез {roundtrip(queue(1 << 30, size)) * 1e6:6.2f} us, "
+              f"memoryview {roundtrip(queue(0, size)) * 1e6:6.2f} us;  "
+              f"прием: recv {recv(queue(1 << 30, size), True) * 1e6:6.2f} us, "
+              f"recv_into {recv(queue(0, size), False) * 1e6:6.2f} us")
+        a.close()
+        b.close()
+
+
+# побитовый CRC16 и побайтовая сумма до перехода на Utils.Checksum - для сравнения
+def legacy_crc16(crc, buf: bytearray, offset: int, length: int):
+    while length > 0:
+        crc ^= (buf[offset] << 8) & 0xFFFF
+        for j in range(8):
+            if (crc & 0x8000) != 0:
+                crc = ((crc << 1) ^ 0x1021) & 0xFFFF
+            else:
+                crc = (crc << 1) & 0xFFFF
+        offset += 1
+        length -= 1
+
+    return crc
+
+
+def legacy_checksum8(buf: bytes, start: int, length: int):
+    a = 0xFF
+    for i in range(length):
+        a -= buf[start + i]
+
+    return a & 0xFF
+
+
+def check_checksums():
+    rnd = bytes((i * 7919 + 13) & 0xFF for i in range(4099))
+    for n in (0, 1, 2, 7, 64, 255, 1024, 4099):
+        for crc in (0, 0x1D0F, 0xFFFF):
+            expected = legacy_crc16(crc, rnd, 0, n)
+            assert Crc16.compute(crc, rnd, 0, n) == expected
+            assert Crc16.fold_table(crc, rnd[:n]) == expected
+            assert Crc16(crc).update(rnd[:n // 3]).update(memoryview(rnd)[n // 3:n]).value == expected
+        assert Checksum8.compute(rnd, 0, n) == legacy_checksum8(rnd, 0, n)
+        assert Checksum8().update(rnd[:n // 2]).update(rnd[n // 2:n]).value == legacy_checksum8(rnd, 0, n)
+
+
+def bench_checksum():
+    check_checksums()
+    for size in SIZES:
+        data = (bytes(range(256)) * (size // 256 + 1))[:size]
+        number = max(3, 20000 // size)
+        report("crc16", size, best(lambda: legacy_crc16(0, data, 0, size), number),
+               best(lambda: Crc16.compute(0, data, 0, size), number * 10))
+        report("crc16 table", size, best(lambda: legacy_crc16(0, data, 0, size), number),
+               best(lambda: Crc16.fold_table(0, data), number))
+        report("checksum8", size, best(lambda: legacy_checksum8(data, 0, size), number),
+               best(lambda: Checksum8.compute(data, 0, size), number * 10))
+
+
+# разбор тэга цепочкой if/elif до перехода на таблицу Logika4M.TAG_PARSERS - для сравнения
+def legacy_parse_tag(buf: bytearray, idx: int, Logika4M, OperParamFlag):
+    tID = buf[idx]
+    lenLen, t_len = Logika4M.get_tag_length(buf, idx + 1)
+    iSt = idx + 1 + lenLen
+
+    if tID == 0x05:
+        v = None
+    elif tID == 0x43:
+        v = struct.unpack('<f', buf[iSt:iSt + 4])[0]
+    elif tID == 0x41:
+        v = struct.unpack('<I', buf[iSt:iSt + 4])[0]
+    elif tID == 0x04:
+        v = array.array('B', buf[iSt:iSt + t_len])
+    elif tID == 0x16:
+        v = buf[iSt:iSt + t_len].decode('cp1251')
+    elif tID == 0x44:
+        int_val = struct.unpack('<i', buf[iSt:iSt + 4])[0]
+        float_val = struct.unpack('<f', buf[iSt + 4:iSt + 8])[0]
+        v = float(int_val) + float_val
+    elif tID == 0x45:
+        v = (OperParamFlag.Yes if buf[iSt] > 0 else OperParamFlag.No) if t_len > 0 else OperParamFlag.No
+    elif tID == 0x47:
+        v = "{:02}:{:02}:{:02}".format(buf[iSt + 3], buf[iSt + 2], buf[iSt + 1])
+    elif tID == 0x48:
+        v = "{:02}-{:02}-{:02}".format(buf[iSt], buf[iSt + 1], buf[iSt + 2])
+    elif tID == 0x49:
+        tv = [0, 1, 1, 0, 0, 0, 0, 0]
+        for t in range(min(t_len, len(tv))):
+            tv[t] = buf[iSt + t]
+        v = datetime(2000 + tv[0], tv[1], tv[2], tv[3], tv[4], tv[5], (tv[7] << 8) | tv[6])
+    elif tID == 0x4A:
+        v = (buf[iSt], struct.unpack('<H', buf[iSt + 1:iSt + 3])[0])
+    else:
+        raise Exception(f"unknown tag type 0x{tID:02X}")
+
+    return 1 + lenLen + t_len, v
+
+
+def legacy_parse_tags(buf: bytearray) -> list:
+    from Logika.Meters.__4M.Logika4M import Logika4M, OperParamFlag
+
+    values = []
+    tp = 0
+    while tp < len(buf):
+        n, v = legacy_parse_tag(buf, tp, Logika4M, OperParamFlag)
+        values.append(v)
+        tp += n
+    return values
+
+
+# корпус полезных нагрузок ответов ReadTags (24 тэга: текущие значения, параметры с признаком
+# оперативности, тотальные счетчики, строки, дата и время) и потока тэгов записей ReadArchive
+# (метка интервала, время, дата, 16 значений) - по формату ответов СПТ943 rev.3 / СПГ742
+def tags_corpus() -> list[tuple[str, bytes]]:
+    def tag(tid: int, payload: bytes) -> bytes:
+        return bytes((tid, len(payload))) + payload
+
+    def f32(v: float) -> bytes:
+        return tag(0x43, struct.pack('<f', v))
+
+    read_tags = bytearray()
+    for i in range(24):
+        k = i % 6
+        if k == 0:
+            read_tags += f32(20.5 + i)
+        elif k == 1:
+            read_tags += f32(1.25 * i) + tag(0x45, b"\x01")
+        elif k == 2:
+            read_tags += tag(0x44, struct.pack('<if', 123456 + i, 0.375))
+        elif k == 3:
+            read_tags += tag(0x41, struct.pack('<I', 0x10000 + i))
+        elif k == 4:
+            read_tags += tag(0x16, "СПТ943.3".encode('cp1251'))
+        else:
+            read_tags += tag(0x47, bytes((0, 15, 30, 12))) + tag(0x48, bytes((18, 10, 26)))
+
+    archive = bytearray()
+    for h in range(24):
+        archive += tag(0x49, bytes((26, 10, 18, h, 0, 0, 0, 0)))
+        archive += tag(0x47, bytes((0, 0, 0, h))) + tag(0x48, bytes((18, 10, 26)))
+        for j in range(16):
+            archive += f32(j * 0.5 + h) if j % 4 else tag(0x44, struct.pack('<if', 1000 * h + j, 0.125))
+
+    return [("ReadTags", bytes(read_tags)), ("ReadArchive", bytes(archive))]
+
+
+def check_parse_tags():
+    from Logika.Meters.__4M.Logika4M import Logika4M
+
+    for name, payload in tags_corpus():
+        expected = [bytes(v) if hasattr(v, "tobytes") else v for v in legacy_parse_tags(bytearray(payload))]
+        assert Logika4M.parse_tags(bytearray(payload)) == expected, name
+        assert Logika4M.parse_tags(memoryview(payload)) == expected, name
+        tp = 0
+        for v in expected:
+            n, o = Logika4M.parse_tag(payload, tp)
+            assert o == v, name
+            tp += n
+
+
+def bench_parse_tags():
+    from Logika.Meters.__4M.Logika4M import Logika4M
+
+    check_parse_tags()
+    for name, payload in tags_corpus():
+        buf = bytearray(payload)
+        n_tags = len(Logika4M.parse_tags(buf))
+        legacy = best(lambda: legacy_parse_tags(buf), 200)
+        current = best(lambda: Logika4M.parse_tags(buf), 200)
+        report(name, len(buf), legacy, current)
+        print(f"{'':<24}{n_tags:>8} тэгов  legacy {n_tags / legacy / 1e6:6.2f} Мтэг/с  "
+              f"current {n_tags / current / 1e6:6.2f} Мтэг/с")
+
+
+# имитация прибора M4 на последовательной линии: передача занимает 11 бит на байт, прибор вне сеанса
+# просыпается через wake_time после 16 байт FF, переданных по одному (или пачкой, если fast_wake),
+# отвечает на рукопожатие и ReadTags с задержкой reply_delay
+class SimulatedMeterLink(OfflineConnection):
+    def __init__(self, baud: int = 2400, fast_wake: bool = True, wake_time: float = 0.03, reply_delay: float = 0.02,
+                 present: set = None):
+        super().__init__(None)
+        self.present = present  # NT приборов на шине, None - отвечает любой
+        self.read_timeout = 300
+        self.baud = baud
+        self.fast_wake = fast_wake
+        self.wake_time = wake_time
+        self.reply_delay = reply_delay
+        self.frames = M4FrameBuilder()
+        self.sleep()
+
+    def sleep(self):
+        self.awake_at = None
+        self.slow_ffs = 0
+        self.out = bytearray()
+        self.out_ready = 0.0
+
+    def internal_write(self, buf, start: int, n_bytes: int):
+        data = bytes(buf[start:start + n_bytes])
+        time.sleep(n_bytes * 11 / self.baud)
+        now = time.monotonic()
+        if data.count(0xFF) == len(data):
+            self.slow_ffs = self.slow_ffs + 1 if len(data) == 1 else 0
+            if self.awake_at is None and (self.slow_ffs >= 16 or (self.fast_wake and len(data) >= 16)):
+                self.awake_at = now + self.wake_time
+            return
+        self.slow_ffs = 0
+        if self.awake_at is None or now < self.awake_at:
+            return
+        if self.present is not None and data[1] not in self.present:
+            return
+
+        if data[2] == M4Opcode.Handshake.value:
+            reply = self.frames.legacy(data[1], M4Opcode.Handshake, bytes([0x54, 0x29, 0x00]))
+        elif data[2] == 0x90 and data[7] == M4Opcode.ReadTags.value:
+            reply = self.frames.extended(data[1], data[3], M4Opcode.ReadTags, b"\x43\x04\x00\x00\x80\x3f")
+        else:
+            return
+        self.out += reply
+        self.out_ready = now + self.reply_delay + len(reply) * 11 / self.baud
+
+    def internal_read(self, buf, start: int, max_length: int) -> int:
+        wait = self.rx_wait_time()
+        if not self.out or self.out_ready - time.monotonic() > wait:
+            time.sleep(wait)
+            raise ECommException(ExcSeverity.Error, CommError.Timeout)
+        delay = self.out_ready - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        n = min(max_length, len(self.out))
+        buf[start:start + n] = self.out[:n]
+        del self.out[:n]
+        return n
+
+
+# последовательность до WakeStrategy: FF (медленно, если тип прибора не поддерживает быстрый вход в сеанс),
+# фиксированная пауза 100 мс, рукопожатие
+def legacy_session(proto, mtr, nt: int, channel: int, already_awake: bool):
+    proto.send_attention(not mtr.supports_fast_session_init and not already_awake)
+    time.sleep(0.1)
+    proto.connection.purge_comms(PurgeFlags.RX)
+    return proto.do_legacy_request(nt, M4Opcode.Handshake, bytearray([channel, 0, 0, 0]), 3)
+
+
+def learned_session(proto, mtr, nt: int, channel: int, already_awake: bool):
+    return proto.establish_session(mtr, nt, channel, already_awake)
+
+
+# время от начала сеанса до первого прочитанного тэга: холодный старт (прибор спит) и смена канала
+# в открытом сеансе, для прибора с быстрым входом в сеанс, прибора с медленным и прибора, у которого
+# быстрый вход заявлен, но на данной линии не срабатывает
+def bench_session(sessions: int = 4):
+    from types import SimpleNamespace
+    from Logika.Protocols.M4.M4Protocol import M4Protocol
+
+    scenarios = (
+        ("fast meter", True, True),
+        ("slow meter", False, False),
+        ("fast meter, fast wake lost", True, False),
+    )
+    for name, supports_fast, fast_wake in scenarios:
+        mtr = SimpleNamespace(supports_fast_session_init=supports_fast)
+        for strategy, establish in (("legacy", legacy_session), ("learned", learned_session)):
+            link = SimulatedMeterLink(fast_wake=fast_wake)
+            proto = M4Protocol()
+            proto.connection = link
+            link.open()
+            cold, warm, failed = [], [], 0
+            for i in range(sessions):
+                link.sleep()
+                for times, awake in ((cold, False), (warm, True)):
+                    t0 = time.monotonic()
+                    try:
+                        establish(proto, mtr, 1, 0 if not awake else 1, awake)
+                        proto.do_m4_request(1, M4Opcode.ReadTags, bytearray([0x4A, 0x03, 0x00, 0x08, 0x00]))
+                    except ECommException:
+                        failed += 1
+                        continue
+                    times.append(time.monotonic() - t0)
+
+            def ms(v):
+                return f"{1000 * sum(v) / len(v):7.1f} ms" if v else "      - "
+            print(f"{name:<28}{strategy:<9} cold {ms(cold)}  reselect {ms(warm)}  failed {failed}/{2 * sessions}")
+
+
+# поиск приборов перебором NT: по одному get_meter_type на адрес (пробуждение и полный read_timeout)
+# и M4Discovery - одно пробуждение, короткий таймаут, для шлюза - группы рукопожатий
+def bench_discovery(n_addrs: int = 16):
+    from Logika.Protocols.M4.M4Discovery import M4Discovery
+    from Logika.Protocols.M4.M4Protocol import M4Protocol
+
+    present = {3, 11}
+
+    def new_proto():
+        link = SimulatedMeterLink(present=present)
+        link.read_timeout = 1000
+        proto = M4Protocol()
+        proto.connection = link
+        link.open()
+        return proto
+
+    proto = new_proto()
+    t0 = time.monotonic()
+    found = []
+    for nt in range(n_addrs):
+        try:
+            proto.handshake(nt, 0, False)
+            found.append(nt)
+        except ECommException:
+            pass
+    print(f"get_meter_type x{n_addrs:<4} {time.monotonic() - t0:6.2f} s  найдено {found}")
+
+    for interleave in (1, 4):
+        proto = new_proto()
+        t0 = time.monotonic()
+        res = M4Discovery(proto, interleave=interleave, read_model=False).scan(range(n_addrs))
+        print(f"M4Discovery, группа {interleave}  {time.monotonic() - t0:6.2f} s  найдено {[r[0] for r in res]}")
+
+
+# чтение страниц flash для набора тэгов 4L: по тэгу (страница тэга и, для четной, следующая) и по плану
+# FlashReadPlanner. время - оценка по модели планировщика (длительность кадров на скорости линии и rtt)
+def bench_flash_plan(n_tags: int = 60, pages: int = 400, seed: int = 1):
+    import random
+    from Logika.Protocols.M4.FlashReadPlanner import FlashReadPlanner
+
+    rnd = random.Random(seed)
+    # тэги группами: параметры каналов лежат рядом, между группами - пропуски
+    addrs = []
+    while len(addrs) < n_tags:
+        base = rnd.randrange(0, (pages - 8) * 64)
+        addrs.extend(base + 4 * rnd.randrange(0, 96) for _ in range(rnd.randrange(2, 8)))
+    addrs = addrs[:n_tags]
+
+    def per_tag():
+        page_map = [False] * pages
+        ranges = []
+        for addr in addrs:
+            stp = addr // 64
+            cnt = 1 + (stp % 2 if stp < pages - 1 else 0)
+            missing = [p for p in range(stp, stp + cnt) if not page_map[p]]
+            if missing:
+                ranges.append((missing[0], missing[-1] - missing[0] + 1))
+                for p in range(missing[0], missing[-1] + 1):
+                    page_map[p] = True
+        return ranges
+
+    for baud_rate in (2400, 9600, 57600):
+        planner = FlashReadPlanner(baud_rate)
+        legacy = per_tag()
+        need = set(p for a in addrs for p in FlashReadPlanner.pages_of(a, 4, 64))
+        plan = planner.plan(need, [False] * pages)
+        print(f"{baud_rate:>6} бод  по тэгу {len(legacy):4} запросов {planner.cost(legacy):7.2f} s   "
+              f"план {len(plan):4} запросов {planner.cost(plan):7.2f} s")
+
+
+# карта страниц: список bool и PageBitmap - память и проверка наличия страниц элемента архива
+def bench_page_map(pages: int = 8192):
+    from Logika.Utils.PageBitmap import PageBitmap
+
+    legacy = [True] * pages
+    bitmap = PageBitmap(pages)
+    bitmap.set_range(0, pages)
+    print(f"{pages} страниц: list {sys.getsizeof(legacy)} байт, PageBitmap {sys.getsizeof(bitmap.bits)} байт")
+
+    for span in (2, 4, 8, 16, 256):
+        bench_page_span(legacy, bitmap, span)
+
+
+def bench_page_span(legacy, bitmap, span: int):
+    starts = range(0, len(legacy) - span, 7)
+
+    def legacy_all():
+        for st in starts:
+            for p in range(st, st + span):
+                if not legacy[p]:
+                    break
+
+    def bitmap_all():
+        for st in starts:
+            bitmap.all_set(st, span)
+
+    report("all_set", span, best(legacy_all, 50), best(bitmap_all, 50))
+
+
+# прогон записанного сеанса (WireCapture) через M4Protocol: каждый записанный запрос отправляется заново,
+# ответ принимается и разбирается так же, как при опросе прибора
+def replay_session(path: str, paced: bool = False):
+    from Logika.Connections.Connection import MonitorEventType
+    from Logika.Connections.ReplayConnection import ReplayConnection
+    from Logika.Protocols.M4.M4Protocol import M4Protocol, RecvFlags
+
+    conn = ReplayConnection(path, paced=paced)
+    proto = M4Protocol()
+    proto.connection = conn
+    conn.open()
+
+    requests = [r.data for r in conn.records if r.direction == MonitorEventType.Tx]
+    packets = errors = 0
+    for req in requests:
+        conn.write(req, 0, len(req))
+        if len(req) < 3 or req[0] != M4Protocol.FRAME_START:
+            continue  # FF пробуждения и прочее без ответа
+
+        nt = req[1]
+        try:
+            if req[2] == M4Protocol.EXT_PROTO:
+                opcode = M4Opcode(req[7])
+                p = proto.recv_packet(nt, opcode, req[3], 0, RecvFlags.DontThrowOnErrorReply)
+                if opcode == M4Opcode.ReadArchive and p.FunctionCode == M4Opcode.ReadArchive:
+                    proto.parse_archive_packet(p)
+                elif opcode == M4Opcode.ReadTags and p.FunctionCode == M4Opcode.ReadTags:
+                    proto.parse_m4_tags_packet(p)
+            else:
+                opcode = M4Opcode(req[2])
+                proto.recv_packet(nt, opcode, None, M4Protocol.get_legacy_response_data_len(opcode),
+                                  RecvFlags.DontThrowOnErrorReply)
+            packets += 1
+        except ECommException:
+            errors += 1
+
+    return packets, errors
+
+
+def bench_replay(path: str):
+    profiler = cProfile.Profile()
+    profiler.enable()
+    packets, errors = replay_session(path)
+    profiler.disable()
+    print(f"{packets} ответов разобрано, {errors} ошибок")
+    pstats.Stats(profiler).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(25)
+
+
+BENCHMARKS = {
+    "bytequeue": bench_byte_queue,
+    "frame_copy": bench_frame_copy,
+    "checksum": bench_checksum,
+    "parse_tags": bench_parse_tags,
+    "session": bench_session,
+    "discovery": bench_discovery,
+    "flash_plan": bench_flash_plan,
+    "page_map": bench_page_map,
+}
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2 and sys.argv[1] == "replay":
+        bench_replay(sys.argv[2])
+        sys.exit()
+
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        print(f"--- {name}")
+        BENCHMARKS[name]()